@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+
+""" Simulated Kubernetes API server for benchmarking and testing the native backend
+of the log collector (--k8s_backend native) without a cluster.
+It serves the same simulated cluster as fake_k8s_cli.py over HTTP: the API discovery,
+list/get of objects and container logs. For testing, requests can be required to carry
+a bearer token, and the next requests to a path can be failed with given statuses.
+Run it directly to serve the scenario in LOG_COLLECTOR_BENCH_SCENARIO, the fake CLI
+points the kubeconfig to it through LOG_COLLECTOR_BENCH_API_SERVER.
+"""
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from fake_k8s_cli import CLUSTER_KINDS, find_pod, load_scenario, log_data, pods, served_kinds, transfer
+
+REDIS_GROUP = "app.redislabs.com"
+REDIS_GROUP_VERSION = f"{REDIS_GROUP}/v1"
+RESOURCE_PATH_PATTERN = re.compile(r'^/(?:api/v1|apis/(?P<group_version>[^/]+/[^/]+))'
+                                   r'(?:/namespaces/(?P<namespace>[^/]+))?/(?P<plural>[^/]+)'
+                                   r'(?:/(?P<name>[^/]+))?(?:/(?P<subresource>[^/]+))?$')
+
+
+def group_version(kind):
+    """
+        Returns the group version of a simulated kind
+    """
+    return REDIS_GROUP_VERSION if kind.startswith("Redis") else "v1"
+
+
+def plural(kind):
+    """
+        Returns the plural resource name of a kind
+    """
+    return kind.lower() + ("es" if kind.endswith("s") else "s")
+
+
+def api_resource_list(scenario, version):
+    """
+        Returns the resources of a group version, as served by the discovery API
+    """
+    resources = []
+    for kind in served_kinds(scenario):
+        if group_version(kind) != version:
+            continue
+        resources.append({"name": plural(kind), "singularName": kind.lower(), "kind": kind,
+                          "namespaced": kind not in CLUSTER_KINDS, "verbs": ["get", "list", "watch"]})
+        if kind == "Pod":
+            resources.append({"name": "pods/log", "singularName": "", "kind": "Pod", "namespaced": True,
+                              "verbs": ["get"]})
+    return {"kind": "APIResourceList", "apiVersion": "v1", "groupVersion": version, "resources": resources}
+
+
+def simulated_object(kind, name, namespace, index):
+    """
+        Returns a simulated object, the same as the items of the fake CLI
+    """
+    metadata = {"name": name, "resourceVersion": str(index + 1), "uid": f"uid-{namespace}-{kind}-{name}",
+                "labels": {"app": "redis-enterprise"}}
+    if kind not in CLUSTER_KINDS:
+        metadata["namespace"] = namespace
+    return {"apiVersion": group_version(kind), "kind": kind, "metadata": metadata,
+            "spec": {"replicas": 3, "description": f"simulated {kind} {index}"}, "status": {"phase": "Running"}}
+
+
+def simulated_objects(scenario, kind, namespace):
+    """
+        Returns the simulated objects of a kind in a namespace
+    """
+    if kind == "Pod":
+        return pods(scenario, namespace)
+    return [simulated_object(kind, f"{kind.lower()}-{i}", namespace, i) for i in range(scenario["objects_per_kind"])]
+
+
+def matches_selector(labels, selector):
+    """
+        Check whether labels match an equality based label selector, e.g. 'app=x,role!=y,z'
+    """
+    for requirement in filter(None, (part.strip() for part in selector.split(","))):
+        if "!=" in requirement:
+            key, value = requirement.split("!=", 1)
+            if labels.get(key) == value:
+                return False
+        elif "=" in requirement:
+            key, value = requirement.replace("==", "=").split("=", 1)
+            if labels.get(key) != value:
+                return False
+        elif requirement.startswith("!"):
+            if requirement[1:] in labels:
+                return False
+        elif requirement not in labels:
+            return False
+    return True
+
+
+def status(code, reason, message):
+    """
+        Returns a Status object, as the API server responds upon failures
+    """
+    return {"kind": "Status", "apiVersion": "v1", "metadata": {}, "status": "Failure", "message": message,
+            "reason": reason, "code": code}
+
+
+class FakeKubernetesApiServer(ThreadingHTTPServer):
+    """
+        Serves a simulated cluster on a local port, from threads of the current process
+    """
+    daemon_threads = True
+
+    def __init__(self, scenario, token=None, port=0):
+        super().__init__(("127.0.0.1", port), FakeKubernetesApiHandler)
+        self.scenario = scenario
+        # the bearer token the requests have to carry, any (or none) when None
+        self.token = token
+        # (path, status) of every request
+        self.requests = []
+        self._faults = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+            The URL of the server, for the kubeconfig
+        """
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        """
+            Start serving in a background thread
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+            Stop serving, and close the listening socket
+        """
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def inject_faults(self, path, code, count=1):
+        """
+            Fail the next <count> requests to the given path (without the query) with the given status
+        """
+        with self._lock:
+            self._faults.extend([(path, code)] * count)
+
+    def take_fault(self, path):
+        """
+            Returns the status of the next fault injected for the path, None if there is none
+        """
+        with self._lock:
+            for index, (fault_path, code) in enumerate(self._faults):
+                if fault_path == path:
+                    del self._faults[index]
+                    return code
+        return None
+
+    def record_request(self, path, code):
+        """
+            Record a request and its response status
+        """
+        with self._lock:
+            self.requests.append((path, code))
+
+
+class FakeKubernetesApiHandler(BaseHTTPRequestHandler):
+    """
+        Handles the GET requests of the collector to the simulated cluster
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        pass
+
+    def do_GET(self):  # pylint: disable=C0103
+        """
+            Serve a GET request
+        """
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        scenario = self.server.scenario
+        time.sleep(scenario["latency"] + random.uniform(0, scenario["latency_jitter"]))
+
+        code = self.server.take_fault(path)
+        if code is not None:
+            self.send_json(path, code, status(code, "InternalError" if code >= 500 else "Unauthorized",
+                                              "simulated failure"))
+        elif self.server.token and self.headers.get("Authorization") != f"Bearer {self.server.token}":
+            self.send_json(path, 401, status(401, "Unauthorized", "Unauthorized"))
+        elif RESOURCE_PATH_PATTERN.match(path) and random.random() < scenario["failure_rate"]:
+            self.send_json(path, 500, status(500, "InternalError", "simulated failure"))
+        elif path == "/api":
+            self.send_json(path, 200, {"kind": "APIVersions", "versions": ["v1"]})
+        elif path == "/apis":
+            self.send_json(path, 200, {"kind": "APIGroupList", "apiVersion": "v1", "groups": [
+                {"name": REDIS_GROUP, "versions": [{"groupVersion": REDIS_GROUP_VERSION, "version": "v1"}],
+                 "preferredVersion": {"groupVersion": REDIS_GROUP_VERSION, "version": "v1"}}]})
+        elif path == "/api/v1":
+            self.send_json(path, 200, api_resource_list(scenario, "v1"))
+        elif path == f"/apis/{REDIS_GROUP_VERSION}":
+            self.send_json(path, 200, api_resource_list(scenario, REDIS_GROUP_VERSION))
+        elif path == "/version":
+            self.send_json(path, 200, {"major": "1", "minor": "28", "gitVersion": "v1.28.0"})
+        else:
+            self.serve_resource(path, query)
+
+    def serve_resource(self, path, query):
+        """
+            Serve a list, a get, or the logs of a container
+        """
+        scenario = self.server.scenario
+        match = RESOURCE_PATH_PATTERN.match(path)
+        kind = None
+        if match:
+            version = match.group("group_version") or "v1"
+            kind = next((kind for kind in served_kinds(scenario)
+                         if plural(kind) == match.group("plural") and group_version(kind) == version), None)
+        if kind is None or (match.group("namespace") is None) != (kind in CLUSTER_KINDS):
+            self.send_json(path, 404, status(404, "NotFound", "the server could not find the requested resource"))
+            return
+        namespace, name, subresource = match.group("namespace") or "", match.group("name"), match.group("subresource")
+        if subresource == "log" and kind == "Pod":
+            self.serve_logs(path, namespace, name, query)
+        elif subresource:
+            self.send_json(path, 404, status(404, "NotFound", "the server could not find the requested resource"))
+        elif name:
+            # like the fake CLI, objects of any name exist, but for pods
+            item = find_pod(scenario, namespace, name) if kind == "Pod" else simulated_object(kind, name, namespace, 0)
+            if item is None:
+                self.send_json(path, 404, status(404, "NotFound", f"{plural(kind)} \"{name}\" not found"))
+            else:
+                self.send_json(path, 200, item)
+        else:
+            items = [item for item in simulated_objects(scenario, kind, namespace)
+                     if matches_selector(item["metadata"].get("labels") or {}, query.get("labelSelector", ""))]
+            for item in items:
+                # like the API server, the type information is omitted from list items
+                item.pop("apiVersion", None)
+                item.pop("kind", None)
+            self.send_json(path, 200, {"apiVersion": group_version(kind), "kind": f"{kind}List",
+                                       "metadata": {"resourceVersion": "1"}, "items": items})
+
+    def serve_logs(self, path, namespace, pod_name, query):
+        """
+            Stream simulated log lines of a container
+        """
+        scenario = self.server.scenario
+        simulated_pod = find_pod(scenario, namespace, pod_name)
+        if simulated_pod is None:
+            self.send_json(path, 404, status(404, "NotFound", f"pods \"{pod_name}\" not found"))
+            return
+        container = query.get("container", "")
+        restarts = {container_status["name"]: container_status["restartCount"]
+                    for container_status in simulated_pod["status"]["containerStatuses"]}
+        if container not in restarts:
+            self.send_json(path, 400, status(400, "BadRequest", f"container {container} is not valid for pod "
+                                                                f"{pod_name}"))
+            return
+        if query.get("previous") == "true" and not restarts[container]:
+            self.send_json(path, 400, status(400, "BadRequest", f"previous terminated container \"{container}\" "
+                                                                f"in pod \"{pod_name}\" not found"))
+            return
+        size = scenario["container_log_bytes"]
+        self.server.record_request(path, 200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        transfer(scenario, size)
+        for chunk in log_data(size):
+            self.wfile.write(chunk)
+
+    def send_json(self, path, code, data):
+        """
+            Respond with a JSON body
+        """
+        self.server.record_request(path, code)
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    """
+        Serve the simulated cluster until interrupted
+    """
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    server = FakeKubernetesApiServer(load_scenario(), port=port)
+    print(f"Serving the simulated cluster on {server.url}, export LOG_COLLECTOR_BENCH_API_SERVER={server.url}",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+#!/usr/bin/env python
+
+""" Simulated kubectl/oc for benchmarking the log collector without a cluster.
+The simulated cluster is described by the scenario JSON file in the
+LOG_COLLECTOR_BENCH_SCENARIO environment variable (see scenarios.py), and every
+invocation is appended to the file in LOG_COLLECTOR_BENCH_CALLS.
+"""
+import io
+import json
+import os
+import random
+import sys
+import tarfile
+import time
+
+from scenarios import DEFAULT_SCENARIO
+
+RLEC_CONTAINER_NAME = "redis-enterprise-node"
+RS_LOG_FOLDER_PATH = "/var/opt/redislabs/log"
+RS_CONFIG_FOLDER_PATH = "/opt/redislabs/config"
+OPERATOR_IMAGE = "redislabs/operator:7.4.2-2"
+CHUNK_SIZE = 64 * 1024
+LOG_LINE = "2024-01-01 00:00:00,000 INFO simulated log line of the Redis Enterprise benchmark cluster {:08d}\n"
+
+NAMESPACED_KINDS = ["RedisEnterpriseCluster", "RedisEnterpriseDatabase", "RedisEnterpriseRemoteCluster",
+                    "RedisEnterpriseActiveActiveDatabase", "StatefulSet", "Deployment", "ReplicaSet", "Service",
+                    "ConfigMap", "Ingress", "Role", "RoleBinding", "PersistentVolumeClaim", "PodDisruptionBudget",
+                    "EndpointSlice", "Pod", "Job", "NetworkPolicy", "CronJob", "ResourceQuota", "Event",
+                    "ServiceAccount"]
+CLUSTER_KINDS = ["ClusterRole", "ClusterRoleBinding", "PersistentVolume", "CustomResourceDefinition",
+                 "ValidatingWebhookConfiguration", "Namespace", "Node", "CertificateSigningRequest", "StorageClass",
+                 "VolumeAttachment"]
+OPENSHIFT_KINDS = ["Route", "ClusterServiceVersion", "Subscription", "InstallPlan", "CatalogSource"]
+
+
+def load_scenario():
+    """
+        Returns the simulated scenario, the defaults completed by the scenario file
+    """
+    scenario = dict(DEFAULT_SCENARIO)
+    path = os.environ.get("LOG_COLLECTOR_BENCH_SCENARIO")
+    if path:
+        with open(path, encoding='utf-8') as scenario_file:
+            scenario.update(json.load(scenario_file))
+    return scenario
+
+
+def record_call(args):
+    """
+        Append the invocation to the calls file, a single write so concurrent invocations don't interleave
+    """
+    path = os.environ.get("LOG_COLLECTOR_BENCH_CALLS")
+    if not path:
+        return
+    with open(path, "a", encoding='utf-8') as calls_file:
+        calls_file.write(json.dumps({"time": time.time(), "args": args}) + "\n")
+
+
+def fail(message, code=1):
+    """
+        Exit with an error message, as the k8s CLI does
+    """
+    sys.stderr.write(message + "\n")
+    sys.exit(code)
+
+
+def write_output(text):
+    """
+        Write text output
+    """
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def log_data(size):
+    """
+        Yields chunks of simulated log lines, of the given size in total
+    """
+    block = "".join(LOG_LINE.format(i) for i in range(CHUNK_SIZE // len(LOG_LINE.format(0)) + 1))
+    block = block.encode("utf-8")[:CHUNK_SIZE]
+    while size > 0:
+        chunk = block[:min(size, CHUNK_SIZE)]
+        size -= len(chunk)
+        yield chunk
+
+
+class LogReader(io.RawIOBase):
+    """
+        A file-like object of simulated log lines, so large files are never held in memory
+    """
+
+    def __init__(self, size):
+        super().__init__()
+        self._chunks = log_data(size)
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def transfer(scenario, size):
+    """
+        Simulate the transfer time of the given number of bytes
+    """
+    throughput = scenario["transfer_mb_per_second"]
+    if throughput:
+        time.sleep(size / (throughput * 1024 * 1024))
+
+
+def stream_log(scenario, size, output):
+    """
+        Stream simulated log lines of the given size to a binary output
+    """
+    transfer(scenario, size)
+    for chunk in log_data(size):
+        output.write(chunk)
+    output.flush()
+
+
+def rs_log_files(scenario):
+    """
+        Returns the names and the sizes of the log files of a Redis Enterprise pod
+    """
+    files = max(1, scenario["rs_log_files"])
+    size = scenario["rs_log_bytes"] // files
+    return [(f"simulated_{i}.log", size) for i in range(files)]
+
+
+def rs_config_files():
+    """
+        Returns the names and the sizes of the config files of a Redis Enterprise pod
+    """
+    return [("ccs-redis.conf", 4096), ("node.id", 64)]
+
+
+def pod(namespace, name, labels, containers, restarts=0):
+    """
+        Returns a simulated pod
+    """
+    return {"apiVersion": "v1", "kind": "Pod",
+            "metadata": {"name": name, "namespace": namespace, "uid": f"uid-{namespace}-{name}",
+                         "resourceVersion": "1", "labels": labels},
+            "spec": {"containers": [{"name": container} for container in containers], "initContainers": []},
+            "status": {"phase": "Running",
+                       "containerStatuses": [{"name": container, "ready": True,
+                                              "restartCount": restarts if container == containers[0] else 0}
+                                             for container in containers]}}
+
+
+def pods(scenario, namespace):
+    """
+        Returns the simulated pods of a namespace
+    """
+    items = [pod(namespace, f"rec-{i}", {"app": "redis-enterprise", "redis.io/role": "node",
+                                         "app.kubernetes.io/managed-by": "redis-enterprise-operator"},
+                 [RLEC_CONTAINER_NAME, "bootstrapper"], scenario["restarts"])
+             for i in range(scenario["rs_pods"])]
+    items.append(pod(namespace, "redis-enterprise-operator-0", {"name": "redis-enterprise-operator"},
+                     ["redis-enterprise-operator"]))
+    items.extend(pod(namespace, f"app-{i}", {"app": "other"}, ["app"]) for i in range(scenario["other_pods"]))
+    return items
+
+
+def find_pod(scenario, namespace, name):
+    """
+        Returns the simulated pod of the given name, None if there is no such pod
+    """
+    return next((item for item in pods(scenario, namespace) if item["metadata"]["name"] == name), None)
+
+
+def item_yaml(kind, name, namespace, index):
+    """
+        Returns a simulated object, as an item of a yaml list
+    """
+    return (f"- apiVersion: v1\n"
+            f"  kind: {kind}\n"
+            f"  metadata:\n"
+            f"    name: {name}\n"
+            f"    namespace: {namespace}\n"
+            f"    resourceVersion: \"{index + 1}\"\n"
+            f"    uid: uid-{namespace}-{kind}-{name}\n"
+            f"    labels:\n"
+            f"      app: redis-enterprise\n"
+            f"  spec:\n"
+            f"    replicas: 3\n"
+            f"    description: simulated {kind} {index}\n"
+            f"  status:\n"
+            f"    phase: Running\n")
+
+
+def served_kinds(scenario):
+    """
+        Returns the kinds served by the simulated cluster
+    """
+    return NAMESPACED_KINDS + CLUSTER_KINDS + (OPENSHIFT_KINDS if scenario["openshift"] else [])
+
+
+def find_kind(scenario, resource_type):
+    """
+        Returns the served kind of a resource type (kind, plural or qualified name), None if it isn't served
+    """
+    resource_type = resource_type.split("/")[0].split(".")[0].lower()
+    for kind in served_kinds(scenario):
+        if resource_type in (kind.lower(), kind.lower() + "s", kind.lower() + "es"):
+            return kind
+    return None
+
+
+def option_value(args, name):
+    """
+        Returns the value of an option given as "name value" or "name=value"
+    """
+    for i, arg in enumerate(args):
+        if arg == name and i + 1 < len(args):
+            return args[i + 1]
+        if arg.startswith(name + "="):
+            return arg[len(name) + 1:]
+    return None
+
+
+def positional_args(args):
+    """
+        Returns the positional arguments, without the options and their values
+    """
+    positional = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+            continue
+        if arg in ("-n", "-o", "-c", "--namespace", "--selector", "-l", "--field-selector"):
+            skip = True
+            continue
+        if arg.startswith("-"):
+            continue
+        positional.append(arg)
+    return positional
+
+
+def cmd_version(scenario, args):
+    """
+        kubectl/oc version
+    """
+    version = {"clientVersion": {"major": "1", "minor": "28", "gitVersion": "v1.28.0"},
+               "serverVersion": {"major": "1", "minor": "28", "gitVersion": "v1.28.0"}}
+    if scenario["openshift"]:
+        version["releaseClientVersion"] = "4.15.0"
+    if "json" in args:
+        write_output(json.dumps(version) + "\n")
+    else:
+        write_output("clientVersion:\n  gitVersion: v1.28.0\nserverVersion:\n  gitVersion: v1.28.0\n")
+
+
+def cmd_api_resources(scenario):
+    """
+        kubectl api-resources
+    """
+    lines = ["NAME                              SHORTNAMES   APIVERSION                   NAMESPACED   KIND"]
+    for kind in served_kinds(scenario):
+        group = "app.redislabs.com/v1" if kind.startswith("Redis") else "v1"
+        namespaced = "false" if kind in CLUSTER_KINDS else "true"
+        lines.append(f"{kind.lower() + 's':33} {'':12} {group:28} {namespaced:12} {kind}")
+    write_output("\n".join(lines) + "\n")
+
+
+def cmd_config(args):
+    """
+        kubectl config view
+    """
+    server = os.environ.get("LOG_COLLECTOR_BENCH_API_SERVER", "https://127.0.0.1:1")
+    if "--raw" in args:
+        write_output(json.dumps({
+            "current-context": "bench",
+            "contexts": [{"name": "bench", "context": {"cluster": "bench", "user": "bench", "namespace": "ns-0"}}],
+            "clusters": [{"name": "bench", "cluster": {"server": server}}],
+            "users": [{"name": "bench", "user": {"token": "bench"}}]}) + "\n")
+    elif "json" in args:
+        write_output(json.dumps({"current-context": "bench",
+                                 "contexts": [{"name": "bench", "context": {"namespace": "ns-0"}}]}) + "\n")
+    else:
+        # jsonpath output has no trailing newline
+        write_output(server)
+
+
+def cmd_get(scenario, args, namespace, describe=False):
+    """
+        kubectl get/describe
+    """
+    positional = positional_args(args)[1:]
+    output = option_value(args, "-o") or ""
+    resource_types = positional[0].split(",") if positional else []
+    names = positional[1:]
+    field_selector = option_value(args, "--field-selector") or ""
+    if field_selector.startswith("metadata.name="):
+        names.append(field_selector[len("metadata.name="):])
+    if len(resource_types) == 1 and "/" in resource_types[0]:
+        names.append(resource_types[0].split("/", 1)[1])
+    kinds = []
+    for resource_type in resource_types:
+        kind = find_kind(scenario, resource_type)
+        if kind is None:
+            fail(f"error: the server doesn't have a resource type \"{resource_type.lower()}\"")
+        kinds.append(kind)
+
+    if "-o=name" in args:
+        write_output("".join(f"persistentvolume/{name}\n" for name in names))
+        return
+    if "custom-columns" in output or any("custom-columns" in arg for arg in args):
+        write_output("".join(f"pvc-{namespace}-{i}\n" for i in range(scenario["rs_pods"])))
+        return
+    if kinds == ["Deployment"] and names == ["redis-enterprise-operator"]:
+        if output.startswith("jsonpath"):
+            write_output(OPERATOR_IMAGE)
+        else:
+            write_output(json.dumps({"metadata": {"name": "redis-enterprise-operator", "annotations": {}},
+                                     "spec": {"template": {"spec": {"containers": [{"image": OPERATOR_IMAGE}]}}}}))
+        return
+    if kinds == ["Pod"] and output == "json":
+        write_output(json.dumps({"apiVersion": "v1", "kind": "List", "items": pods(scenario, namespace)}))
+        return
+
+    objects = []
+    for kind in kinds:
+        if kind == "Pod":
+            kind_names = [item["metadata"]["name"] for item in pods(scenario, namespace)]
+        else:
+            kind_names = [f"{kind.lower()}-{i}" for i in range(scenario["objects_per_kind"])]
+        objects.extend((kind, name) for name in names or kind_names)
+
+    if describe:
+        write_output("".join(f"Name:         {name}\nNamespace:    {namespace}\nKind:         {kind}\n"
+                             f"Labels:       app=redis-enterprise\nEvents:       <none>\n\n\n"
+                             for kind, name in objects))
+    elif output == "yaml":
+        items = "".join(item_yaml(kind, name, namespace, i) for i, (kind, name) in enumerate(objects))
+        write_output("apiVersion: v1\n" + (f"items:\n{items}" if items else "items: []\n") +
+                     "kind: List\nmetadata:\n  resourceVersion: \"\"\n")
+    else:
+        write_output("NAME" + "".join(f"\n{kind.lower()}/{name}   Running   1d" for kind, name in objects) + "\n")
+
+
+def cmd_logs(scenario, args, namespace):
+    """
+        kubectl logs
+    """
+    positional = positional_args(args)
+    pod_name = positional[1] if len(positional) > 1 else ""
+    simulated_pod = find_pod(scenario, namespace, pod_name)
+    if simulated_pod is None:
+        fail(f"Error from server (NotFound): pods \"{pod_name}\" not found")
+    if "-p" in args:
+        container = option_value(args, "-c")
+        restarts = {status["name"]: status["restartCount"] for status in simulated_pod["status"]["containerStatuses"]}
+        if not restarts.get(container):
+            fail(f"Error from server (BadRequest): previous terminated container \"{container}\" in pod "
+                 f"\"{pod_name}\" not found")
+    stream_log(scenario, scenario["container_log_bytes"], sys.stdout.buffer)
+
+
+def write_tar(scenario, files, output, compress=False):
+    """
+        Stream a tar of simulated files, of (name, size) pairs, to a binary output
+    """
+    transfer(scenario, sum(size for _, size in files))
+    with tarfile.open(fileobj=output, mode="w|gz" if compress else "w|") as tar:
+        for name, size in files:
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = size
+            tar_info.mtime = time.time()
+            tar.addfile(tar_info, LogReader(size))
+    output.flush()
+
+
+def cmd_exec(scenario, args):
+    """
+        kubectl exec, running rladmin or a shell command on a Redis Enterprise pod
+    """
+    command = " ".join(args[args.index("--") + 1:]) if "--" in args else ""
+    if "debug_info" in command:
+        pod_name = positional_args(args)[1]
+        sick_pods = [f"rec-{i}" for i in range(scenario["sick_rs_pods"])]
+        time.sleep(scenario["sick_pod_seconds"] if pod_name in sick_pods else scenario["debug_info_seconds"])
+        package_dir = command.split(" path ", 1)[1].split()[0].strip("\"'") if " path " in command else "/tmp"
+        write_output(f"Preparing the debug info package...\nDownloading complete. "
+                     f"File {package_dir}/debuginfo.{os.getpid()}.tar.gz is saved\n")
+        return
+    if "tar c" in command:
+        files = []
+        if RS_LOG_FOLDER_PATH in command:
+            files.extend((f"./{name}", size) for name, size in rs_log_files(scenario))
+        if RS_CONFIG_FOLDER_PATH in command or "/opt/redislabs config" in command:
+            files.extend((f"config/{name}", size) for name, size in rs_config_files())
+        write_tar(scenario, files, sys.stdout.buffer, compress="tar cz" in command)
+        return
+    if "rm " in command or "test " in command or "kill " in command:
+        return
+    write_output("ok\n")
+
+
+def cmd_cp(scenario, args):
+    """
+        kubectl cp from a pod to a local path
+    """
+    positional = positional_args(args)
+    source, destination = positional[1], positional[2]
+    source_path = source.split(":", 1)[1]
+    if source_path == RS_LOG_FOLDER_PATH:
+        files = rs_log_files(scenario)
+    elif source_path == RS_CONFIG_FOLDER_PATH:
+        files = rs_config_files()
+    else:
+        files = [(None, scenario["debug_info_bytes"])]
+    transfer(scenario, sum(size for _, size in files))
+    if files[0][0] is not None:
+        os.makedirs(destination, exist_ok=True)
+    for name, size in files:
+        path = destination if name is None else os.path.join(destination, name)
+        with open(path, "wb") as output:
+            for chunk in log_data(size):
+                output.write(chunk)
+
+
+def main():
+    """
+        Simulate a single k8s CLI invocation
+    """
+    args = sys.argv[1:]
+    record_call(args)
+    scenario = load_scenario()
+    random.seed()
+    time.sleep(scenario["latency"] + random.uniform(0, scenario["latency_jitter"]))
+
+    namespace = option_value(args, "-n") or option_value(args, "--namespace") or "default"
+    positional = positional_args(args)
+    verb = positional[0] if positional else ""
+
+    if verb in ("get", "describe", "logs", "exec", "cp") and random.random() < scenario["failure_rate"]:
+        fail("Error from server (InternalError): an error on the server (\"simulated failure\") "
+             "has prevented the request from succeeding")
+
+    if verb == "help":
+        write_output("kubectl controls the Kubernetes cluster manager.\n")
+    elif verb == "version":
+        cmd_version(scenario, args)
+    elif verb == "api-versions":
+        write_output("v1\napps/v1\napp.redislabs.com/v1\n" +
+                     ("route.openshift.io/v1\n" if scenario["openshift"] else ""))
+    elif verb == "api-resources":
+        cmd_api_resources(scenario)
+    elif verb == "config":
+        cmd_config(args)
+    elif verb in ("get", "describe"):
+        cmd_get(scenario, args, namespace, describe=verb == "describe")
+    elif verb == "logs":
+        cmd_logs(scenario, args, namespace)
+    elif verb == "exec":
+        cmd_exec(scenario, args)
+    elif verb == "cp":
+        cmd_cp(scenario, args)
+    else:
+        fail(f"error: unknown command \"{verb}\" for \"kubectl\"")
+
+
+if __name__ == "__main__":
+    main()
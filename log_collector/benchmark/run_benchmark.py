@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+""" Benchmark harness of the log collector.
+Runs log_collector.py against a simulated kubectl/oc (fake_k8s_cli.py) and a
+simulated API server (fake_k8s_api.py) for each of the selected scenarios, and
+reports the wall time, the number of k8s CLI invocations and API requests, the
+peak RSS and the size of the bundle. Run with -h to see options
+"""
+import argparse
+import glob
+import json
+import os
+import shlex
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_k8s_api import FakeKubernetesApiServer
+from scenarios import SCENARIOS, get_scenario
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_COLLECTOR_PATH = os.path.join(os.path.dirname(BENCHMARK_DIR), "log_collector.py")
+FAKE_K8S_CLI_PATH = os.path.join(BENCHMARK_DIR, "fake_k8s_cli.py")
+
+
+def create_k8s_cli(bin_dir, scenario):
+    """
+        Create a kubectl (or oc) executable running the fake k8s CLI, returns its path
+    """
+    path = os.path.join(bin_dir, "oc" if scenario["openshift"] else "kubectl")
+    with open(path, "w", encoding='utf-8') as script:
+        script.write(f"#!/bin/sh\nexec {shlex.quote(sys.executable)} {shlex.quote(FAKE_K8S_CLI_PATH)} \"$@\"\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def run_collector(args, env, log_path):
+    """
+        Run the collector, returns its exit code, wall time and the peak RSS in bytes of its largest process
+    """
+    start = time.time()
+    with open(log_path, "w", encoding='utf-8') as log_file:
+        # pylint: disable=R1732
+        process = subprocess.Popen(args, stdout=log_file, stderr=subprocess.STDOUT, env=env)
+        # wait4 reports the resource usage of the collector, including the worker processes it waited for
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    wall_time = time.time() - start
+    # ru_maxrss is in kilobytes on Linux, and in bytes on macOS
+    peak_rss = rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+    return process.returncode, wall_time, peak_rss
+
+
+def run_scenario(name, extra_args, keep_dir=None):
+    """
+        Run a single scenario, returns its metrics
+    """
+    scenario = get_scenario(name)
+    work_dir = tempfile.mkdtemp(prefix=f"log_collector_bench_{name}_", dir=keep_dir)
+    # the API server of the native backend (--k8s_backend native), and of the connectivity check
+    api_server = FakeKubernetesApiServer(scenario).start()
+    try:
+        bin_dir = os.path.join(work_dir, "bin")
+        output_dir = os.path.join(work_dir, "output")
+        os.makedirs(bin_dir)
+        os.makedirs(output_dir)
+        scenario_path = os.path.join(work_dir, "scenario.json")
+        with open(scenario_path, "w", encoding='utf-8') as scenario_file:
+            json.dump(scenario, scenario_file)
+        calls_path = os.path.join(work_dir, "calls.jsonl")
+        open(calls_path, "w", encoding='utf-8').close()
+
+        env = dict(os.environ, LOG_COLLECTOR_BENCH_SCENARIO=scenario_path, LOG_COLLECTOR_BENCH_CALLS=calls_path,
+                   LOG_COLLECTOR_BENCH_API_SERVER=api_server.url)
+        namespaces = ",".join(f"ns-{i}" for i in range(scenario["namespaces"]))
+        args = [sys.executable, LOG_COLLECTOR_PATH, "-n", namespaces, "-o", output_dir,
+                "--k8s_cli", create_k8s_cli(bin_dir, scenario)] + scenario["collector_args"] + extra_args
+        exit_code, wall_time, peak_rss = run_collector(args, env, os.path.join(work_dir, "collector.log"))
+
+        with open(calls_path, encoding='utf-8') as calls_file:
+            cli_calls = sum(1 for _ in calls_file)
+        bundles = glob.glob(os.path.join(output_dir, "redis_enterprise_k8s_debug_info_*.tar*"))
+        return {
+            "scenario": name,
+            "exit_code": exit_code,
+            "wall_time": round(wall_time, 3),
+            "cli_calls": cli_calls,
+            "api_requests": len(api_server.requests),
+            "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+            "bundle_mb": round(sum(os.path.getsize(bundle) for bundle in bundles) / (1024 * 1024), 2),
+            "work_dir": work_dir if keep_dir else None,
+        }
+    finally:
+        api_server.stop()
+        if not keep_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def print_results(results):
+    """
+        Print the results as a table
+    """
+    columns = ["scenario", "exit_code", "wall_time", "cli_calls", "api_requests", "peak_rss_mb", "bundle_mb"]
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def main():
+    """
+        Run the selected scenarios
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Redis Enterprise log collector against a simulated "
+                                                 "kubectl/oc.\n\nScenarios: " + ", ".join(SCENARIOS),
+                                     usage="%(prog)s [options] [scenarios ...] [-- collector arguments ...]",
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('scenarios', nargs="*", default=["baseline"],
+                        help="Scenarios to run. Defaults to baseline.")
+    parser.add_argument('--repeat', action="store", type=int, default=1,
+                        help="Number of times to run each scenario. Defaults to 1.")
+    parser.add_argument('--collector_args', action="store", type=str, default="",
+                        help="Additional arguments of the collector, e.g. --collector_args=\"--workers 8\".\n"
+                             "Use the = form, a value starting with - is taken for an option otherwise.\n"
+                             "The arguments following -- are passed to the collector as well, e.g.\n"
+                             "-- --workers 8 --stream_archive")
+    parser.add_argument('--output_json', action="store", type=str,
+                        help="Write the results to a JSON file as well, to compare runs.")
+    parser.add_argument('--keep', action="store", type=str,
+                        help="Keep the bundles, logs and call records of the runs in the given directory.")
+    args = sys.argv[1:]
+    # the collector arguments after --, which argparse would take for options of the harness
+    separator = args.index("--") if "--" in args else len(args)
+    results = parser.parse_args(args[:separator])
+
+    unknown = [name for name in results.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    if results.keep:
+        os.makedirs(results.keep, exist_ok=True)
+
+    extra_args = shlex.split(results.collector_args) + args[separator + 1:]
+    runs = []
+    for name in results.scenarios:
+        for _ in range(results.repeat):
+            runs.append(run_scenario(name, extra_args, results.keep))
+            print(json.dumps(runs[-1]), file=sys.stderr)
+    print_results(runs)
+    if results.output_json:
+        with open(results.output_json, "w", encoding='utf-8') as output_file:
+            json.dump({"collector_args": extra_args, "runs": runs}, output_file, indent=2)
+    sys.exit(1 if any(run["exit_code"] for run in runs) else 0)
+
+
+if __name__ == "__main__":
+    main()
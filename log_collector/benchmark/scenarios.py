@@ -0,0 +1,63 @@
+""" Benchmark scenarios of the log collector.
+Each scenario describes a simulated cluster for fake_k8s_cli.py, overriding
+DEFAULT_SCENARIO, along with the collector arguments to run it with.
+"""
+
+MB = 1024 * 1024
+
+DEFAULT_SCENARIO = {
+    # seconds each k8s CLI invocation takes, on top of the startup time of the fake CLI itself
+    "latency": 0.05,
+    # random extra latency, up to the given seconds
+    "latency_jitter": 0.0,
+    # transfer rate of logs and copies in MB/s, 0 for unlimited
+    "transfer_mb_per_second": 0,
+    # probability of a get/describe/logs/exec/cp invocation to fail with a transient server error
+    "failure_rate": 0.0,
+    "namespaces": 1,
+    "openshift": False,
+    # Redis Enterprise pods, and other pods, per namespace
+    "rs_pods": 3,
+    "other_pods": 0,
+    # restarts of the Redis Enterprise container of each pod, logs of the previous instance exist when above 0
+    "restarts": 0,
+    # objects of each kind per namespace
+    "objects_per_kind": 2,
+    # size of the logs of each container
+    "container_log_bytes": 100 * 1024,
+    # size of the logs in the log directory of each Redis Enterprise pod, and the number of files they span
+    "rs_log_bytes": 10 * MB,
+    "rs_log_files": 20,
+    # time rladmin takes to create the support package, and the size of the package
+    "debug_info_seconds": 1.0,
+    "debug_info_bytes": 5 * MB,
+    # Redis Enterprise pods (the first ones) on which rladmin hangs, and for how long
+    "sick_rs_pods": 0,
+    "sick_pod_seconds": 600,
+    # collector arguments, the namespaces and the k8s CLI are added by the harness
+    "collector_args": ["-m", "restricted"],
+}
+
+SCENARIOS = {
+    "baseline": {},
+    "namespaces_1": {"namespaces": 1},
+    "namespaces_50": {"namespaces": 50, "rs_log_bytes": MB, "debug_info_bytes": MB},
+    "rs_pods_3": {"rs_pods": 3},
+    "rs_pods_30": {"rs_pods": 30},
+    "rs_logs_1gb": {"rs_log_bytes": 1024 * MB // 3, "rs_log_files": 60},
+    "many_objects": {"objects_per_kind": 500},
+    "large_container_logs": {"other_pods": 10, "container_log_bytes": 100 * MB,
+                             "collector_args": ["-m", "restricted", "-a"]},
+    "slow_api": {"latency": 0.3, "latency_jitter": 0.2, "transfer_mb_per_second": 50},
+    "flaky_api": {"failure_rate": 0.2},
+    "sick_rs_pod": {"sick_rs_pods": 1, "sick_pod_seconds": 60,
+                    "collector_args": ["-m", "restricted", "--command_timeouts", "debug_info=30"]},
+    "openshift_all_mode": {"openshift": True, "other_pods": 5, "collector_args": ["-m", "all"]},
+}
+
+
+def get_scenario(name):
+    """
+        Returns a scenario, completed by the defaults
+    """
+    return dict(DEFAULT_SCENARIO, **SCENARIOS[name])
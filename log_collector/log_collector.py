@@ -6,23 +6,46 @@ several API objects and for pods logs unless pass a -n
 parameter will run on current namespace. Run with -h to see options
 """
 import argparse
+import base64
+import cProfile
+import gzip
+import hashlib
+import http.client
+import io
 import json
 import logging
+import math
+import multiprocessing
 import os
+import queue
+import random
 import re
 import shutil
 import signal
+import ssl
 import subprocess
 import sys
 import tarfile
+import tempfile
+import threading
 import time
-from collections import OrderedDict
-from multiprocessing import Process
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote, urlencode, urlsplit
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 RLEC_CONTAINER_NAME = "redis-enterprise-node"
 OPERATOR_LABEL = "app=redis-enterprise"
 MODE_RESTRICTED = "restricted"
 MODE_ALL = "all"
+# The mode of the run, set once it's detected
+MODE = None
 FIRST_VERSION_SUPPORTING_RESTRICTED = "6.2.18-3"
 HELM = "helm"
 
@@ -32,6 +55,29 @@ DEFAULT_KUBECTL_VERSION = "1.22"
 DEFAULT_OC_VERSION = "4.9"
 
 RS_LOG_FOLDER_PATH = "/var/opt/redislabs/log"
+RS_CONFIG_PARENT_PATH = "/opt/redislabs"
+RS_CONFIG_FOLDER_NAME = "config"
+RS_CONFIG_FOLDER_PATH = f"{RS_CONFIG_PARENT_PATH}/{RS_CONFIG_FOLDER_NAME}"
+# How the logs and the config of RS pods are transferred:
+# 'cp' - a kubectl cp of each directory
+# 'stream' - a single compressed tar stream per pod (kubectl exec), extracted as it's received
+# 'stream_store' - a single compressed tar stream per pod, stored as is
+RS_LOGS_TRANSFER_CP = "cp"
+RS_LOGS_TRANSFER_STREAM = "stream"
+RS_LOGS_TRANSFER_STREAM_STORE = "stream_store"
+RS_LOGS_TRANSFER = RS_LOGS_TRANSFER_CP
+# Only collect logs written within the time window (kubectl duration / RFC3339 time)
+LOGS_SINCE = None
+LOGS_SINCE_TIME = None
+DURATION_PATTERN = re.compile(r'^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$')
+# Selection of the RS log files on the pod: globs of the files to include (all when empty) and to exclude,
+# and the maximal size of a file in bytes (unlimited when None). The skipped files are listed in the bundle.
+RS_LOG_INCLUDE = []
+RS_LOG_EXCLUDE = []
+RS_LOG_MAX_FILE_SIZE = None
+RS_LOG_SKIPPED_FILES_NAME = "skipped_rs_log_files.txt"
+SIZE_PATTERN = re.compile(r'^(\d+)([KMG]?)$', re.IGNORECASE)
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
 LOGGER_OUTPUT_FILE = "output.log"
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -39,19 +85,211 @@ LOGGER_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 logging.basicConfig(format=LOGGER_FORMAT)
 VERSION_LOG_COLLECTOR = "8.0.20-23"
 
-TIME_FORMAT = time.strftime("%Y%m%d-%H%M%S")
+TIME_FORMAT = "%Y%m%d-%H%M%S"
 
 KUBCTL_DESCRIBE_RETRIES = 3
 KUBCTL_GET_YAML_RETRIES = 3
 DEBUG_INFO_PACKAGE_RETRIES = 3
+DEBUG_INFO_PACKAGE_DIR = "/tmp"
+# Seconds to wait for the support package from one pod before hedging with a second pod, 0 disables hedging
+HEDGE_DELAY = 0
 COLLECT_RS_POD_LOGS_RETRIES = 10
 HELM_RETRIES = 3
+# Exponential backoff between retries, with full jitter: the n-th retry waits a random time
+# between 0 and min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** n) seconds
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 10
+# Maximal number of retries in the whole run, shared by all the namespaces (a multiprocessing Value in the workers),
+# None for no limit
+RETRY_BUDGET = None
+
+# Timing records of the commands and the collection phases run by the current process
+_TIMINGS = []
+_TIMINGS_LOCK = threading.Lock()
+# The namespace and the phase the current process is collecting, commands are attributed to them
+_CURRENT_PHASE = ("", "")
+# Time (seconds since the epoch) by which the collection should end (--deadline), None for no deadline
+DEADLINE = None
+# Seconds the main process waits for the namespaces after the deadline, before terminating their workers
+DEADLINE_GRACE = 30
+# Under a deadline, the phases of a namespace run in this order. Each phase may use the time left until the deadline,
+# but for the reserves of the phases after it, given as fractions of the time the namespace had when it started.
+# Other phases run last with a reserve of DEADLINE_DEFAULT_PHASE_RESERVE.
+DEADLINE_PHASE_RESERVES = {
+    "k8s_version": 0.01,
+    "resources": 0.1,
+    "resources_list": 0.02,
+    "events": 0.03,
+    "pods_logs": 0.1,
+    "debug_info": 0.15,
+    "rs_pod_logs": 0.15,
+    "descriptions": 0.05,
+    "olm_resources": 0.02,
+    "olm_descriptions": 0.02,
+    "connectivity_check": 0.02,
+    "helm": 0.02,
+}
+DEADLINE_DEFAULT_PHASE_RESERVE = 0.02
+# The deadline of the current phase of the process, and whether a command of the phase was cut short
+# or skipped by the deadline
+_PHASE_DEADLINE = None
+_PHASE_INCOMPLETE = False
+# Whether the completed units of work (phases of a namespace, and the collection from single pods) are recorded
+# in the output directory, under CHECKPOINTS_DIR_NAME/<namespace>.jsonl, and whether they are skipped since
+# the output directory is of an interrupted run being resumed (--resume)
+CHECKPOINTS = False
+CHECKPOINTS_DIR_NAME = ".checkpoints"
+RESUME = False
+# The units of work completed by the resumed run, by namespace
+_COMPLETED_UNITS = {}
+_CHECKPOINTS_LOCK = threading.Lock()
+# The commands of the current phase of the process, and of the unit of work of each thread, which failed on their
+# last attempt. Units of work are only recorded as completed when none did.
+_PHASE_FAILED_COMMANDS = set()
+_UNIT_FAILED_COMMANDS = threading.local()
+# Whether to save a cProfile of each process into the bundle
+PROFILE = False
+PROFILES_DIR = "profiles"
+TRACE_FILE_NAME = "trace.json"
 
 TIMEOUT = 180
+# Interval of checking whether a cancellable command was cancelled
+CANCEL_POLL_INTERVAL = 0.5
+COMMAND_CLASS_DEFAULT = "default"
+COMMAND_CLASS_DEBUG_INFO = "debug_info"
+COMMAND_CLASS_COPY = "copy"
+COMMAND_CLASSES = [COMMAND_CLASS_DEFAULT, COMMAND_CLASS_DEBUG_INFO, COMMAND_CLASS_COPY]
+# Minimal timeouts of command classes which take longer than a regular API request, TIMEOUT is used when longer,
+# and for the rest of the classes
+DEFAULT_COMMAND_TIMEOUTS = {
+    COMMAND_CLASS_DEBUG_INFO: 600,
+    COMMAND_CLASS_COPY: 600,
+}
+# Timeouts of command classes set explicitly (--command_timeouts), overriding TIMEOUT, 0 disables the timeout
+COMMAND_TIMEOUTS = {}
+
+# Maximal number of concurrent k8s CLI invocations per namespace
+PARALLELISM = 4
+# Maximal number of namespaces collected concurrently
+WORKERS = 4
+# Start method of the worker processes while threads run in the main process. These don't fork the main process,
+# but start from a fresh interpreter (through a fork server process, where available)
+THREADS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+ISTIO_NAMESPACE = "istio-system"
+ISTIO_API_RESOURCES = ["Pod", "Service", "ConfigMap", "Deployment", "ReplicaSet"]
+# Fetch several resource kinds with a single k8s CLI invocation
+BATCH_GET = False
 
 KUBECTL_K8S_CLI = "kubectl"
 OC_K8S_CLI = "oc"
 
+K8S_BACKEND_CLI = "cli"
+K8S_BACKEND_NATIVE = "native"
+# The backend used for get/list/logs operations. exec, cp and describe always use the k8s CLI.
+K8S_BACKEND = K8S_BACKEND_CLI
+K8S_API_RETRYABLE_STATUSES = [429, 500, 502, 503, 504]
+# Size of the chunks in which large outputs (e.g. container logs) are streamed to their files
+OUTPUT_CHUNK_SIZE = 1024 * 1024
+K8S_API_CONNECTION_POOL_SIZE = 8
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_PARALLEL_GZIP = "pgzip"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION = COMPRESSION_GZIP
+# None stands for the default level of the compression codec
+COMPRESSION_LEVEL = None
+DEFAULT_COMPRESSION_LEVELS = {
+    COMPRESSION_GZIP: 9,
+    COMPRESSION_PARALLEL_GZIP: 9,
+    COMPRESSION_ZSTD: 3,
+}
+MAX_COMPRESSION_LEVELS = {
+    COMPRESSION_GZIP: 9,
+    COMPRESSION_PARALLEL_GZIP: 9,
+    COMPRESSION_ZSTD: 22,
+}
+ARCHIVE_EXTENSIONS = {
+    COMPRESSION_GZIP: ".tar.gz",
+    COMPRESSION_PARALLEL_GZIP: ".tar.gz",
+    COMPRESSION_ZSTD: ".tar.zst",
+}
+PARALLEL_GZIP_CHUNK_SIZE = 4 * 1024 * 1024
+# Files up to this size are hashed when archived, and copies of an archived file are stored as hard links to it
+ARCHIVE_DEDUP_MAX_FILE_SIZE = 16 * 1024 * 1024
+
+# Priorities of the files of the bundle when its size is limited (--max_bundle_size), lower is archived first:
+# operator logs, resources (including the REC/REDB custom resources) and the support package,
+# then the logs of unhealthy pods (restarted or not running) and the flight recorder data,
+# then descriptions and the rest, and the logs of healthy pods last
+BUNDLE_PRIORITY_ESSENTIAL = 0
+BUNDLE_PRIORITY_UNHEALTHY_LOGS = 1
+BUNDLE_PRIORITY_DESCRIPTIONS = 2
+BUNDLE_PRIORITY_HEALTHY_LOGS = 3
+OPERATOR_POD_NAME_PREFIX = "redis-enterprise-operator"
+HEALTHY_POD_PHASES = ["Running", "Succeeded"]
+# Part of the size limit kept for the collection report, which is archived last, and the buffers of the compressed
+# stream. The report leaves out the timings of the commands, then of the phases, when it doesn't fit in it.
+BUNDLE_SIZE_RESERVE = 1024 * 1024
+# Files which can't be truncated, the rest are truncated to their tail when they don't fit
+UNTRUNCATABLE_FILE_EXTENSIONS = (".gz", ".tgz", ".zip", ".zst", ".bz2", ".xz", ".tar", ".yaml", ".json", ".jsonl",
+                                 ".prof")
+# Files which would be truncated to less than this size are skipped
+MIN_TRUNCATED_FILE_SIZE = 64 * 1024
+# The compressed stream is flushed to measure the size of the bundle at most once per this many bytes given to the
+# archive, since every flush costs compression. The size of the bytes given since is estimated in between.
+BUNDLE_SIZE_MEASURE_INTERVAL = 4 * 1024 * 1024
+# Compressed files are assumed not to shrink in the archive
+COMPRESSED_FILE_EXTENSIONS = (".gz", ".tgz", ".zip", ".zst", ".bz2", ".xz")
+
+# When the archive is streamed, collected output is handed over this queue instead of written to the output directory
+ARCHIVE_QUEUE = None
+# The output directory, and its name within the archive
+ARCHIVE_OUTPUT_DIR = ""
+ARCHIVE_OUTPUT_DIR_NAME = ""
+
+# The resources served by the cluster, discovered once per run. None if discovery failed.
+SERVED_API_RESOURCES = None
+
+# Flight recorder (--watch): the events and the Redis Enterprise custom resources of the namespaces are watched,
+# and the logs of the operator and the RS pods are followed, into a size-bounded ring buffer on disk.
+# The buffer is added to the bundles collected on SIGUSR1 and on exit.
+WATCH_DIR_NAME = "flight_recorder"
+WATCH_BUFFER_DIR_NAME = ".flight_recorder_buffer"
+WATCH_BUFFER_SIZE = "256M"
+# The buffer is written in segment files, once it's full the oldest segment is deleted
+WATCH_BUFFER_SEGMENTS = 16
+WATCH_RESOURCES = ["RedisEnterpriseCluster", "RedisEnterpriseDatabase"]
+WATCH_POD_SELECTORS = ["app=redis-enterprise", "name=redis-enterprise-operator"]
+# Seconds between listings of the pods to follow, and before restarting a watch that ended
+WATCH_POD_REFRESH_INTERVAL = 30
+WATCH_RESTART_DELAY = 5
+# Lines of the existing logs of a container included when starting to follow it
+WATCH_LOG_TAIL_LINES = 100
+
+# Cluster-scoped resources, the k8s version and the connectivity checks are collected once per run into this directory
+# (prefixed with '_' if a collected namespace has the same name)
+CLUSTER_DIR_NAME = "cluster"
+# The cluster-scoped resources of the collected lists, used when the API resources discovery failed
+CLUSTER_SCOPED_API_RESOURCES = [
+    "ClusterRole",
+    "ClusterRoleBinding",
+    "PersistentVolume",
+    "CustomResourceDefinition",
+    "ValidatingWebhookConfiguration",
+    "Namespace",
+    "Node",
+    "CertificateSigningRequest",
+    "StorageClass",
+    "VolumeAttachment",
+]
+
+MANIFEST_FILE_NAME = "manifest.json"
+# An index of the collected objects in each namespace, a JSON record per line with the file and offset of each object
+INDEX_FILE_NAME = "index.jsonl"
+# The manifests of the bundle given with --since_bundle, by namespace,
+# along with the index records of the objects of each namespace by uid (under "index")
+PREVIOUS_MANIFESTS = {}
+
 OPERATOR_CUSTOM_RESOURCE_DEFINITION_NAMES = [
     "redisenterpriseclusters.app.redislabs.com",
     "redisenterprisedatabases.app.redislabs.com",
@@ -140,6 +378,23 @@ SHA_DIGESTS_BEFORE_RESTRICTED_MODE_SUPPORT = [
 
 MISSING_RESOURCE = "no resources found in"
 UNRECOGNIZED_RESOURCE = "error: the server doesn't have a resource type"
+UNRECOGNIZED_RESOURCE_PATTERN = re.compile(r'the server doesn\'t have a resource type "([^"]+)"')
+# Definitive answers of the k8s CLI, which retrying won't change
+NON_RETRYABLE_OUTPUTS = [MISSING_RESOURCE, UNRECOGNIZED_RESOURCE, "(notfound)", "(forbidden)"]
+# The size of the end of an output file which is searched for the non retryable outputs, when its command failed
+NON_RETRYABLE_OUTPUT_TAIL_SIZE = 4096
+YAML_LIST_HEADER = "apiVersion: v1\nitems:\n"
+YAML_LIST_FOOTER = "kind: List\nmetadata:\n  resourceVersion: \"\"\n"
+YAML_ITEM_KIND_PATTERN = re.compile(r'^(?:- |  )kind: (\S+)$', re.MULTILINE)
+YAML_RESTART_COUNT_PATTERN = re.compile(r'^ +restartCount: (\d+)$', re.MULTILINE)
+YAML_PLAIN_SCALAR_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_./-]*$')
+YAML_RESERVED_WORDS = ["y", "n", "yes", "no", "on", "off", "true", "false", "null"]
+# Resources which are fetched by name or under a different name, and hence can't be batched
+UNBATCHABLE_RESOURCES = [
+    "Namespace",
+    "CustomResourceDefinition",
+    "gateways.networking.istio.io",
+]
 OLM_LABEL = "operators.coreos.com/redis-enterprise-operator-cert.%s"
 
 
@@ -199,45 +454,490 @@ def collect_k8s_version_info(ns_output_dir, k8s_cli):
     collect_helper(ns_output_dir, cmd, "Version.yaml", "Version")
 
 
-def collect_from_ns(namespace, output_dir, api_resources, logs_from_all_pods=False, k8s_cli_input="",
-                    mode=MODE_RESTRICTED, skip_support_package=False, collect_empty_files=False, helm_release_name=""):
+def collect_from_ns(namespace, context):
     "Collect the context of a specific namespace. Typically runs in parallel processes."
-    set_file_logger(output_dir)
-    k8s_cli = detect_k8s_cli(k8s_cli_input)
-    k8s_cli_version = detect_k8s_cli_version(k8s_cli)
+    k8s_cli = context.k8s_cli
+    k8s_cli_version = context.k8s_cli_version
+    mode = context.mode
     logger.info("Started collecting from namespace '%s'", namespace)
-    ns_output_dir = os.path.join(output_dir, namespace)
+    ns_output_dir = os.path.join(context.output_dir, namespace)
     make_dir(ns_output_dir)
 
     selector = ""
     if mode == MODE_RESTRICTED:
         selector = selector_flag(OPERATOR_LABEL)
-    collect_k8s_version_info(ns_output_dir, k8s_cli)
-    collect_connectivity_check(namespace, ns_output_dir, k8s_cli)
-    get_redis_enterprise_debug_info(namespace, ns_output_dir, k8s_cli, mode, skip_support_package, k8s_cli_version)
-    collect_pod_rs_logs(namespace, ns_output_dir, k8s_cli, mode, k8s_cli_version)
-    collect_resources_list(namespace, ns_output_dir, k8s_cli, mode)
-    collect_events(namespace, ns_output_dir, k8s_cli, mode)
-    collect_api_resources(namespace, ns_output_dir, k8s_cli, api_resources, selector, collect_empty_files)
-    collect_olm_auto_generated_resources(namespace, ns_output_dir, k8s_cli)
-    collect_api_resources_description(namespace, ns_output_dir, k8s_cli, api_resources, selector, collect_empty_files)
-    collect_olm_auto_generated_resources_description(namespace, ns_output_dir, k8s_cli)
-    collect_pods_logs(namespace, ns_output_dir, k8s_cli, logs_from_all_pods)
-    collect_helm_output(namespace, ns_output_dir, helm_release_name)
+    run_phases(namespace, [
+        ("debug_info", lambda: get_redis_enterprise_debug_info(namespace, ns_output_dir, k8s_cli, mode,
+                                                               context.skip_support_package, k8s_cli_version)),
+        ("rs_pod_logs", lambda: collect_pod_rs_logs(namespace, ns_output_dir, k8s_cli, mode, k8s_cli_version)),
+        ("resources_list", lambda: collect_resources_list(namespace, ns_output_dir, k8s_cli, mode)),
+        ("events", lambda: collect_events(namespace, ns_output_dir, k8s_cli, mode)),
+        ("resources", lambda: collect_api_resources(namespace, ns_output_dir, k8s_cli, context.api_resources,
+                                                    selector, context.collect_empty_files)),
+        ("olm_resources", lambda: collect_olm_auto_generated_resources(namespace, ns_output_dir, k8s_cli)),
+        ("descriptions", lambda: collect_api_resources_description(namespace, ns_output_dir, k8s_cli,
+                                                                   context.api_resources, selector,
+                                                                   context.collect_empty_files)),
+        ("olm_descriptions", lambda: collect_olm_auto_generated_resources_description(namespace, ns_output_dir,
+                                                                                      k8s_cli)),
+        ("pods_logs", lambda: collect_pods_logs(namespace, ns_output_dir, k8s_cli, context.logs_from_all_pods)),
+        ("helm", lambda: collect_helm_output(namespace, ns_output_dir, context.helm_release_name)),
+    ])
+
+
+def collect_cluster_scoped(cluster_dir_name, context, api_resources):
+    """
+    Collect the cluster-scoped resources, the k8s version and the connectivity checks, once per run
+    """
+    k8s_cli = context.k8s_cli
+    logger.info("Started collecting cluster-scoped resources into '%s'", cluster_dir_name)
+    cluster_output_dir = os.path.join(context.output_dir, cluster_dir_name)
+    make_dir(cluster_output_dir)
+
+    selector = ""
+    if context.mode == MODE_RESTRICTED:
+        selector = selector_flag(OPERATOR_LABEL)
+    run_phases(cluster_dir_name, [
+        ("k8s_version", lambda: collect_k8s_version_info(cluster_output_dir, k8s_cli)),
+        ("connectivity_check", lambda: collect_connectivity_check(cluster_dir_name, cluster_output_dir, k8s_cli)),
+        ("resources", lambda: collect_api_resources(cluster_dir_name, cluster_output_dir, k8s_cli, api_resources,
+                                                    selector, context.collect_empty_files)),
+        ("descriptions", lambda: collect_api_resources_description(cluster_dir_name, cluster_output_dir, k8s_cli,
+                                                                   api_resources, selector,
+                                                                   context.collect_empty_files)),
+    ])
 
 
-# pylint: disable=R0913
-def collect_resources(namespace, output_dir, api_resources, k8s_cli_input="", selector=""):
+def collect_resources(namespace, context, api_resources, selector=""):
     """
     Collect specific resources from specific namespace. Not meant to be used to collect RS pod logs.
     """
-    set_file_logger(output_dir)
-    k8s_cli = detect_k8s_cli(k8s_cli_input)
-    ns_output_dir = os.path.join(output_dir, namespace)
+    k8s_cli = context.k8s_cli
+    ns_output_dir = os.path.join(context.output_dir, namespace)
     make_dir(ns_output_dir)
-    collect_api_resources(namespace, ns_output_dir, k8s_cli, api_resources, selector)
-    collect_api_resources_description(namespace, ns_output_dir, k8s_cli, api_resources, selector)
-    collect_pods_logs(namespace, ns_output_dir, k8s_cli, logs_from_all_pods=True)
+    run_phases(namespace, [
+        ("resources", lambda: collect_api_resources(namespace, ns_output_dir, k8s_cli, api_resources, selector)),
+        ("descriptions", lambda: collect_api_resources_description(namespace, ns_output_dir, k8s_cli,
+                                                                   api_resources, selector)),
+        ("pods_logs", lambda: collect_pods_logs(namespace, ns_output_dir, k8s_cli, logs_from_all_pods=True)),
+    ])
+
+
+def run_phases(namespace, phases):
+    """
+        Run the collection phases of a namespace one after the other, timing each of them.
+        Phases completed by a resumed run are skipped, and phases completed without failed commands are checkpointed.
+        Under a deadline, the phases run by priority, and the commands of each phase are limited to the time left
+        but for the reserves of the phases after it. Phases left once the deadline passed are skipped, and recorded
+        as incomplete.
+    """
+    # pylint: disable=global-statement
+    global _PHASE_DEADLINE
+    completed_phases = [phase for phase, _ in phases if is_unit_completed(namespace, phase)]
+    if completed_phases:
+        logger.info("Namespace '%s': Skipping phases completed by the resumed run: %s", namespace,
+                    ", ".join(completed_phases))
+        for name in completed_phases:
+            record_timing({"type": "phase", "namespace": namespace, "phase": name, "start": time.time(),
+                           "duration": 0, "resumed": True})
+        phases = [entry for entry in phases if entry[0] not in completed_phases]
+    if DEADLINE is not None:
+        order = list(DEADLINE_PHASE_RESERVES)
+        phases = sorted(phases, key=lambda entry: order.index(entry[0]) if entry[0] in order else len(order))
+        budget = DEADLINE - time.time()
+    for index, (phase, collect) in enumerate(phases):
+        if DEADLINE is not None:
+            if time.time() >= DEADLINE:
+                skipped_phases = [name for name, _ in phases[index:]]
+                logger.warning("Namespace '%s': The deadline passed, skipping phases: %s", namespace,
+                               ", ".join(skipped_phases))
+                for name in skipped_phases:
+                    record_timing({"type": "phase", "namespace": namespace, "phase": name, "start": time.time(),
+                                   "duration": 0, "incomplete": True})
+                return
+            reserve = sum(DEADLINE_PHASE_RESERVES.get(name, DEADLINE_DEFAULT_PHASE_RESERVE)
+                          for name, _ in phases[index + 1:])
+            _PHASE_DEADLINE = max(time.time(), DEADLINE - budget * reserve)
+        try:
+            with timed_phase(namespace, phase):
+                collect()
+                if not _PHASE_INCOMPLETE and not _PHASE_FAILED_COMMANDS:
+                    save_checkpoint(namespace, phase)
+        finally:
+            _PHASE_DEADLINE = None
+
+
+@contextmanager
+def timed_phase(namespace, phase):
+    """
+        Record the wall time of a collection phase.
+        The commands run during the phase, by any thread of the process, are attributed to it.
+    """
+    # pylint: disable=global-statement
+    global _CURRENT_PHASE, _PHASE_INCOMPLETE, _PHASE_FAILED_COMMANDS
+    previous_phase = _CURRENT_PHASE
+    previous_incomplete = _PHASE_INCOMPLETE
+    previous_failed_commands = _PHASE_FAILED_COMMANDS
+    _CURRENT_PHASE = (namespace, phase)
+    _PHASE_INCOMPLETE = False
+    _PHASE_FAILED_COMMANDS = set()
+    start = time.time()
+    try:
+        yield
+    finally:
+        record = {"type": "phase", "namespace": namespace, "phase": phase, "start": start,
+                  "duration": time.time() - start}
+        if _PHASE_INCOMPLETE:
+            record["incomplete"] = True
+        _CURRENT_PHASE = previous_phase
+        _PHASE_INCOMPLETE = previous_incomplete
+        _PHASE_FAILED_COMMANDS = previous_failed_commands
+        record_timing(record)
+
+
+def get_current_deadline():
+    """
+        Returns the time by which the commands of the current phase should end, None if there is no deadline
+    """
+    deadlines = [deadline for deadline in (DEADLINE, _PHASE_DEADLINE) if deadline is not None]
+    return min(deadlines) if deadlines else None
+
+
+def is_past_deadline():
+    """
+        Check whether the deadline of the current phase passed
+    """
+    deadline = get_current_deadline()
+    return deadline is not None and time.time() >= deadline
+
+
+def skip_command_after_deadline(cmd):
+    """
+        Check whether the deadline of the current phase passed, in which case the command is skipped,
+        and the phase is recorded as incomplete
+    """
+    # pylint: disable=global-statement
+    global _PHASE_INCOMPLETE
+    if not is_past_deadline():
+        return False
+    logger.warning("cmd: %s skipped, the deadline passed", cmd)
+    _PHASE_INCOMPLETE = True
+    record_command_result(cmd, -9)
+    return True
+
+
+def record_command_timing(cmd, start, exit_code, output_bytes, attempt, definitive=False):
+    """
+        Record the wall time, exit code, output size and attempt number of a command or an API request.
+        definitive tells that a failure is a definitive answer (e.g. a missing resource), which completes the command.
+    """
+    # pylint: disable=global-statement
+    global _PHASE_INCOMPLETE
+    if exit_code == -9 and is_past_deadline():
+        # the command timed out at the deadline
+        _PHASE_INCOMPLETE = True
+    record_command_result(cmd, exit_code, definitive)
+    namespace, phase = _CURRENT_PHASE
+    record_timing({"type": "command", "cmd": cmd, "namespace": namespace, "phase": phase, "start": start,
+                   "duration": time.time() - start, "exit_code": exit_code, "bytes": output_bytes,
+                   "attempt": attempt})
+
+
+def record_command_result(cmd, exit_code, definitive=False):
+    """
+        Track the commands of the current phase and of the unit of work of the current thread which failed on their
+        last attempt. Cancelled commands (the attempts which lost a hedge) are ignored, and definitive failures
+        (which won't change when retrying, such as a missing resource) count as completed.
+    """
+    if exit_code == -15:
+        return
+    for failed_commands in (_PHASE_FAILED_COMMANDS, getattr(_UNIT_FAILED_COMMANDS, "commands", None)):
+        if failed_commands is None:
+            continue
+        if exit_code and not definitive:
+            failed_commands.add(cmd)
+        else:
+            failed_commands.discard(cmd)
+
+
+def resolve_failed_commands():
+    """
+        Forget the failed commands of the current phase and unit of work, once their purpose was fulfilled otherwise,
+        e.g. when the support package was created on another pod
+    """
+    _PHASE_FAILED_COMMANDS.clear()
+    if getattr(_UNIT_FAILED_COMMANDS, "commands", None) is not None:
+        _UNIT_FAILED_COMMANDS.commands.clear()
+
+
+def run_unit(namespace, unit, collect):
+    """
+        Run a unit of work of the current phase, such as the collection from a single pod, in the current thread.
+        The unit is skipped when it was completed by the resumed run, and is checkpointed when none of its commands
+        failed.
+    """
+    phase = _CURRENT_PHASE[1]
+    if is_unit_completed(namespace, phase, unit):
+        logger.info("Namespace '%s': Skipping %s of %s, completed by the resumed run", namespace, phase, unit)
+        return
+    previous_failed_commands = getattr(_UNIT_FAILED_COMMANDS, "commands", None)
+    _UNIT_FAILED_COMMANDS.commands = set()
+    try:
+        collect()
+        if not _UNIT_FAILED_COMMANDS.commands:
+            save_checkpoint(namespace, phase, unit)
+    finally:
+        _UNIT_FAILED_COMMANDS.commands = previous_failed_commands
+
+
+def get_checkpoints_path(namespace):
+    """
+        Returns the path of the checkpoints file of a namespace
+    """
+    return os.path.join(ARCHIVE_OUTPUT_DIR, CHECKPOINTS_DIR_NAME, f"{namespace}.jsonl")
+
+
+def save_checkpoint(namespace, phase, unit=None):
+    """
+        Record a completed unit of work of a namespace, a whole phase when no unit is given
+    """
+    if not CHECKPOINTS:
+        return
+    path = get_checkpoints_path(namespace)
+    line = json.dumps({"phase": phase, "unit": unit, "time": time.time()})
+    with _CHECKPOINTS_LOCK:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding='utf-8') as checkpoints_file:
+            checkpoints_file.write(f"{line}\n")
+
+
+def is_unit_completed(namespace, phase, unit=None):
+    """
+        Check whether a unit of work of a namespace was completed by the resumed run
+    """
+    if not RESUME:
+        return False
+    with _CHECKPOINTS_LOCK:
+        if namespace not in _COMPLETED_UNITS:
+            _COMPLETED_UNITS[namespace] = load_checkpoints(get_checkpoints_path(namespace))
+    return (phase, unit) in _COMPLETED_UNITS[namespace]
+
+
+def load_checkpoints(path):
+    """
+        Returns the completed units of work recorded in a checkpoints file, as (phase, unit) tuples.
+        A line cut short by the interruption is ignored.
+    """
+    completed_units = set()
+    if not os.path.exists(path):
+        return completed_units
+    with open(path, encoding='utf-8') as checkpoints_file:
+        for line in checkpoints_file:
+            checkpoint = try_load_json(line)
+            if isinstance(checkpoint, dict):
+                completed_units.add((checkpoint.get("phase"), checkpoint.get("unit")))
+    return completed_units
+
+
+def record_timing(record):
+    """
+        Add a timing record of the current process
+    """
+    record["pid"] = os.getpid()
+    record["tid"] = threading.get_ident()
+    with _TIMINGS_LOCK:
+        _TIMINGS.append(record)
+
+
+def pop_timings():
+    """
+        Returns the timing records of the current process, and clears them
+    """
+    with _TIMINGS_LOCK:
+        timings = list(_TIMINGS)
+        _TIMINGS.clear()
+    return timings
+
+
+def start_profiler():
+    """
+        Returns a started profiler when profiling is enabled, None otherwise
+    """
+    if not PROFILE:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def save_profile(profiler, name):
+    """
+        Stop a profiler, and save its stats into the profiles directory of the output directory.
+        Returns the path of the saved profile.
+    """
+    profiler.disable()
+    profiles_dir = os.path.join(ARCHIVE_OUTPUT_DIR, PROFILES_DIR)
+    os.makedirs(profiles_dir, exist_ok=True)
+    path = os.path.join(profiles_dir, f"{name}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+class CollectionContext:
+    """
+        The settings of a collection run. Detection of the k8s CLI, its version, the mode, helm and
+        the served API resources is done once in the main process, and the context is shared with all the workers.
+    """
+
+    # pylint: disable=too-many-instance-attributes, too-few-public-methods
+    def __init__(self, results, output_dir, output_dir_name, k8s_cli, k8s_cli_version):
+        self.output_dir = output_dir
+        self.output_dir_name = output_dir_name
+        self.k8s_cli = k8s_cli
+        self.k8s_cli_version = k8s_cli_version
+        self.mode = results.mode
+        self.helm_release_name = results.helm_release_name
+        self.api_resources = []
+        self.cluster_api_resources = []
+        self.logs_from_all_pods = results.logs_from_all_pods
+        self.skip_support_package = results.skip_support_package
+        self.collect_empty_files = results.collect_empty_files
+        self.timeout = results.timeout
+        self.command_timeouts = results.command_timeouts or {}
+        self.parallelism = results.parallelism
+        self.batch_get = results.batch_get
+        self.k8s_backend = results.k8s_backend
+        self.compression = results.compression
+        self.compression_level = results.compression_level
+        self.logs_since = results.since
+        self.logs_since_time = results.since_time
+        self.archive_queue = None
+        self.previous_manifests = {}
+        self.served_api_resources = None
+        # forking while the flight recorder or the streaming archive threads run could copy a lock they hold
+        # into the workers, where it would never be released
+        self.start_method = THREADS_START_METHOD if results.watch or results.stream_archive else None
+        self.retry_budget = multiprocessing.get_context(self.start_method).Value("i", results.retry_budget) \
+            if results.retry_budget is not None else None
+        self.profile = results.profile
+        self.hedge_delay = results.hedge_delay
+        self.rs_logs_transfer = results.rs_logs_transfer
+        self.rs_log_include = results.rs_log_include or []
+        self.rs_log_exclude = results.rs_log_exclude or []
+        self.rs_log_max_file_size = results.rs_log_max_file_size
+        self.deadline = None
+        self.checkpoints = not results.stream_archive
+        self.resume = bool(results.resume)
+
+    def apply(self):
+        """
+            Apply the settings to the module level settings of the current process
+        """
+        # pylint: disable=global-statement, invalid-name
+        global TIMEOUT, COMMAND_TIMEOUTS, PARALLELISM, BATCH_GET, K8S_BACKEND, COMPRESSION, COMPRESSION_LEVEL, \
+            LOGS_SINCE, LOGS_SINCE_TIME, ARCHIVE_QUEUE, ARCHIVE_OUTPUT_DIR, ARCHIVE_OUTPUT_DIR_NAME, \
+            PREVIOUS_MANIFESTS, SERVED_API_RESOURCES, RETRY_BUDGET, PROFILE, HEDGE_DELAY, RS_LOGS_TRANSFER, \
+            RS_LOG_INCLUDE, RS_LOG_EXCLUDE, RS_LOG_MAX_FILE_SIZE, DEADLINE, CHECKPOINTS, RESUME, MODE
+        TIMEOUT = self.timeout
+        COMMAND_TIMEOUTS = self.command_timeouts
+        PARALLELISM = self.parallelism
+        BATCH_GET = self.batch_get
+        K8S_BACKEND = self.k8s_backend
+        COMPRESSION = self.compression
+        COMPRESSION_LEVEL = self.compression_level
+        LOGS_SINCE = self.logs_since
+        LOGS_SINCE_TIME = self.logs_since_time
+        ARCHIVE_QUEUE = self.archive_queue
+        ARCHIVE_OUTPUT_DIR = self.output_dir
+        ARCHIVE_OUTPUT_DIR_NAME = self.output_dir_name
+        PREVIOUS_MANIFESTS = self.previous_manifests
+        SERVED_API_RESOURCES = self.served_api_resources
+        RETRY_BUDGET = self.retry_budget
+        PROFILE = self.profile
+        HEDGE_DELAY = self.hedge_delay
+        RS_LOGS_TRANSFER = self.rs_logs_transfer
+        RS_LOG_INCLUDE = self.rs_log_include
+        RS_LOG_EXCLUDE = self.rs_log_exclude
+        RS_LOG_MAX_FILE_SIZE = self.rs_log_max_file_size
+        DEADLINE = self.deadline
+        CHECKPOINTS = self.checkpoints
+        RESUME = self.resume
+        MODE = self.mode
+
+
+# The context of the current worker process. The context is handed to the workers once, when they start,
+# since it can't be pickled along with each task (it may hold the streaming archive queue)
+_WORKER_CONTEXT = None
+
+
+def init_collection_worker(context):
+    """
+        Initialize a worker process of the collection pool
+    """
+    # pylint: disable=global-statement
+    global _WORKER_CONTEXT
+    _WORKER_CONTEXT = context
+    # the flight recorder handles these signals in the main process, the workers are terminated by them
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    context.apply()
+    set_file_logger(context.output_dir)
+
+
+def run_collection_task(func, namespace, *args):
+    """
+        Run a collection function in a worker process, with the context of the worker.
+        Returns the timing records of the task.
+    """
+    pop_timings()
+    profiler = start_profiler()
+    try:
+        func(namespace, _WORKER_CONTEXT, *args)
+    # pylint: disable=W0703
+    except Exception:
+        logger.exception("Namespace '%s': Collection failed", namespace)
+    finally:
+        clear_pods_snapshots()
+        if profiler:
+            move_to_archive(save_profile(profiler, namespace))
+    return pop_timings()
+
+
+def run_collection_tasks(context, namespaces, collect_istio, workers, start_method=None):
+    """
+        Run the collection of each namespace on a bounded pool of worker processes,
+        started with the given start method (the default one of the platform when None).
+        Returns the timing records of all the tasks.
+    """
+    cluster_dir_name = CLUSTER_DIR_NAME if CLUSTER_DIR_NAME not in namespaces else f"_{CLUSTER_DIR_NAME}"
+    tasks = [(collect_cluster_scoped, cluster_dir_name, context.cluster_api_resources)]
+    tasks += [(collect_from_ns, namespace) for namespace in namespaces]
+    if collect_istio:
+        tasks.append((collect_resources, ISTIO_NAMESPACE, ISTIO_API_RESOURCES))
+
+    with multiprocessing.get_context(start_method).Pool(processes=min(workers, len(tasks)),
+                                                        initializer=init_collection_worker,
+                                                        initargs=(context,)) as pool:
+        async_results = [(task[1], pool.apply_async(run_collection_task, task)) for task in tasks]
+        pool.close()
+        timings = []
+        terminate = False
+        for namespace, async_result in async_results:
+            try:
+                timeout = None if DEADLINE is None else max(0, DEADLINE + DEADLINE_GRACE - time.time())
+                timings.extend(async_result.get(timeout))
+            except multiprocessing.TimeoutError:
+                logger.warning("Namespace '%s': Collection didn't end by the deadline, terminating it", namespace)
+                record_timing({"type": "phase", "namespace": namespace, "phase": "terminated", "start": time.time(),
+                               "duration": 0, "incomplete": True})
+                terminate = True
+            # pylint: disable=W0703
+            except Exception:
+                logger.exception("Namespace '%s': Collection failed", namespace)
+        if terminate:
+            pool.terminate()
+        pool.join()
+    return timings
 
 
 def collect_helm_output(namespace, output_dir, helm_release_name):
@@ -274,6 +974,9 @@ def write_output_to_file(output_dir, file_name, output):
         return
 
     output_path = os.path.join(output_dir, file_name)
+    if ARCHIVE_QUEUE is not None:
+        ARCHIVE_QUEUE.put((get_archive_name(output_path), None, output.encode('UTF-8')))
+        return
     try:
         with open(output_path, "w+", encoding='UTF-8') as file_handle:
             file_handle.write(output)
@@ -282,6 +985,29 @@ def write_output_to_file(output_dir, file_name, output):
         logger.warning("Failed writing output to path %s. Exception: %s", output_path, str(e))
 
 
+def get_archive_name(path):
+    """
+    Returns the name of a path of the output directory within the archive
+    """
+    return os.path.join(ARCHIVE_OUTPUT_DIR_NAME, os.path.relpath(path, ARCHIVE_OUTPUT_DIR))
+
+
+def move_to_archive(path):
+    """
+    When the archive is streamed, hand the files under the given path over to the archive.
+    The files are deleted once they are archived.
+    """
+    if ARCHIVE_QUEUE is None or not os.path.exists(path):
+        return
+    if os.path.isfile(path):
+        ARCHIVE_QUEUE.put((get_archive_name(path), path, None))
+        return
+    for root, _, files in os.walk(path):
+        for file_name in sorted(files):
+            file_path = os.path.join(root, file_name)
+            ARCHIVE_QUEUE.put((get_archive_name(file_path), file_path, None))
+
+
 def get_helm_output(namespace, cmd, helm_output_dir, file_name):
     """
     Get output related to helm by the release name given.
@@ -404,6 +1130,19 @@ def detect_helm(k8s_cli, namespaces):
     return ""
 
 
+def validate_compression(compression, level):
+    """
+       verify the selected compression codec is available, and the level is in its range
+    """
+    if compression == COMPRESSION_ZSTD and zstandard is None:
+        logger.error("zstd compression requires the 'zstandard' python package - "
+                     "please install it (pip install zstandard) or choose another compression")
+        sys.exit(1)
+    if level is not None and level > MAX_COMPRESSION_LEVELS[compression]:
+        raise ValueError(f"compression level of {compression} must be between 1 and "
+                         f"{MAX_COMPRESSION_LEVELS[compression]}")
+
+
 def validate_mode(mode, operator_tag, is_sha_digest):
     """
        for old versions there is no way to use restricted because resources are missing labels
@@ -479,6 +1218,17 @@ def compare_versions(current_version, supported_version):
         return False
 
 
+def detect_mode(mode, k8s_cli, namespaces):
+    """
+        Returns the given mode once validated against the operator version, or the default mode of the operator
+    """
+    operator_tag, is_sha_digest = parse_operator_deployment(k8s_cli, namespaces)
+    if mode:
+        validate_mode(mode, operator_tag, is_sha_digest)
+        return mode
+    return determine_default_mode(operator_tag, is_sha_digest)
+
+
 def determine_default_mode(operator_tag, is_sha_digest):
     """
     determine the default mode based on the version/sha digest
@@ -490,11 +1240,16 @@ def determine_default_mode(operator_tag, is_sha_digest):
     return MODE_ALL
 
 
-def run(results):
+def create_output_dir(results):
     """
-        Collect logs
+        Create the output directory of the collection, or reuse the directory of the resumed one.
+        Returns the path of the directory and its name, which is the name of the bundle as well.
     """
-    output_file_name = f"redis_enterprise_k8s_debug_info_{TIME_FORMAT}"
+    if results.resume:
+        output_dir = os.path.abspath(results.resume)
+        return output_dir, os.path.basename(output_dir)
+
+    output_file_name = f"redis_enterprise_k8s_debug_info_{time.strftime(TIME_FORMAT)}"
     output_dir = results.output_dir
     if not output_dir:
         output_dir = os.getcwd()
@@ -503,77 +1258,534 @@ def run(results):
 
     with open(os.path.join(output_dir, LOGGER_OUTPUT_FILE), "x", encoding='utf-8'):
         logger.info("Created %s file in %s", LOGGER_OUTPUT_FILE, output_dir)
+    return output_dir, output_file_name
 
-    set_file_logger(output_dir)
-    logger.info("Started Redis Enterprise k8s log collector")
-    start_time = time.time()
-    k8s_cli = detect_k8s_cli(results.k8s_cli)
 
-    namespaces = _get_namespaces_to_run_on(results.namespace, k8s_cli)
+def setup_collection(results, output_dir, output_file_name, start_time):
+    """
+        Detect the k8s CLI, the namespaces, the mode, helm and the served API resources, and apply them.
+        Returns the context of the collection and the namespaces to collect from.
+    """
+    with timed_phase("", "k8s_cli_detection"):
+        k8s_cli = detect_k8s_cli(results.k8s_cli)
+        k8s_cli_version = detect_k8s_cli_version(k8s_cli)
 
-    # pylint: disable=global-statement, invalid-name
-    global TIMEOUT
-    # pylint: disable=locally-disabled, invalid-name
-    TIMEOUT = results.timeout
+        namespaces = _get_namespaces_to_run_on(results.namespace, k8s_cli)
 
-    mode = results.mode
-    operator_tag, is_sha_digest = parse_operator_deployment(k8s_cli, namespaces)
-    if mode:
-        validate_mode(mode, operator_tag, is_sha_digest)
-    else:
-        mode = determine_default_mode(operator_tag, is_sha_digest)
+    context = CollectionContext(results, output_dir, output_file_name, k8s_cli, k8s_cli_version)
+    if results.deadline:
+        context.deadline = start_time + results.deadline
+    context.apply()
+
+    with timed_phase("", "mode_detection"):
+        context.mode = detect_mode(results.mode, k8s_cli, namespaces)
 
-    helm_release_name = results.helm_release_name or detect_helm(k8s_cli, namespaces)
+        context.helm_release_name = results.helm_release_name or detect_helm(k8s_cli, namespaces)
+
+    if results.since_bundle:
+        context.previous_manifests = load_bundle_manifests(results.since_bundle)
 
     api_resources = RESTRICTED_MODE_API_RESOURCES
-    if mode == MODE_ALL:
+    if context.mode == MODE_ALL:
         api_resources = api_resources + ALL_ONLY_API_RESOURCES
 
-    collect_rbac = results.collect_rbac_resources
-    if collect_rbac:
+    if results.collect_rbac_resources:
         api_resources = api_resources + RBAC_RESOURCES
 
-    processes = []
-    for namespace in namespaces:
-        proc = Process(target=collect_from_ns,
-                       args=[namespace, output_dir, api_resources, results.logs_from_all_pods,
-                             k8s_cli, mode, results.skip_support_package, results.collect_empty_files,
-                             helm_release_name])
-        proc.start()
-        processes.append(proc)
-
-    if results.collect_istio:
-        proc = Process(
-            target=collect_resources,
-            args=["istio-system", output_dir, ["Pod", "Service", "ConfigMap", "Deployment", "ReplicaSet"]]
-        )
-        proc.start()
-        processes.append(proc)
-
-    for proc in processes:
-        proc.join()
-
-    create_collection_report(output_dir, output_file_name, k8s_cli, namespaces, start_time, mode)
-
-    archive_files(output_dir, output_file_name)
+    with timed_phase("", "api_discovery"):
+        context.served_api_resources = discover_api_resources(k8s_cli)
+    context.apply()
+    context.api_resources, context.cluster_api_resources = split_cluster_scoped_api_resources(
+        filter_served_api_resources(api_resources), context.mode)
+    return context, namespaces
+
+
+def run_collection(context, namespaces, results, flight_recorder=None):
+    """
+        Collect from the cluster and the namespaces, and dump the flight recorder if given.
+        Returns the timing records of the collection tasks.
+    """
+    with timed_phase("", "collection"):
+        timings = run_collection_tasks(context, namespaces, results.collect_istio, results.workers,
+                                       context.start_method)
+
+    if flight_recorder:
+        with timed_phase("", "flight_recorder"):
+            move_to_archive(flight_recorder.dump(os.path.join(context.output_dir, WATCH_DIR_NAME)))
+    return timings
+
+
+def archive_collection(context, namespaces, results, timings, start_time, *, profiler=None, size_budget=None,
+                       streaming_archive=None):
+    """
+        Archive the output directory, or close the streaming archive, along with the reports
+    """
+    archive_start = time.time()
+
+    def write_reports():
+        """
+            Write the reports, once the rest of the bundle is archived, so the archiving is timed as well.
+            The collection report is written last, once the other reports are archived within the size budget,
+            so it lists them when they were dropped, and may take the part of the budget kept for it.
+        """
+        record_timing({"type": "phase", "namespace": "", "phase": "archive", "start": archive_start,
+                       "duration": time.time() - archive_start})
+        all_timings = pop_timings() + timings
+        if results.trace:
+            yield create_trace_file(context.output_dir, all_timings, start_time)
+        if profiler:
+            yield save_profile(profiler, "main")
+        if size_budget:
+            size_budget.release_reserve()
+        yield create_collection_report(context.output_dir, context.output_dir_name, context.k8s_cli, namespaces,
+                                       start_time, context.mode, all_timings, size_budget)
+
+    if streaming_archive:
+        streaming_archive.close(write_reports)
+    else:
+        archive_files(context.output_dir, context.output_dir_name, write_reports, size_budget)
+
+
+def run(results, flight_recorder=None):
+    """
+        Collect logs, along with the data recorded so far by the flight recorder if given
+    """
+    validate_compression(results.compression, results.compression_level)
+    output_dir, output_file_name = create_output_dir(results)
+
+    set_file_logger(output_dir)
+    logger.info("Started Redis Enterprise k8s log collector")
+    if results.resume:
+        logger.info("Resuming the interrupted collection in %s", output_dir)
+    start_time = time.time()
+    # pylint: disable=global-statement
+    global PROFILE
+    PROFILE = results.profile
+    profiler = start_profiler()
+    context, namespaces = setup_collection(results, output_dir, output_file_name, start_time)
+
+    size_budget = BundleSizeBudget(results.max_bundle_size) if results.max_bundle_size else None
+    streaming_archive = None
+    if results.stream_archive:
+        streaming_archive = StreamingArchive(output_dir, output_file_name, size_budget, context.start_method)
+        context.archive_queue = streaming_archive.queue
+        context.apply()
+
+    timings = run_collection(context, namespaces, results, flight_recorder)
+    archive_collection(context, namespaces, results, timings, start_time, profiler=profiler,
+                       size_budget=size_budget, streaming_archive=streaming_archive)
     logger.info("Finished Redis Enterprise log collector")
     logger.info("--- Run time: %d minutes ---", round(((time.time() - start_time) / 60), 3))
 
 
-def create_collection_report(output_dir, output_file_name, k8s_cli, namespaces, start_time, mode):
+def run_flight_recorder(results):
+    """
+        Record the events, the custom resources changes and the logs of the operator and the RS pods until
+        interrupted. A bundle including the recording is collected on SIGUSR1, and on exit (SIGINT/SIGTERM).
+    """
+    output_dir = results.output_dir or os.getcwd()
+    k8s_cli = detect_k8s_cli(results.k8s_cli)
+    namespaces = _get_namespaces_to_run_on(results.namespace, k8s_cli)
+    buffer_dir = os.path.join(output_dir, f"{WATCH_BUFFER_DIR_NAME}-{os.getpid()}")
+    mode = detect_mode(results.mode, k8s_cli, namespaces)
+    flight_recorder = FlightRecorder(k8s_cli, namespaces, buffer_dir, results.watch_buffer_size, mode)
+
+    dump_requested = threading.Event()
+    stop_requested = threading.Event()
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: dump_requested.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_requested.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_requested.set())
+
+    flight_recorder.start()
+    logger.info("Flight recorder started on namespaces %s, send SIGUSR1 to process %d to collect a bundle, "
+                "or stop it to collect a bundle and exit", namespaces, os.getpid())
+    try:
+        while not stop_requested.is_set():
+            if dump_requested.wait(1):
+                dump_requested.clear()
+                run(results, flight_recorder)
+                remove_file_loggers()
+        run(results, flight_recorder)
+    finally:
+        flight_recorder.stop()
+        shutil.rmtree(buffer_dir, ignore_errors=True)
+
+
+def remove_file_loggers():
+    """
+        Remove the file handlers of the logger, once the output directory they write to is archived
+    """
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            logger.removeHandler(handler)
+            handler.close()
+
+
+class RingBuffer:
+    """
+        A size-bounded buffer of timestamped lines from several sources, written to segment files on disk.
+        Once the buffer is full, the oldest segment is deleted.
+    """
+
+    def __init__(self, directory, max_size, segments=WATCH_BUFFER_SEGMENTS):
+        self.directory = directory
+        self._segment_size = max(1, max_size // segments)
+        self._max_segments = segments
+        self._segments = deque()
+        self._sequence = 0
+        self._file = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, source, line):
+        """
+            Append a line of a source to the buffer
+        """
+        record = f"{datetime.now(timezone.utc).isoformat()}\t{source}\t{line.rstrip()}\n".encode('UTF-8')
+        with self._lock:
+            if self._file is None or self._file.tell() + len(record) > self._segment_size:
+                self._rotate()
+            self._file.write(record)
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+        path = os.path.join(self.directory, f"segment-{self._sequence:08d}.log")
+        self._sequence += 1
+        # pylint: disable=R1732
+        self._file = open(path, "ab")
+        self._segments.append(path)
+        while len(self._segments) > self._max_segments:
+            remove_file(self._segments.popleft())
+
+    def snapshot(self):
+        """
+            Returns the paths and the sizes of the segments, oldest first
+        """
+        with self._lock:
+            if self._file:
+                self._file.flush()
+            return [(path, os.path.getsize(path)) for path in self._segments]
+
+    def close(self):
+        """
+            Close the segment being written
+        """
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class FlightRecorder:
+    """
+        Watches the events and the Redis Enterprise custom resources of the namespaces, and follows the logs of
+        the operator and the RS pods, into a ring buffer. Each watch runs the k8s CLI on a thread of its own.
+        Like the collection, restricted mode skips the events, and only watches resources with the operator label
+        (but for the resources collected regardless of it, such as the custom resources).
+    """
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-instance-attributes
+    def __init__(self, k8s_cli, namespaces, buffer_dir, buffer_size, mode):
+        self._k8s_cli = k8s_cli
+        self._namespaces = namespaces
+        self._mode = mode
+        self._buffer = RingBuffer(buffer_dir, buffer_size)
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = {}
+        self._processes = set()
+        # the time of the last line of each source, a source which is started again continues from it
+        self._last_lines = {}
+
+    def start(self):
+        """
+            Start the watches
+        """
+        for namespace in self._namespaces:
+            if self._mode == MODE_ALL:
+                self._start_watch(f"{namespace}/events",
+                                  f"{self._k8s_cli} get events -n {namespace} --watch -o wide")
+            for resource in WATCH_RESOURCES:
+                selector = ""
+                if self._mode == MODE_RESTRICTED and resource not in NON_LABELED_RESOURCES:
+                    selector = selector_flag(OPERATOR_LABEL)
+                self._start_watch(f"{namespace}/{resource}",
+                                  f"{self._k8s_cli} get {resource} -n {namespace} {selector} --watch -o wide")
+        thread = threading.Thread(target=self._follow_pods, daemon=True)
+        thread.start()
+
+    def stop(self):
+        """
+            Stop the watches, and kill their processes
+        """
+        self._stopped.set()
+        with self._lock:
+            processes = list(self._processes)
+            threads = list(self._threads.values())
+        for process in processes:
+            kill_process_group(process)
+        for thread in threads:
+            thread.join(timeout=5)
+        self._buffer.close()
+
+    def dump(self, output_dir):
+        """
+            Write the recorded lines into a file per source (e.g. <namespace>/events.log), returns the directory
+        """
+        make_dir(output_dir)
+        output_files = {}
+        try:
+            for path, size in self._buffer.snapshot():
+                try:
+                    with open(path, "rb") as segment:
+                        data = segment.read(size)
+                except FileNotFoundError:
+                    # the segment was dropped from the buffer since the snapshot
+                    continue
+                for line in data.decode('UTF-8', errors="replace").splitlines(True):
+                    timestamp, _, rest = line.partition("\t")
+                    source, _, text = rest.partition("\t")
+                    if source not in output_files:
+                        output_path = os.path.join(output_dir, f"{source}.log")
+                        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                        # pylint: disable=R1732
+                        output_files[source] = open(output_path, "w", encoding='UTF-8')
+                    output_files[source].write(f"{timestamp} {text}")
+        finally:
+            for output_file in output_files.values():
+                output_file.close()
+        logger.info("Dumped the flight recorder buffer of %d sources", len(output_files))
+        return output_dir
+
+    def _start_watch(self, source, cmd, restart=True):
+        with self._lock:
+            thread = self._threads.get(source)
+            if self._stopped.is_set() or (thread and thread.is_alive()):
+                return
+            thread = threading.Thread(target=self._run_watch, args=(source, cmd, restart), daemon=True)
+            self._threads[source] = thread
+        thread.start()
+
+    def _run_watch(self, source, cmd, restart):
+        """
+            Run a watch command, writing its output lines into the buffer.
+            Watches of resources are restarted when they end, and logs are followed again by _follow_pods.
+        """
+        while not self._stopped.is_set():
+            # pylint: disable=R1732
+            process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       **new_process_group_kwargs())
+            with self._lock:
+                self._processes.add(process)
+            for line in io.TextIOWrapper(process.stdout, encoding='UTF-8', errors="replace"):
+                self._buffer.write(source, line)
+                with self._lock:
+                    self._last_lines[source] = time.time()
+            process.wait()
+            with self._lock:
+                self._processes.discard(process)
+            if not restart:
+                return
+            self._stopped.wait(WATCH_RESTART_DELAY)
+
+    def _follow_pods(self):
+        """
+            Follow the logs of the containers of the operator and the RS pods, listing the pods periodically
+            to follow new pods and restarted containers
+        """
+        while not self._stopped.is_set():
+            for namespace in self._namespaces:
+                pods = OrderedDict()
+                for selector in WATCH_POD_SELECTORS:
+                    for pod in list_pods(namespace, self._k8s_cli, selector) or []:
+                        pods.setdefault(pod['metadata']['name'], pod)
+                for pod_name, pod in pods.items():
+                    for container in pod['spec'].get('containers', []):
+                        source = f"{namespace}/pods/{pod_name}-{container['name']}"
+                        with self._lock:
+                            last_line = self._last_lines.get(source)
+                        since = f"--since={math.ceil(time.time() - last_line) + 1}s" if last_line else \
+                            f"--tail={WATCH_LOG_TAIL_LINES}"
+                        self._start_watch(source, f"{self._k8s_cli} logs -f -n {namespace} {pod_name} "
+                                                  f"-c {container['name']} {since}", restart=False)
+            self._stopped.wait(WATCH_POD_REFRESH_INTERVAL)
+
+
+def discover_api_resources(k8s_cli):
+    """
+        List the resources served by the cluster.
+        Returns a dict mapping lower case kinds, plural names, short names and fully qualified names
+        to the resource kind and whether it is namespaced, or None if discovery failed.
+    """
+    cmd = f"{k8s_cli} api-resources"
+    return_code, out = run_shell_command(cmd, include_std_err=False)
+    lines = (out or "").splitlines()
+    if not lines or not lines[0].startswith("NAME"):
+        logger.warning("Failed to discover API resources, will try to collect all resources: %s", out)
+        return None
+    if return_code:
+        # some API groups might be unavailable, the output still lists the rest of them
+        logger.info("API resources discovery was partial, ignoring failed API groups")
+
+    served = parse_api_resources(lines)
+    logger.info("Discovered %d API resources", len({info["kind"] for info in served.values()}))
+    return served
+
+
+def parse_api_resources(lines):
+    """
+        Parse the lines of the kubectl api-resources table, into a dict mapping lower case kinds, plural names,
+        short names and fully qualified names to the resource kind and whether it is namespaced
+    """
+    header = lines[0]
+    columns = [match.group(0) for match in re.finditer(r'\S+', header)]
+    offsets = [header.index(column) for column in columns]
+    served = {}
+    for line in lines[1:]:
+        values = {column: line[offset:offsets[index + 1] if index + 1 < len(offsets) else None].strip()
+                  for index, (column, offset) in enumerate(zip(columns, offsets))}
+        kind = values.get("KIND")
+        if not kind:
+            continue
+        info = {"kind": kind, "namespaced": values.get("NAMESPACED") == "true"}
+        # older clients print the API group, newer ones print the API version
+        group = values.get("APIGROUP") or values.get("APIVERSION", "").rpartition("/")[0]
+        names = [kind, values.get("NAME")] + values.get("SHORTNAMES", "").split(",")
+        if group:
+            names.append(f"{values.get('NAME')}.{group}")
+        for name in names:
+            if name:
+                served.setdefault(name.lower(), info)
+    return served
+
+
+def is_api_resource_served(resource):
+    """
+        Check whether the cluster serves a resource, assuming it does if discovery failed
+    """
+    return SERVED_API_RESOURCES is None or resource.lower() in SERVED_API_RESOURCES
+
+
+def is_api_resource_cluster_scoped(resource):
+    """
+        Check whether a resource is cluster-scoped, according to the discovery or to a static list if it failed
+    """
+    if SERVED_API_RESOURCES is None:
+        return resource in CLUSTER_SCOPED_API_RESOURCES
+    info = SERVED_API_RESOURCES.get(resource.lower())
+    return info is not None and not info["namespaced"]
+
+
+def split_cluster_scoped_api_resources(api_resources, mode):
     """
-        create a file with some data about the collection
+        Split the resources into the ones collected in each namespace, and the cluster-scoped ones collected once.
+        Namespace is fetched by the name of each namespace, and in restricted mode PersistentVolume is fetched
+        by the claims of each namespace, so these are collected in each namespace.
     """
+    namespaced, cluster_scoped = [], []
+    for resource in api_resources:
+        if resource == "Namespace" or (resource == "PersistentVolume" and mode == MODE_RESTRICTED) or \
+                not is_api_resource_cluster_scoped(resource):
+            namespaced.append(resource)
+        else:
+            cluster_scoped.append(resource)
+    return namespaced, cluster_scoped
+
 
-    with open(os.path.join(output_dir, 'collection_report.json'), "w", encoding='utf-8') as output_fh:
-        json.dump({
-            "output_file_name": output_file_name,
-            "k8s_cli": k8s_cli,
-            "namespaces": namespaces,
-            "start_time": start_time,
-            "mode": mode,
-            "log_collector_version": VERSION_LOG_COLLECTOR
-        }, output_fh)
+def filter_served_api_resources(api_resources):
+    """
+        Drop resources the cluster doesn't serve, so they are not requested in every namespace
+    """
+    served = []
+    for resource in api_resources:
+        if is_api_resource_served(resource):
+            served.append(resource)
+        else:
+            logger.info("Skip collecting information for %s. Server has no resource of type %s",
+                        resource, resource)
+    return served
+
+
+def create_collection_report(output_dir, output_file_name, k8s_cli, namespaces, start_time, mode, timings,
+                             size_budget=None):
+    """
+        create a file with some data about the collection, returns its path.
+        With a size budget, the timing records of the commands, then those of the phases, are left out
+        when the report doesn't fit in the budget otherwise.
+    """
+    path = os.path.join(output_dir, 'collection_report.json')
+    report = {
+        "output_file_name": output_file_name,
+        "k8s_cli": k8s_cli,
+        "namespaces": namespaces,
+        "start_time": start_time,
+        "mode": mode,
+        "log_collector_version": VERSION_LOG_COLLECTOR,
+        "timings": summarize_timings(timings),
+        "size_budget": size_budget.report() if size_budget else None,
+        "incomplete_phases": [{"namespace": timing["namespace"], "phase": timing["phase"]} for timing in timings
+                              if timing["type"] == "phase" and timing.get("incomplete")],
+    }
+    details = ["phases", "commands"]
+    while True:
+        with open(path, "w", encoding='utf-8') as output_fh:
+            json.dump(report, output_fh)
+        if not size_budget or not details or size_budget.fits(os.path.getsize(path)):
+            return path
+        omitted = details.pop()
+        logger.warning("The collection report doesn't fit in the bundle size limit, leaving out the timings of the %s",
+                       omitted)
+        report["timings"][omitted] = None
+
+
+def summarize_timings(timings):
+    """
+        Returns the timing records of the phases and the commands, along with totals per phase
+    """
+    phases = [timing for timing in timings if timing["type"] == "phase"]
+    commands = [timing for timing in timings if timing["type"] == "command"]
+    phase_totals = {}
+    for phase in phases:
+        totals = phase_totals.setdefault(phase["phase"], {"duration": 0, "commands": 0, "command_duration": 0,
+                                                          "bytes": 0, "retries": 0, "failures": 0})
+        totals["duration"] += phase["duration"]
+    for command in commands:
+        totals = phase_totals.setdefault(command["phase"] or "other",
+                                         {"duration": 0, "commands": 0, "command_duration": 0, "bytes": 0,
+                                          "retries": 0, "failures": 0})
+        totals["commands"] += 1
+        totals["command_duration"] += command["duration"]
+        totals["bytes"] += command["bytes"]
+        totals["retries"] += 1 if command["attempt"] else 0
+        totals["failures"] += 1 if command["exit_code"] else 0
+    return {
+        "phase_totals": phase_totals,
+        "phases": [{key: value for key, value in phase.items() if key not in ("type", "tid")} for phase in phases],
+        "commands": [{key: value for key, value in command.items() if key != "type"} for command in commands],
+    }
+
+
+def create_trace_file(output_dir, timings, start_time):
+    """
+        Write the timing records as a Chrome trace (viewable in Perfetto or chrome://tracing), returns its path
+    """
+    events = []
+    for timing in timings:
+        if timing["type"] == "phase":
+            name = f"{timing['namespace']}/{timing['phase']}" if timing["namespace"] else timing["phase"]
+            args = {"namespace": timing["namespace"]}
+        else:
+            name = timing["cmd"]
+            args = {key: timing[key] for key in ("namespace", "phase", "exit_code", "bytes", "attempt")}
+        events.append({"name": name, "cat": timing["type"], "ph": "X", "pid": timing["pid"], "tid": timing["tid"],
+                       "ts": round((timing["start"] - start_time) * 1e6), "dur": round(timing["duration"] * 1e6),
+                       "args": args})
+    path = os.path.join(output_dir, TRACE_FILE_NAME)
+    with open(path, "w", encoding='utf-8') as output_fh:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, output_fh)
+    return path
 
 
 def get_selector(mode):
@@ -598,54 +1810,217 @@ def collect_pod_rs_logs(namespace, output_dir, k8s_cli, mode, k8s_cli_version):
                        "skipping rs pods logs collection", namespace)
         return
     make_dir(rs_pod_logs_dir)
-    for rs_pod_name in rs_pod_names:
-        pod_log_dir = os.path.join(rs_pod_logs_dir, rs_pod_name)
-        make_dir(pod_log_dir)
+    run_in_parallel(lambda rs_pod_name: run_unit(namespace, rs_pod_name, lambda: collect_rs_logs_from_pod(
+        namespace, rs_pod_name, rs_pod_logs_dir, k8s_cli, k8s_cli_version)), rs_pod_names)
+
+
+def collect_rs_logs_from_pod(namespace, rs_pod_name, rs_pod_logs_dir, k8s_cli, k8s_cli_version):
+    """
+    Copy the logs and the config from a single Redis Enterprise pod
+    """
+    if RS_LOGS_TRANSFER != RS_LOGS_TRANSFER_CP:
+        if stream_rs_files_from_pod(namespace, rs_pod_name, rs_pod_logs_dir, k8s_cli):
+            return
+        logger.warning("Namespace '%s': Falling back to copying rs logs and config from pod '%s' using cp",
+                       namespace, rs_pod_name)
+    pod_log_dir = os.path.join(rs_pod_logs_dir, rs_pod_name)
+    make_dir(pod_log_dir)
+    rs_log_files_filter = get_rs_log_files_filter()
+    if rs_log_files_filter:
+        save_skipped_rs_log_files(namespace, rs_pod_name, os.path.join(pod_log_dir, RS_LOG_SKIPPED_FILES_NAME),
+                                  rs_log_files_filter, k8s_cli)
+        # kubectl cp can't filter files, so select the files on the pod and stream them using tar
+        cmd = (f"{k8s_cli} -n {namespace} exec {rs_pod_name} -c {RLEC_CONTAINER_NAME} -- "
+               f"sh -c \"cd {RS_LOG_FOLDER_PATH} && {get_rs_log_files_tar_command(rs_log_files_filter)}\"")
+        return_code, out = run_shell_command_with_output_stream(
+            cmd, lambda stream: extract_tar_stream(stream, pod_log_dir), command_class=COMMAND_CLASS_COPY)
+    else:
         cmd = (f"cd \"{pod_log_dir}\" && {k8s_cli} -n {namespace} cp "
                f"{rs_pod_name}:{RS_LOG_FOLDER_PATH} ./ -c {RLEC_CONTAINER_NAME}")
         cmd = add_retries_if_supported(cmd, k8s_cli_version, k8s_cli)
-        return_code, out = run_shell_command(cmd)
-        if return_code:
-            logger.warning("Failed to copy rs logs from pod '%s' to output directory, output: %s",
-                           rs_pod_name, out)
-        else:
-            logger.info("Namespace '%s': Collected rs logs from pod: %s", namespace, rs_pod_name)
+        return_code, out = run_shell_command(cmd, command_class=COMMAND_CLASS_COPY)
+    if return_code:
+        logger.warning("Failed to copy rs logs from pod '%s' to output directory, output: %s",
+                       rs_pod_name, out)
+    else:
+        logger.info("Namespace '%s': Collected rs logs from pod: %s", namespace, rs_pod_name)
+
+    pod_config_dir = os.path.join(pod_log_dir, "config")
+    make_dir(pod_config_dir)
+    cmd = (f"cd \"{pod_config_dir}\" && {k8s_cli} -n {namespace} cp "
+           f"{rs_pod_name}:{RS_CONFIG_FOLDER_PATH} ./ -c {RLEC_CONTAINER_NAME}")
+    cmd = add_retries_if_supported(cmd, k8s_cli_version, k8s_cli)
+    return_code, out = run_shell_command(cmd, command_class=COMMAND_CLASS_COPY)
+    if return_code:
+        logger.warning("Failed to copy rs config from pod '%s' to output directory, output: %s",
+                       rs_pod_name, out)
+    else:
+        logger.info("Namespace '%s': Collected rs config from pod: %s", namespace, rs_pod_name)
+    move_to_archive(pod_log_dir)
 
-        pod_config_dir = os.path.join(pod_log_dir, "config")
-        make_dir(pod_config_dir)
-        cmd = (f"cd \"{pod_config_dir}\" && {k8s_cli} -n {namespace} cp "
-               f"{rs_pod_name}:/opt/redislabs/config ./ -c {RLEC_CONTAINER_NAME}")
-        cmd = add_retries_if_supported(cmd, k8s_cli_version, k8s_cli)
-        return_code, out = run_shell_command(cmd)
+
+def stream_rs_files_from_pod(namespace, rs_pod_name, rs_pod_logs_dir, k8s_cli):
+    """
+    Transfer the logs and the config of a Redis Enterprise pod as a single compressed tar stream.
+    The tar is either extracted into the pod directory as it's received, or stored as <pod name>.tar.gz.
+    Returns whether the transfer succeeded.
+    """
+    rs_log_files_filter = get_rs_log_files_filter()
+    cmd = (f"{k8s_cli} -n {namespace} exec {rs_pod_name} -c {RLEC_CONTAINER_NAME} -- "
+           f"sh -c \"cd {RS_LOG_FOLDER_PATH} && {get_rs_log_files_tar_command(rs_log_files_filter)} "
+           f"-C {RS_CONFIG_PARENT_PATH} {RS_CONFIG_FOLDER_NAME}\"")
+
+    if RS_LOGS_TRANSFER == RS_LOGS_TRANSFER_STREAM_STORE:
+        if rs_log_files_filter:
+            save_skipped_rs_log_files(namespace, rs_pod_name,
+                                      os.path.join(rs_pod_logs_dir, f"{rs_pod_name}.{RS_LOG_SKIPPED_FILES_NAME}"),
+                                      rs_log_files_filter, k8s_cli)
+        output_path = os.path.join(rs_pod_logs_dir, f"{rs_pod_name}.tar.gz")
+        return_code = run_shell_command_to_file(cmd, output_path, command_class=COMMAND_CLASS_COPY,
+                                                include_std_err=False)
         if return_code:
-            logger.warning("Failed to copy rs config from pod '%s' to output directory, output: %s",
-                           rs_pod_name, out)
-        else:
-            logger.info("Namespace '%s': Collected rs config from pod: %s", namespace, rs_pod_name)
+            logger.warning("Failed to stream rs logs and config from pod '%s'", rs_pod_name)
+            remove_file(output_path)
+            return False
+        move_to_archive(output_path)
+    else:
+        pod_log_dir = os.path.join(rs_pod_logs_dir, rs_pod_name)
+        make_dir(pod_log_dir)
+        if rs_log_files_filter:
+            save_skipped_rs_log_files(namespace, rs_pod_name, os.path.join(pod_log_dir, RS_LOG_SKIPPED_FILES_NAME),
+                                      rs_log_files_filter, k8s_cli)
+        return_code, out = run_shell_command_with_output_stream(
+            cmd, lambda stream: extract_tar_stream(stream, pod_log_dir), command_class=COMMAND_CLASS_COPY)
+        if return_code:
+            logger.warning("Failed to stream rs logs and config from pod '%s', output: %s", rs_pod_name, out)
+            shutil.rmtree(pod_log_dir, ignore_errors=True)
+            return False
+        move_to_archive(pod_log_dir)
+    logger.info("Namespace '%s': Collected rs logs and config from pod: %s", namespace, rs_pod_name)
+    return True
 
 
-def create_debug_info_package_on_pod(namespace, pod_name, attempt, k8s_cli):
+def extract_tar_stream(stream, output_dir):
     """
-    Execute the rladmin command to get debug info on a specific pod.
-    Returns: the debug info file name in case of success and None otherwise.
+    Extract a gzipped tar stream into a directory as it's read, without seeking.
+    Only regular files and directories within the directory are extracted, other members
+    (links, devices, absolute paths or paths out of the directory) are skipped.
     """
-    prog = "/opt/redislabs/bin/rladmin"
-    cmd = f"{k8s_cli} -n {namespace} exec {pod_name} -c {RLEC_CONTAINER_NAME} -- {prog} cluster debug_info path /tmp"
-    return_code, out = run_shell_command(cmd)
-    if return_code != 0 or "Downloading complete" not in out:
-        logger.warning("Failed to collect debug_info from pod: %s. (Attempt %d) "
-                       "If the issue persists, consider using the --skip_support_package flag "
-                       "to skip collecting the debug info package.", pod_name, attempt)
-        return None
+    output_dir = os.path.realpath(output_dir)
+    with tarfile.open(fileobj=stream, mode="r|gz") as tar:
+        for member in tar:
+            path = os.path.realpath(os.path.join(output_dir, member.name))
+            if os.path.commonpath([output_dir, path]) != output_dir or not (member.isfile() or member.isdir()):
+                logger.info("Skipping tar member %s", member.name)
+                continue
+            if member.isdir():
+                os.makedirs(path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as output_file:
+                shutil.copyfileobj(tar.extractfile(member), output_file, OUTPUT_CHUNK_SIZE)
+            os.utime(path, (member.mtime, member.mtime))
+
+
+def get_rs_log_files_tar_command(rs_log_files_filter):
+    """
+    Returns the command writing a gzipped tar of the RS log files selected by the find expression to stdout,
+    run from the RS log directory. More files to archive can be appended as arguments of tar.
+    The files are listed before tar runs, since sh has no pipefail and a failure of find would go unnoticed
+    in a pipe. The command is escaped for a double-quoted sh -c command.
+    """
+    if not rs_log_files_filter:
+        return "tar czf - ."
+    return (f"files=\\$(find . -type f \\( {rs_log_files_filter} \\)) && "
+            f"printf '%s' \\\"\\$files\\\" | tar czf - -T -")
+
+
+def get_rs_log_files_filter():
+    """
+    Returns the find expression selecting the RS log files to collect, or an empty string to collect all of them.
+    The expression is escaped for a double-quoted sh -c command.
+    """
+    predicates = []
+    since_seconds = get_logs_since_seconds()
+    if since_seconds is not None:
+        predicates.append(f"-mmin -{max(1, math.ceil(since_seconds / 60))}")
+    if RS_LOG_INCLUDE:
+        predicates.append(get_find_globs_expression(RS_LOG_INCLUDE))
+    if RS_LOG_EXCLUDE:
+        predicates.append(f"! {get_find_globs_expression(RS_LOG_EXCLUDE)}")
+    if RS_LOG_MAX_FILE_SIZE is not None:
+        predicates.append(f"! -size +{RS_LOG_MAX_FILE_SIZE}c")
+    return " ".join(predicates)
+
+
+def get_find_globs_expression(globs):
+    """
+    Returns a find expression matching any of the globs. Globs with a '/' are matched against
+    the path relative to the RS log folder, and the rest against the file name.
+    """
+    tests = [f"-path './{glob}'" if "/" in glob else f"-name '{glob}'" for glob in globs]
+    return f"\\( {' -o '.join(tests)} \\)"
+
+
+def save_skipped_rs_log_files(namespace, rs_pod_name, output_path, rs_log_files_filter, k8s_cli):
+    """
+    List the RS log files of a pod which are not selected by the filter, with their sizes in bytes, into a file
+    """
+    cmd = (f"{k8s_cli} -n {namespace} exec {rs_pod_name} -c {RLEC_CONTAINER_NAME} -- "
+           f"sh -c \"cd {RS_LOG_FOLDER_PATH} && find . -type f ! \\( {rs_log_files_filter} \\) "
+           f"-printf '%s\\t%P\\n'\"")
+    return_code, out = run_shell_command(cmd, include_std_err=False)
+    if return_code:
+        logger.warning("Failed to list the skipped rs log files of pod '%s', output: %s", rs_pod_name, out)
+        return
+    skipped_files = [line.split("\t", 1) for line in out.splitlines() if "\t" in line]
+    with open(output_path, "w", encoding='utf-8') as output_file:
+        output_file.write("size\tpath\n")
+        output_file.write("".join(f"{size}\t{path}\n" for size, path in skipped_files))
+    logger.info("Namespace '%s': Skipped %d rs log files (%d bytes) of pod: %s", namespace, len(skipped_files),
+                sum(int(size) for size, _ in skipped_files if size.isdigit()), rs_pod_name)
+    move_to_archive(output_path)
+
+
+def get_logs_since_seconds():
+    """
+    Returns the size of the logs time window in seconds, None if logs are collected regardless of time
+    """
+    if LOGS_SINCE:
+        return parse_duration(LOGS_SINCE)
+    if LOGS_SINCE_TIME:
+        return max(0, (datetime.now(timezone.utc) - parse_rfc3339_time(LOGS_SINCE_TIME)).total_seconds())
+    return None
+
+
+def create_debug_info_package_on_pod(namespace, pod_name, attempt, k8s_cli, package_dir=DEBUG_INFO_PACKAGE_DIR,
+                                     cancel_event=None):
+    """
+    Execute the rladmin command to get debug info on a specific pod.
+    Returns: the debug info file path on the pod in case of success and None otherwise.
+    """
+    prog = "/opt/redislabs/bin/rladmin"
+    cmd = f"{k8s_cli} -n {namespace} exec {pod_name} -c {RLEC_CONTAINER_NAME} -- "
+    if package_dir == DEBUG_INFO_PACKAGE_DIR:
+        cmd = f"{cmd}{prog} cluster debug_info path {package_dir}"
+    else:
+        cmd = f"{cmd}sh -c \"mkdir -p {package_dir} && {prog} cluster debug_info path {package_dir}\""
+    return_code, out = run_shell_command(cmd, command_class=COMMAND_CLASS_DEBUG_INFO, cancel_event=cancel_event)
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    if return_code != 0 or "Downloading complete" not in out:
+        logger.warning("Failed to collect debug_info from pod: %s. (Attempt %d) "
+                       "If the issue persists, consider using the --skip_support_package flag "
+                       "to skip collecting the debug info package.", pod_name, attempt)
+        return None
 
     # get the debug file name
     match = re.search(r'File (/tmp/(.*\.gz))', out)
     if match:
         debug_file_path = match.group(1)
-        debug_file_name = match.group(2)
         logger.info("Namespace '%s': debug info created on pod %s in path %s",
                     namespace, pod_name, debug_file_path)
-        return debug_file_name
+        return debug_file_path
 
     logger.warning(
         "Failed to extract debug info name from output (attempt %d for pod %s) - (%s)",
@@ -654,17 +2029,17 @@ def create_debug_info_package_on_pod(namespace, pod_name, attempt, k8s_cli):
 
 
 def download_debug_info_package_from_pod(
-        namespace, output_dir, pod_name, attempt, k8s_cli, debug_file_name, k8s_cli_version
+        namespace, output_dir, pod_name, attempt, k8s_cli, debug_file_path, k8s_cli_version, cancel_event=None
 ):
     """
     This function attempt to download debug info package from a given pod.
     It should only be called once the package is created.
     """
     cmd = (f"cd \"{output_dir}\" && {k8s_cli} -n {namespace} cp "
-           f"{pod_name}:/tmp/{debug_file_name} ./{debug_file_name} -c {RLEC_CONTAINER_NAME}")
+           f"{pod_name}:{debug_file_path} ./{os.path.basename(debug_file_path)} -c {RLEC_CONTAINER_NAME}")
     cmd = add_retries_if_supported(cmd, k8s_cli_version, k8s_cli, attempt)
 
-    return_code, out = run_shell_command(cmd)
+    return_code, out = run_shell_command(cmd, command_class=COMMAND_CLASS_COPY, cancel_event=cancel_event)
     if return_code:
         logger.info("Unable to copy debug info from pod %s"
                     "to output directory, output: %s \n Retrying from different pod",
@@ -709,36 +2084,42 @@ def get_cli_version(output, is_oc):
 
 
 def create_and_download_debug_info_package_from_pod(
-        namespace, pod_name, output_dir, k8s_cli, k8s_cli_version
+        namespace, pod_name, output_dir, k8s_cli, k8s_cli_version, package_dir=DEBUG_INFO_PACKAGE_DIR,
+        cancel_event=None
 ):
     """
     This function attempts to create a debug info package on a pod and if debug
     info package creation was successful, attempts downloading it.
+    Returns the path of the downloaded package, None upon failure or when cancelled using the cancel_event.
     """
-    debug_info_file_name = None
+    debug_info_file_path = None
     for attempt in range(DEBUG_INFO_PACKAGE_RETRIES):
-        debug_info_file_name = create_debug_info_package_on_pod(namespace, pod_name, attempt + 1, k8s_cli)
-        if debug_info_file_name is not None:
+        debug_info_file_path = create_debug_info_package_on_pod(namespace, pod_name, attempt + 1, k8s_cli,
+                                                                package_dir, cancel_event)
+        if debug_info_file_path is not None:
             # We managed to create the debug info package.
             break
-        time.sleep(1)
+        if is_past_deadline() or wait_for_cancel(cancel_event, 1):
+            return None
 
     # If we fail creating a debug info package, there is nothing to download, so we move on to the next pod.
-    if debug_info_file_name is None:
+    if debug_info_file_path is None:
         logger.info("Namespace: %s: Failed creating debug info package on pod: %s", namespace, pod_name)
-        return False
+        return None
+    debug_info_file_name = os.path.basename(debug_info_file_path)
     for attempt in range(DEBUG_INFO_PACKAGE_RETRIES):
         if download_debug_info_package_from_pod(
-                namespace, output_dir, pod_name, attempt + 1, k8s_cli, debug_info_file_name,
-                k8s_cli_version
+                namespace, output_dir, pod_name, attempt + 1, k8s_cli, debug_info_file_path,
+                k8s_cli_version, cancel_event
         ):
             logger.info(
                 "Namespace '%s': Collected Redis Enterprise cluster debug package from pod: %s",
                 namespace,
                 pod_name
             )
-            return True
-        time.sleep(1)
+            return os.path.join(output_dir, debug_info_file_name)
+        if is_past_deadline() or wait_for_cancel(cancel_event, 1):
+            break
 
     # In case of a failure to fully download the archive from the pod. Make sure that partially downloaded
     # archive is deleted.
@@ -748,9 +2129,86 @@ def create_and_download_debug_info_package_from_pod(
         namespace,
         file_to_delete
     )
-    cmd = f"rm {file_to_delete}"
+    remove_file(file_to_delete)
+    return None
+
+
+def create_and_download_debug_info_package_hedged(namespace, pod_names, output_dir, k8s_cli, k8s_cli_version):
+    """
+    Create the debug info package on the first pod, and when it's not downloaded within HEDGE_DELAY seconds,
+    on the second pod as well. The first package downloaded is kept, and the other attempt is cancelled.
+    Each attempt uses its own directory on the pod and in the output directory, which is removed once it's over,
+    along with the rladmin process of a cancelled attempt.
+    Returns the path of the downloaded package, None if both attempts failed.
+    """
+    # pylint: disable=too-many-locals
+    attempts = []
+
+    def start_attempt(executor, pod_name):
+        cancel_event = threading.Event()
+        attempt_dir = os.path.join(output_dir, f".debug_info-{pod_name}")
+        package_dir = f"{DEBUG_INFO_PACKAGE_DIR}/log_collector-{os.getpid()}-{pod_name}"
+        make_dir(attempt_dir)
+
+        def run_attempt():
+            # an attempt which raised is a failed one, so the other attempt and the cleanup go on
+            try:
+                return create_and_download_debug_info_package_from_pod(namespace, pod_name, attempt_dir, k8s_cli,
+                                                                       k8s_cli_version, package_dir, cancel_event)
+            # pylint: disable=W0703
+            except Exception:
+                logger.exception("Namespace '%s': Failed creating debug info package on pod: %s", namespace,
+                                 pod_name)
+                return None
+
+        future = executor.submit(run_attempt)
+        attempts.append((future, pod_name, cancel_event, attempt_dir, package_dir))
+        return future
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first_attempt = start_attempt(executor, pod_names[0])
+        wait([first_attempt], timeout=HEDGE_DELAY)
+        package_path = first_attempt.result() if first_attempt.done() else None
+        pending = set() if first_attempt.done() else {first_attempt}
+        if package_path is None:
+            logger.info("Namespace '%s': Debug info package not downloaded from pod %s within %ss, "
+                        "creating it on pod %s as well", namespace, pod_names[0], HEDGE_DELAY, pod_names[1])
+            pending.add(start_attempt(executor, pod_names[1]))
+        while package_path is None and pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            package_path = next((future.result() for future in done if future.result()), None)
+        for _, _, cancel_event, _, _ in attempts:
+            cancel_event.set()
+
+    for future, pod_name, _, attempt_dir, package_dir in attempts:
+        if package_path is not None and future.result() == package_path:
+            shutil.move(package_path, output_dir)
+            package_path = os.path.join(output_dir, os.path.basename(package_path))
+        remove_debug_info_attempt(namespace, pod_name, k8s_cli, attempt_dir, package_dir)
+    return package_path
+
+
+def remove_debug_info_attempt(namespace, pod_name, k8s_cli, attempt_dir, package_dir):
+    """
+    Remove the directories of a debug info package attempt, on the pod and in the output directory
+    """
+    # cancelling an attempt only kills the local exec, so rladmin is killed on the pod before its directory
+    # is removed, as it might still write the package into it. The pattern doesn't match the cleanup command.
+    logger.info("Namespace '%s': Removing the debug info package directory on pod %s", namespace, pod_name)
+    cmd = (f"{k8s_cli} -n {namespace} exec {pod_name} -c {RLEC_CONTAINER_NAME} -- "
+           f"sh -c \"pkill -f 'debug_inf[o] path {package_dir}'; rm -rf {package_dir}\"")
     run_shell_command(cmd)
-    return False
+    shutil.rmtree(attempt_dir, ignore_errors=True)
+
+
+def wait_for_cancel(cancel_event, seconds):
+    """
+    Wait the given seconds, returns whether the cancel_event was set in the meantime
+    """
+    if cancel_event is None:
+        time.sleep(seconds)
+        return False
+    return cancel_event.wait(seconds)
 
 
 def get_redis_enterprise_debug_info(namespace, output_dir, k8s_cli, mode, skip_support_package, k8s_cli_version):
@@ -764,20 +2222,35 @@ def get_redis_enterprise_debug_info(namespace, output_dir, k8s_cli, mode, skip_s
         logger.info("Namespace '%s': Cannot find redis enterprise pod", namespace)
         return
 
-    pod_names = []
-    for pod in rs_pods:
-        if 'containerStatuses' in pod['status'] and all(
-                container_status['ready'] for container_status in pod['status']['containerStatuses']):
-            pod_names.append(pod['metadata']['name'])
+    ready_pods = [pod for pod in rs_pods if 'containerStatuses' in pod['status'] and all(
+        container_status['ready'] for container_status in pod['status']['containerStatuses'])]
+    # prefer the pods which restarted the least
+    ready_pods.sort(key=lambda pod: sum(get_container_restart_counts(pod).values()))
+    ready_pod_names = [pod['metadata']['name'] for pod in ready_pods]
+    pod_names = ready_pod_names
     if not pod_names:
         logger.warning("Cannot find a ready redis enterprise pod, will use a non-ready pod")
         pod_names = [pod['metadata']['name'] for pod in rs_pods]
 
     if not skip_support_package:
         logger.info("Trying to extract debug info from RS pods: {%s}", pod_names)
-        for pod_name in pod_names:
-            if create_and_download_debug_info_package_from_pod(namespace, pod_name, output_dir,
-                                                               k8s_cli, k8s_cli_version):
+        if HEDGE_DELAY and len(ready_pod_names) > 1:
+            package_path = create_and_download_debug_info_package_hedged(namespace, ready_pod_names[:2],
+                                                                         output_dir, k8s_cli, k8s_cli_version)
+            if package_path:
+                move_to_archive(package_path)
+                # the failures on the other pods tried don't matter anymore
+                resolve_failed_commands()
+                return
+            pod_names = pod_names[2:]
+        for index, pod_name in enumerate(pod_names):
+            if skip_command_after_deadline(f"debug info extraction from pods {pod_names[index:]}"):
+                break
+            package_path = create_and_download_debug_info_package_from_pod(namespace, pod_name, output_dir,
+                                                                           k8s_cli, k8s_cli_version)
+            if package_path:
+                move_to_archive(package_path)
+                resolve_failed_commands()
                 break
 
 
@@ -827,12 +2300,110 @@ def check_empty_yaml_file(out):
     return False
 
 
+def split_yaml_list_items(out):
+    """
+    given an output of kubectl get command in yaml format, split the items list into the yaml text of each item.
+    Returns None if the output is not structured as expected.
+    """
+    items = []
+    in_items = False
+    for line in out.splitlines(True):
+        if not in_items:
+            if line.startswith("items:"):
+                if line.split(":", 1)[1].strip() == '[]':
+                    return items
+                in_items = True
+            continue
+        if line.startswith("- "):
+            items.append(line)
+        elif line.startswith(" ") and items:
+            items[-1] = items[-1] + line
+        elif line.strip():
+            # first key after the items list
+            return items
+    return None
+
+
+def get_yaml_item_kind(item):
+    """
+    given the yaml text of a single list item, returns its kind
+    """
+    match = YAML_ITEM_KIND_PATTERN.search(item)
+    return match.group(1) if match else None
+
+
+def get_yaml_item_metadata(item):
+    """
+    given the yaml text of a single list item, returns the scalar fields of its metadata
+    """
+    return get_yaml_item_fields(item, "metadata")
+
+
+def get_yaml_item_fields(item, field):
+    """
+    given the yaml text of a single list item, returns the scalar fields of one of its top level fields
+    """
+    fields = {}
+    in_field = False
+    for line in item.splitlines():
+        if line in (f"  {field}:", f"- {field}:"):
+            in_field = True
+        elif in_field and line.startswith("    ") and not line.startswith("     "):
+            key, _, value = line.strip().partition(":")
+            value = value.strip()
+            if value.startswith('"'):
+                value = try_load_json(value)
+            if value:
+                fields[key] = value
+        elif in_field and not line.startswith("    "):
+            break
+    return fields
+
+
+def get_yaml_items_with_offsets(out):
+    """
+    given an output of kubectl get commands in yaml format, possibly several lists one after the other,
+    returns the offset and length in bytes of each list item in the written file, along with its yaml text
+    """
+    # files are written in text mode, so newlines take the size of the platform line separator
+    newline_size = len(os.linesep) if ARCHIVE_QUEUE is None else 1
+    items = []
+    in_items = False
+    position = 0
+    for line in out.splitlines(True):
+        size = len(line.encode('UTF-8'))
+        if line.endswith("\n"):
+            size += newline_size - 1
+        if in_items and line.startswith("- "):
+            items.append([position, size, line])
+        elif in_items and line.startswith(" ") and items:
+            items[-1][1] += size
+            items[-1][2] += line
+        elif line.startswith("items:"):
+            in_items = line.split(":", 1)[1].strip() != '[]'
+        elif line.strip():
+            in_items = False
+        position += size
+    return [tuple(item) for item in items]
+
+
+def build_yaml_list(items):
+    """
+    given the yaml text of list items, build the output of kubectl get command in yaml format
+    """
+    if not items:
+        return YAML_LIST_HEADER.replace("items:\n", "items: []\n") + YAML_LIST_FOOTER
+    return YAML_LIST_HEADER + "".join(items) + YAML_LIST_FOOTER
+
+
 def detect_if_olm_deployed(namespace, k8s_cli):
     """
     detect if operator was deployed using OLM
     """
+    if not is_api_resource_served("operators.operators.coreos.com"):
+        return False
     cmd = f"{k8s_cli} get operators/redis-enterprise-operator-cert.{namespace} -n {namespace}"
-    code, _ = run_shell_command(cmd)
+    code, _ = run_probe_command(cmd)
     return code == 0
 
 
@@ -878,6 +2449,28 @@ def collect_olm_auto_generated_resources_description(namespace, ns_output_dir, k
         write_output_to_file(olm_output_dir, f"{entry}.txt", out)
 
 
+def get_api_resource_yaml(namespace, resource, k8s_cli, selector=""):
+    """
+        Runs kubectl get for a single API resource.
+        Returns a tuple of the name to store the resource under and the command output
+    """
+    if resource == "Namespace":
+        output = run_get_resource_yaml(namespace, resource, k8s_cli,
+                                       resource_names=[namespace])
+    elif resource == "CustomResourceDefinition":
+        output = run_get_resource_yaml(namespace, resource, k8s_cli,
+                                       resource_names=OPERATOR_CUSTOM_RESOURCE_DEFINITION_NAMES)
+    # We use this fully qualified resource kind to avoid potential clashes with Gateway API if it’s installed
+    elif resource == "gateways.networking.istio.io":
+        output = run_get_resource_yaml(namespace, resource, k8s_cli)
+        resource = "Gateways"
+    elif resource in NON_LABELED_RESOURCES:
+        output = run_get_resource_yaml(namespace, resource, k8s_cli)
+    else:
+        output = run_get_resource_yaml(namespace, resource, k8s_cli, selector)
+    return resource, output
+
+
 def collect_api_resources(namespace, output_dir, k8s_cli, api_resources, selector="", collect_empty_files=False):
     """
         Creates file for each of the API resources
@@ -889,32 +2482,176 @@ def collect_api_resources(namespace, output_dir, k8s_cli, api_resources, selecto
         f"Namespace '{namespace}': no {extract_label(selector)} labeled resources of type %s are found"
 
     message = f"{message}, skip collecting empty log file"
-    for resource in api_resources:
-        if resource == "Namespace":
-            output = run_get_resource_yaml(namespace, resource, k8s_cli,
-                                           resource_names=[namespace])
-        elif resource == "CustomResourceDefinition":
-            output = run_get_resource_yaml(namespace, resource, k8s_cli,
-                                           resource_names=OPERATOR_CUSTOM_RESOURCE_DEFINITION_NAMES)
-        # We use this fully qualified resource kind to avoid potential clashes with Gateway API if it’s installed
-        elif resource == "gateways.networking.istio.io":
-            output = run_get_resource_yaml(namespace, resource, k8s_cli)
-            resource = "Gateways"
-        elif resource in NON_LABELED_RESOURCES:
-            output = run_get_resource_yaml(namespace, resource, k8s_cli)
-        else:
-            output = run_get_resource_yaml(namespace, resource, k8s_cli, selector)
+    # the native backend already reuses a single connection, so there is no need to batch
+    prefetched = get_api_resources_yaml_batched(namespace, api_resources, k8s_cli, selector) \
+        if BATCH_GET and K8S_BACKEND == K8S_BACKEND_CLI else {}
+
+    def get_resource(resource):
+        if resource in prefetched:
+            return resource, prefetched[resource]
+        return get_api_resource_yaml(namespace, resource, k8s_cli, selector)
+
+    results = run_in_parallel(get_resource, api_resources)
+    manifest = {"bundle": ARCHIVE_OUTPUT_DIR_NAME, "resources": OrderedDict(), "deleted": OrderedDict()}
+    index = []
+    for resource, output in results:
         if output:
+            output = update_manifest(manifest, PREVIOUS_MANIFESTS.get(namespace), resource, output, index)
             if check_empty_yaml_file(output) and not collect_empty_files:
                 logger.info(message, resource)
             else:
                 resources_out[resource] = output
                 log_resource_collected(namespace, resource)
-    if selector:
+    if selector and "PersistentVolume" in api_resources:
         # collect PV resource
         collect_persistent_volume(namespace, k8s_cli, resources_out, "get", KUBCTL_GET_YAML_RETRIES)
+    write_api_resources(output_dir, resources_out, manifest, index)
+
+
+def write_api_resources(output_dir, resources_out, manifest, index):
+    """
+        Write the yaml file of each of the API resources, along with the manifest and the index of the objects.
+        The index holds the given records (of the objects stored in a previous bundle) and those of the written files.
+    """
     for entry, out in resources_out.items():
         write_output_to_file(output_dir, f"{entry}.yaml", out)
+        index.extend(get_index_records(entry, os.path.relpath(os.path.join(output_dir, f"{entry}.yaml"),
+                                                              ARCHIVE_OUTPUT_DIR), out))
+    write_output_to_file(output_dir, MANIFEST_FILE_NAME, json.dumps(manifest, indent=2))
+    write_output_to_file(output_dir, INDEX_FILE_NAME, "".join(f"{json.dumps(record)}\n" for record in index))
+
+
+def get_index_records(resource, file_name, output):
+    """
+        Returns the index records of the objects of a kubectl get output, stored in the given file of this bundle.
+        Each record holds the identity and the state of an object, and the offset and length in bytes of its
+        yaml within the file, so it can be read without parsing the whole file.
+    """
+    records = []
+    for offset, length, item in get_yaml_items_with_offsets(output):
+        records.append(get_index_record(resource, item, ARCHIVE_OUTPUT_DIR_NAME,
+                                        {"file": file_name, "offset": offset, "length": length}))
+    return records
+
+
+def get_index_record(resource, item, stored_in, location):
+    """
+        Returns the index record of an object, given the yaml of the list item and where the item is stored:
+        the bundle, and a location dict of the file within the bundle directory, and the offset and length in bytes
+        of the item within the file.
+    """
+    metadata = get_yaml_item_metadata(item)
+    status = get_yaml_item_fields(item, "status")
+    restart_counts = YAML_RESTART_COUNT_PATTERN.findall(item)
+    return {
+        "kind": get_yaml_item_kind(item) or resource,
+        "namespace": metadata.get("namespace"),
+        "name": metadata.get("name"),
+        "uid": metadata.get("uid"),
+        "resourceVersion": metadata.get("resourceVersion"),
+        "phase": status.get("phase"),
+        # RedisEnterpriseDatabase reports a status, RedisEnterpriseCluster a state
+        "status": status.get("status") or status.get("state"),
+        "restarts": sum(int(count) for count in restart_counts) if restart_counts else None,
+        "stored_in": stored_in,
+        "file": location.get("file"),
+        "offset": location.get("offset"),
+        "length": location.get("length"),
+    }
+
+
+def update_manifest(manifest, previous_manifest, resource, output, index):
+    """
+        Record the objects of a kubectl get output in the manifest.
+        When a manifest of a previous bundle is given, objects with the same uid and resourceVersion
+        are recorded as references to the bundle storing them, and are removed from the returned output.
+        Their index records, pointing at the bundle storing them, are added to the given index.
+    """
+    items = split_yaml_list_items(output)
+    if items is None:
+        return output
+    previous_objects = previous_manifest["resources"].get(resource, {}) if previous_manifest else {}
+    objects = manifest["resources"].setdefault(resource, OrderedDict())
+    changed_items = []
+    for item in items:
+        metadata = get_yaml_item_metadata(item)
+        uid = metadata.get("uid")
+        if not uid:
+            changed_items.append(item)
+            continue
+        entry = {"name": metadata.get("name"), "namespace": metadata.get("namespace"),
+                 "resourceVersion": metadata.get("resourceVersion"), "stored_in": manifest["bundle"]}
+        previous_entry = previous_objects.get(uid)
+        if previous_entry and previous_entry.get("resourceVersion") == entry["resourceVersion"]:
+            entry["stored_in"] = previous_entry["stored_in"]
+            # bundles without an index don't tell where the object is within the file
+            index.append(get_index_record(resource, item, entry["stored_in"],
+                                          previous_manifest.get("index", {}).get(uid, {})))
+        else:
+            changed_items.append(item)
+        objects[uid] = entry
+
+    deleted = [entry["name"] for uid, entry in previous_objects.items() if uid not in objects]
+    if deleted:
+        manifest["deleted"][resource] = deleted
+    if not previous_manifest:
+        return output
+    return build_yaml_list(changed_items)
+
+
+def load_bundle_manifests(bundle_path):
+    """
+        Load the manifests of a previous bundle, either an archive or an extracted directory.
+        Returns a dict of namespace to its manifest, which holds the index records of the objects of the namespace
+        by uid under "index" (empty for bundles without an index)
+    """
+    files = {}
+    try:
+        if os.path.isdir(bundle_path):
+            for namespace in os.listdir(bundle_path):
+                for file_name in (MANIFEST_FILE_NAME, INDEX_FILE_NAME):
+                    path = os.path.join(bundle_path, namespace, file_name)
+                    if os.path.isfile(path):
+                        with open(path, encoding='utf-8') as input_file:
+                            files[(namespace, file_name)] = input_file.read()
+        else:
+            with open_archive_for_reading(bundle_path) as tar:
+                # identical files are archived as hard links to the first one
+                files_by_name = {}
+                for member in tar:
+                    parts = member.name.split("/")
+                    if len(parts) != 3 or parts[2] not in (MANIFEST_FILE_NAME, INDEX_FILE_NAME):
+                        continue
+                    if member.isfile():
+                        files_by_name[member.name] = native_string(tar.extractfile(member).read())
+                    elif member.islnk() and member.linkname in files_by_name:
+                        files_by_name[member.name] = files_by_name[member.linkname]
+                    else:
+                        continue
+                    files[(parts[1], parts[2])] = files_by_name[member.name]
+        manifests = {namespace: json.loads(data) for (namespace, file_name), data in files.items()
+                     if file_name == MANIFEST_FILE_NAME}
+    except (OSError, tarfile.TarError, ValueError) as ex:
+        logger.error("Failed to load manifests of bundle %s: %s", bundle_path, ex)
+        sys.exit(1)
+    for namespace, manifest in manifests.items():
+        records = (try_load_json(line) for line in files.get((namespace, INDEX_FILE_NAME), "").splitlines())
+        manifest["index"] = {record["uid"]: record for record in records if record and record.get("uid")}
+    logger.info("Loaded manifests of namespaces %s from bundle %s", sorted(manifests), bundle_path)
+    return manifests
+
+
+def open_archive_for_reading(file_name):
+    """
+        Open an archive created with open_archive for streamed reading
+    """
+    if file_name.endswith(ARCHIVE_EXTENSIONS[COMPRESSION_ZSTD]):
+        if zstandard is None:
+            raise ValueError("reading a zstd archive requires the 'zstandard' python package")
+        # pylint: disable=R1732
+        stream = zstandard.ZstdDecompressor().stream_reader(open(file_name, "rb"))
+        return tarfile.open(fileobj=stream, mode="r|")
+    return tarfile.open(file_name, "r|*")
 
 
 def check_empty_desc_file(out):
@@ -929,6 +2666,27 @@ def extract_label(selector):
     return selector.split('=')[-1][:-1]
 
 
+def describe_api_resource(namespace, resource, k8s_cli, selector=""):
+    """
+        Runs kubectl describe for a single API resource.
+        Returns a tuple of the name to store the resource under and the command output
+    """
+    if resource == "Namespace":
+        output = describe_resource(namespace, resource, k8s_cli,
+                                   resource_names=[namespace])
+    elif resource == "CustomResourceDefinition":
+        output = describe_resource(namespace, resource, k8s_cli,
+                                   resource_names=OPERATOR_CUSTOM_RESOURCE_DEFINITION_NAMES)
+    elif resource == "gateways.networking.istio.io":
+        output = describe_resource(namespace, resource, k8s_cli)
+        resource = "Gateways"
+    elif resource in NON_LABELED_RESOURCES:
+        output = describe_resource(namespace, resource, k8s_cli)
+    else:
+        output = describe_resource(namespace, resource, k8s_cli, selector)
+    return resource, output
+
+
 def collect_api_resources_description(namespace, output_dir, k8s_cli, api_resources, selector="",
                                       collect_empty_files=False):
     """
@@ -941,27 +2699,16 @@ def collect_api_resources_description(namespace, output_dir, k8s_cli, api_resour
         f"Namespace '{namespace}': no {extract_label(selector)} labeled resources of type %s are found"
 
     message = f"{message}, skip collecting empty log file"
-    for resource in api_resources:
-        if resource == "Namespace":
-            output = describe_resource(namespace, resource, k8s_cli,
-                                       resource_names=[namespace])
-        elif resource == "CustomResourceDefinition":
-            output = describe_resource(namespace, resource, k8s_cli,
-                                       resource_names=OPERATOR_CUSTOM_RESOURCE_DEFINITION_NAMES)
-        elif resource == "gateways.networking.istio.io":
-            output = describe_resource(namespace, resource, k8s_cli)
-            resource = "Gateways"
-        elif resource in NON_LABELED_RESOURCES:
-            output = describe_resource(namespace, resource, k8s_cli)
-        else:
-            output = describe_resource(namespace, resource, k8s_cli, selector)
+    results = run_in_parallel(lambda resource: describe_api_resource(namespace, resource, k8s_cli, selector),
+                              api_resources)
+    for resource, output in results:
         if output:
             if check_empty_desc_file(output) and not collect_empty_files:
                 logger.info(message, resource)
             else:
                 resources_out[resource] = output
                 log_resource_collected(namespace, resource)
-    if selector:
+    if selector and "PersistentVolume" in api_resources:
         # collect PV resource
         collect_persistent_volume_description(namespace, k8s_cli, resources_out, KUBCTL_DESCRIBE_RETRIES)
     for entry, out in resources_out.items():
@@ -1001,7 +2748,7 @@ def get_pv_names(k8s_cli, namespace, error_template):
     missing_resource_template = (f"Namespace '{namespace}': Skip collecting information for PersistentVolumeClaim. "
                                   f"Server has no resource of type PersistentVolumeClaim")
     output = run_shell_command_with_retries(cmd, KUBCTL_GET_YAML_RETRIES, error_template, missing_resource_template)
-    return output.split()
+    return (output or "").split()
 
 
 def collect_pv_by_pvc_names(namespace, k8s_cli, collect_func, retries):
@@ -1021,7 +2768,7 @@ def collect_pv_by_pvc_names(namespace, k8s_cli, collect_func, retries):
                                       f" PersistentVolume - {volume}. "
                                       f"Server has no resource of type PersistentVolume - {volume}")
         output = run_shell_command_with_retries(cmd, retries, error_template, missing_resource_template)
-        pv_output = pv_output + output
+        pv_output = pv_output + (output or "")
     return pv_output
 
 
@@ -1041,11 +2788,13 @@ def collect_pv_by_pvc_name_description(namespace, k8s_cli, retries):
         missing_resource_template = f"Namespace '{namespace}': Skip collecting information for PersistentVolume - " \
                                     f"{volume}. Server has no resource of type PersistentVolume - {volume}"
         pv_name = run_shell_command_with_retries(cmd, retries, error_template, missing_resource_template)
+        if not pv_name:
+            continue
         cmd = f"{k8s_cli} describe -n {namespace} {pv_name}"
         missing_resource_template = f"Namespace '{namespace}': Skip collecting description for PersistentVolume - " \
                                     f"{volume}. Server has no resource of type PersistentVolume - {volume}"
         output = run_shell_command_with_retries(cmd, retries, error_template, missing_resource_template)
-        pv_output = pv_output + output
+        pv_output = pv_output + (output or "")
     return pv_output
 
 
@@ -1057,11 +2806,13 @@ def collect_pods_logs(namespace, output_dir, k8s_cli, logs_from_all_pods=False):
     logs_dir = os.path.join(output_dir, "pods")
 
     if logs_from_all_pods:
-        pods = get_pod_names(namespace, k8s_cli)
+        pods = get_pods(namespace, k8s_cli) or []
     else:
-        pods = []
+        pods = OrderedDict()
         for selector in ["app=redis-enterprise", "name=redis-enterprise-operator"]:
-            pods.extend(get_pod_names(namespace, k8s_cli, selector))
+            for pod in get_pods(namespace, k8s_cli, selector) or []:
+                pods.setdefault(pod['metadata']['name'], pod)
+        pods = list(pods.values())
 
     if not pods:
         logger.warning("Namespace '%s' Could not get pods list - "
@@ -1071,7 +2822,8 @@ def collect_pods_logs(namespace, output_dir, k8s_cli, logs_from_all_pods=False):
     make_dir(logs_dir)
 
     for pod in pods:
-        collect_logs_from_pod(namespace, pod, logs_dir, k8s_cli)
+        run_unit(namespace, pod['metadata']['name'],
+                 lambda pod=pod: collect_logs_from_pod(namespace, pod, logs_dir, k8s_cli))
 
 
 def collect_connectivity_check(namespace, output_dir, k8s_cli):
@@ -1086,7 +2838,8 @@ def collect_connectivity_check(namespace, output_dir, k8s_cli):
             collect_helper(output_dir,
                            cmd=f"curl -k -v {api_server}/api/",
                            file_name="connectivity_check_via_curl",
-                           resource_name="connectivity check via curl")
+                           resource_name="connectivity check via curl",
+                           probe=True)
     # Verify with kubectl.
     collect_helper(output_dir,
                    cmd=f"{k8s_cli} version --v=9",
@@ -1095,16 +2848,38 @@ def collect_connectivity_check(namespace, output_dir, k8s_cli):
                    namespace=namespace)
 
 
-def archive_files(output_dir, output_dir_name):
+def archive_files(output_dir, output_dir_name, write_last_files=None, size_budget=None):
     """
-        Create a compressed tar out of the debug file collection
+        Create a compressed tar out of the debug file collection.
+        write_last_files is called once the collection is archived, and the files it yields are archived last,
+        one by one, so each file it writes can account for the previous ones.
+        When a size budget is given, the files are archived by priority, as long as they fit in the budget.
     """
 
-    file_name = output_dir + ".tar.gz"
+    file_name, tar, stream = open_archive(output_dir)
 
     logger.info("Archiving files into %s", file_name)
-    with tarfile.open(file_name, "w|gz") as tar:
-        tar.add(output_dir, arcname=output_dir_name)
+    deduplicator = ArchiveDeduplicator()
+    try:
+        files_to_archive = []
+        for root, dirs, files in os.walk(output_dir):
+            dirs[:] = sorted(name for name in dirs if root != output_dir or name != CHECKPOINTS_DIR_NAME)
+            arcname = os.path.normpath(os.path.join(output_dir_name, os.path.relpath(root, output_dir)))
+            tar.add(root, arcname=arcname, recursive=False)
+            files_to_archive.extend((os.path.join(root, name), os.path.join(arcname, name)) for name in sorted(files))
+        if size_budget:
+            size_budget.start(file_name, stream)
+            size_budget.load_indexes(output_dir)
+            files_to_archive.sort(key=lambda entry: size_budget.get_priority(entry[1]))
+        for path, arcname in files_to_archive:
+            add_file_to_archive_within_budget(tar, path, arcname, deduplicator, size_budget)
+        for path in write_last_files() if write_last_files else []:
+            add_file_to_archive_within_budget(tar, path,
+                                              os.path.join(output_dir_name, os.path.relpath(path, output_dir)),
+                                              deduplicator, size_budget)
+    finally:
+        close_archive(tar, stream)
+    deduplicator.log_summary()
     logger.info("Archived files into %s", file_name)
 
     try:
@@ -1113,10 +2888,501 @@ def archive_files(output_dir, output_dir_name):
         logger.warning("Failed to delete directory after archiving: %s", ex)
 
 
+def add_file_to_archive_within_budget(tar, path, arcname, deduplicator, size_budget):
+    """
+        Add a file to the archive if it fits in the size budget, its tail if it can be truncated, or skip it
+    """
+    if not size_budget:
+        add_file_to_archive(tar, path, arcname, deduplicator)
+        return
+    size = os.path.getsize(path)
+    size_to_keep = size_budget.get_size_to_keep(arcname, size)
+    if size_to_keep == size:
+        add_file_to_archive(tar, path, arcname, deduplicator)
+    elif size_to_keep:
+        with open(path, "rb") as input_file:
+            input_file.seek(size - size_to_keep)
+            # start at a line boundary
+            tail_size = size_to_keep - len(input_file.readline(MIN_TRUNCATED_FILE_SIZE))
+            header = f"[truncated to the last {tail_size} of {size} bytes by --max_bundle_size]\n".encode()
+            tar_info = tar.gettarinfo(path, arcname)
+            tar_info.size = len(header) + tail_size
+            tar.addfile(tar_info, ConcatenatedReader(io.BytesIO(header), input_file))
+    size_budget.add(size_to_keep)
+
+
+class ConcatenatedReader:
+    """
+        Read-only file object reading several file objects one after the other
+    """
+
+    # pylint: disable=too-few-public-methods
+    def __init__(self, *files):
+        self._files = deque(files)
+
+    def read(self, size=-1):
+        """
+            Read up to size bytes, all the remaining bytes if size is negative
+        """
+        chunks = []
+        while self._files and (size < 0 or size > 0):
+            chunk = self._files[0].read(size)
+            if not chunk:
+                self._files.popleft()
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+
+class BundleSizeBudget:
+    """
+        Keeps the compressed size of the archive within a limit, by archiving files by priority
+        and truncating or skipping the files which don't fit. The dropped files are recorded for the report.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.dropped = []
+        self._file_name = None
+        self._stream = None
+        self._unhealthy_pods = {}
+        # bytes given to the archive, and the compressed size measured after some of them
+        self._added = 0
+        self._measured_added = 0
+        self._measured_size = 0
+        self._full = False
+        self._reserve = BUNDLE_SIZE_RESERVE
+
+    def start(self, file_name, stream):
+        """
+            Start tracking the size of an archive, and the compressed stream it's written with
+        """
+        self._file_name = file_name
+        self._stream = stream
+
+    def load_indexes(self, output_dir):
+        """
+            Load the health of the pods from the index files of the namespaces
+        """
+        for namespace in os.listdir(output_dir):
+            index_path = os.path.join(output_dir, namespace, INDEX_FILE_NAME)
+            if os.path.isfile(index_path):
+                with open(index_path, encoding='UTF-8') as index_file:
+                    self.observe_index(namespace, index_file.read())
+
+    def observe_index(self, namespace, data):
+        """
+            Record the health of the pods in the index of a namespace
+        """
+        pods = self._unhealthy_pods.setdefault(namespace, {})
+        for line in data.splitlines():
+            record = try_load_json(line)
+            if record and record.get("kind") == "Pod":
+                pods[record["name"]] = bool(record.get("restarts")) or record.get("phase") not in HEALTHY_POD_PHASES
+
+    def get_priority(self, arcname):
+        """
+            Returns the priority of a file by its name within the archive
+        """
+        parts = arcname.split("/")[1:]
+        name = parts[-1]
+        if len(parts) > 1 and parts[0] in (WATCH_DIR_NAME, PROFILES_DIR):
+            # the flight recorder is kept with the logs of unhealthy pods, the profiles with the logs of healthy ones
+            return BUNDLE_PRIORITY_UNHEALTHY_LOGS if parts[0] == WATCH_DIR_NAME else BUNDLE_PRIORITY_HEALTHY_LOGS
+        if len(parts) == 1 or \
+                (len(parts) < 3 and (name.startswith("debuginfo") or name.endswith(UNTRUNCATABLE_FILE_EXTENSIONS))):
+            return BUNDLE_PRIORITY_ESSENTIAL
+        if parts[1] == "pods":
+            if name.startswith(OPERATOR_POD_NAME_PREFIX):
+                return BUNDLE_PRIORITY_ESSENTIAL
+            pods = [pod for pod in self._unhealthy_pods.get(parts[0], {}) if name.startswith(f"{pod}-")]
+            return self._get_pod_logs_priority(parts[0], max(pods, key=len) if pods else None)
+        if parts[1] == "rs_pod_logs":
+            return self._get_pod_logs_priority(parts[0], parts[2] if len(parts) > 3 else name.split(".")[0])
+        return BUNDLE_PRIORITY_DESCRIPTIONS
+
+    def _get_pod_logs_priority(self, namespace, pod):
+        # pods missing from the index are assumed to be unhealthy
+        if self._unhealthy_pods.get(namespace, {}).get(pod, True):
+            return BUNDLE_PRIORITY_UNHEALTHY_LOGS
+        return BUNDLE_PRIORITY_HEALTHY_LOGS
+
+    def get_size_to_keep(self, arcname, size):
+        """
+            Returns how much of a file fits in the budget: its size, the size of a tail to keep, or 0 to skip it
+        """
+        available = self._get_available_size(size)
+        if available is None:
+            return size
+        ratio = 1.0 if arcname.endswith(COMPRESSED_FILE_EXTENSIONS) else self._get_compression_ratio()
+        if size * ratio <= available:
+            return size
+        size_to_keep = min(size, int(available / ratio)) if available > 0 and not arcname.endswith(
+            UNTRUNCATABLE_FILE_EXTENSIONS) else 0
+        if size_to_keep < MIN_TRUNCATED_FILE_SIZE:
+            size_to_keep = 0
+            self._full = self._full or available < tarfile.BLOCKSIZE
+        self.dropped.append({"file": arcname, "priority": self.get_priority(arcname), "size": size,
+                             "kept": size_to_keep})
+        return size_to_keep
+
+    def fits(self, size):
+        """
+            Returns whether a file of the given size fits in the budget as a whole
+        """
+        available = self._get_available_size(size)
+        return available is None or size * self._get_compression_ratio() <= available
+
+    def release_reserve(self):
+        """
+            Let the files archived from now on take the part of the budget kept for the collection report
+        """
+        self._reserve = 0
+
+    def _get_available_size(self, size):
+        """
+            Returns the compressed size left in the budget, None when a file of the given size fits
+            even if not compressed at all
+        """
+        available = self.max_size - self._reserve
+        # assuming no compression at all, the added bytes take at most their size
+        if self._measured_size + self._added - self._measured_added + size + tarfile.BLOCKSIZE <= available:
+            return None
+        if not self._full:
+            self._measure()
+        # the bytes given since the last measurement are estimated by the compression ratio measured so far,
+        # and take at least what the stream already wrote
+        estimated_size = max(self._measured_size +
+                             int((self._added - self._measured_added) * self._get_compression_ratio()),
+                             os.path.getsize(self._file_name))
+        return available - estimated_size - tarfile.BLOCKSIZE
+
+    def _get_compression_ratio(self):
+        if not self._measured_added:
+            return 1.0
+        return min(1.0, 1.2 * self._measured_size / self._measured_added)
+
+    def add(self, size):
+        """
+            Record bytes given to the archive
+        """
+        if size:
+            self._added += size + tarfile.BLOCKSIZE
+
+    def _measure(self):
+        pending = self._added - self._measured_added
+        if not pending or (self._measured_added and pending < BUNDLE_SIZE_MEASURE_INTERVAL):
+            return
+        self._stream.flush()
+        self._measured_size = os.path.getsize(self._file_name)
+        self._measured_added = self._added
+
+    def report(self):
+        """
+            Returns the budget and the dropped files for the collection report
+        """
+        if self.dropped:
+            logger.warning("The bundle size is limited to %d bytes, %d files were truncated or skipped, "
+                           "see collection_report.json", self.max_size, len(self.dropped))
+        return {"max_size": self.max_size, "dropped": self.dropped}
+
+
+class ArchiveDeduplicator:
+    """
+        Tracks the content hashes of the archived files, so copies of a file are archived as hard links to it
+    """
+
+    def __init__(self):
+        self._names = {}
+        self.links = 0
+        self.saved_bytes = 0
+
+    def get_link_name(self, arcname, data):
+        """
+            Returns the archive name of a file identical to the data, or None if the data is archived for the first
+            time, in which case it's recorded under the given archive name
+        """
+        digest = hashlib.sha256(data).digest()
+        link_name = self._names.setdefault(digest, arcname)
+        if link_name == arcname:
+            return None
+        self.links += 1
+        self.saved_bytes += len(data)
+        return link_name
+
+    def log_summary(self):
+        """
+            Log the number of files archived as hard links
+        """
+        if self.links:
+            logger.info("Archived %d duplicate files as hard links, saving %d bytes", self.links, self.saved_bytes)
+
+
+def add_file_to_archive(tar, path, arcname, deduplicator):
+    """
+        Add a file to the archive, or a hard link to an identical file that is already in the archive
+    """
+    tar_info = tar.gettarinfo(path, arcname)
+    if not tar_info.isreg():
+        tar.addfile(tar_info)
+    elif 0 < tar_info.size <= ARCHIVE_DEDUP_MAX_FILE_SIZE:
+        with open(path, "rb") as input_file:
+            data = input_file.read()
+        add_data_to_archive(tar, tar_info, data, deduplicator)
+    else:
+        with open(path, "rb") as input_file:
+            tar.addfile(tar_info, input_file)
+
+
+def add_data_to_archive(tar, tar_info, data, deduplicator):
+    """
+        Add a file with the given data to the archive, or a hard link to an identical file that is already in it
+    """
+    tar_info.size = len(data)
+    link_name = deduplicator.get_link_name(tar_info.name, data) if data else None
+    if link_name:
+        tar_info.type = tarfile.LNKTYPE
+        tar_info.linkname = link_name
+        tar_info.size = 0
+        tar.addfile(tar_info)
+    else:
+        tar.addfile(tar_info, io.BytesIO(data))
+
+
+def open_archive(output_dir):
+    """
+        Open a tar for streamed writing, compressed using the selected compression codec.
+        Returns the archive file name, the tar and the compressed stream it writes to.
+    """
+    file_name = output_dir + ARCHIVE_EXTENSIONS[COMPRESSION]
+    level = COMPRESSION_LEVEL or DEFAULT_COMPRESSION_LEVELS[COMPRESSION]
+    if COMPRESSION == COMPRESSION_ZSTD:
+        compressor = zstandard.ZstdCompressor(level=level, threads=-1)
+        # pylint: disable=R1732
+        stream = compressor.stream_writer(open(file_name, "wb"))
+    elif COMPRESSION == COMPRESSION_PARALLEL_GZIP:
+        stream = ParallelGzipWriter(file_name, level)
+    else:
+        # pylint: disable=R1732
+        stream = gzip.GzipFile(file_name, "wb", compresslevel=level)
+    return file_name, tarfile.open(fileobj=stream, mode="w|"), stream  # pylint: disable=R1732
+
+
+def close_archive(tar, stream):
+    """
+        Finalize a tar opened with open_archive
+    """
+    try:
+        tar.close()
+    finally:
+        stream.close()
+
+
+class ParallelGzipWriter:
+    """
+        Write-only file object compressing its input on all cores.
+        The input is split into fixed size chunks which are compressed concurrently into separate gzip members.
+        A concatenation of gzip members is a valid gzip file, which gzip and tar extract as a whole.
+    """
+
+    def __init__(self, file_name, level):
+        # pylint: disable=R1732
+        self._file = open(file_name, "wb")
+        self._level = level
+        workers = os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        # bound the memory held by chunks waiting to be written
+        self._max_pending = workers * 2
+        self._pending = deque()
+        self._buffer = bytearray()
+
+    def write(self, data):
+        """
+            Buffer the data, and compress any full chunk
+        """
+        self._buffer += data
+        while len(self._buffer) >= PARALLEL_GZIP_CHUNK_SIZE:
+            self._compress_chunk(bytes(self._buffer[:PARALLEL_GZIP_CHUNK_SIZE]))
+            del self._buffer[:PARALLEL_GZIP_CHUNK_SIZE]
+        return len(data)
+
+    def _compress_chunk(self, chunk):
+        # zlib releases the GIL while compressing, so threads do use multiple cores
+        self._pending.append(self._executor.submit(gzip.compress, chunk, self._level))
+        while len(self._pending) > self._max_pending:
+            self._file.write(self._pending.popleft().result())
+
+    def flush(self):
+        """
+            Compress the buffered data, and write all the compressed chunks
+        """
+        if self._buffer:
+            self._compress_chunk(bytes(self._buffer))
+            self._buffer = bytearray()
+        while self._pending:
+            self._file.write(self._pending.popleft().result())
+        self._file.flush()
+
+    def close(self):
+        """
+            Compress the remaining data, and write all the compressed chunks in order
+        """
+        try:
+            if self._buffer:
+                self._compress_chunk(bytes(self._buffer))
+                self._buffer = bytearray()
+            while self._pending:
+                self._file.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown()
+            self._file.close()
+
+
+class StreamingArchive:
+    """
+        Builds the compressed tar incrementally while the collection is running.
+        Collectors, possibly running in other processes, hand their output over a queue
+        as (archive name, file path, data) entries, and archived files are deleted from the output directory.
+        The queue is created for worker processes of the given start method.
+    """
+
+    # pylint: disable=too-many-instance-attributes, too-few-public-methods
+    def __init__(self, output_dir, output_dir_name, size_budget=None, start_method=None):
+        self.output_dir = output_dir
+        self.output_dir_name = output_dir_name
+        self.file_name, self._tar, self._stream = open_archive(output_dir)
+        self._deduplicator = ArchiveDeduplicator()
+        self._size_budget = size_budget
+        self._closing = False
+        if size_budget:
+            size_budget.start(self.file_name, self._stream)
+        self.queue = multiprocessing.get_context(start_method).Queue()
+        logger.info("Streaming files into %s", self.file_name)
+        self._thread = threading.Thread(target=self._archive_entries, daemon=True)
+        self._thread.start()
+
+    def _archive_entries(self):
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                return
+            self._archive_entry(*entry)
+
+    def _archive_entry(self, arcname, path, data):
+        try:
+            if self._size_budget and self._defer_entry(arcname, path, data):
+                return
+            if path is None:
+                tar_info = tarfile.TarInfo(arcname)
+                tar_info.mtime = time.time()
+                tar_info.mode = 0o644
+                add_data_to_archive(self._tar, tar_info, data, self._deduplicator)
+            else:
+                add_file_to_archive_within_budget(self._tar, path, arcname, self._deduplicator, self._size_budget)
+                os.remove(path)
+        # pylint: disable=W0703
+        except Exception as ex:
+            logger.warning("Failed to archive %s: %s", arcname, ex)
+
+    def _defer_entry(self, arcname, path, data):
+        """
+            Keep the files which aren't essential on disk until the archive is closed, so they are archived
+            by priority within the size budget. Returns whether the entry was deferred.
+        """
+        if path is None:
+            if arcname.endswith(f"/{INDEX_FILE_NAME}"):
+                self._size_budget.observe_index(arcname.split("/")[-2], native_string(data))
+            if self._size_budget.get_priority(arcname) == BUNDLE_PRIORITY_ESSENTIAL:
+                return False
+            path = os.path.join(self.output_dir, os.path.relpath(arcname, self.output_dir_name))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as output_file:
+                output_file.write(data)
+            return True
+        return not self._closing and self._size_budget.get_priority(arcname) != BUNDLE_PRIORITY_ESSENTIAL
+
+    def close(self, write_last_files=None):
+        """
+            Archive the files left in the output directory, and finalize the archive.
+            write_last_files is called once the collection is archived, and the files it yields are archived last,
+            one by one.
+        """
+        self.queue.put(None)
+        self._thread.join()
+        self._closing = True
+        files_to_archive = []
+        for root, _, files in os.walk(self.output_dir):
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                files_to_archive.append((os.path.join(self.output_dir_name, os.path.relpath(path, self.output_dir)),
+                                         path))
+        if self._size_budget:
+            files_to_archive.sort(key=lambda entry: self._size_budget.get_priority(entry[0]))
+        for arcname, path in files_to_archive:
+            self._archive_entry(arcname, path, None)
+        for path in write_last_files() if write_last_files else []:
+            self._archive_entry(os.path.join(self.output_dir_name, os.path.relpath(path, self.output_dir)), path, None)
+        close_archive(self._tar, self._stream)
+        self._deduplicator.log_summary()
+        logger.info("Archived files into %s", self.file_name)
+
+        try:
+            shutil.rmtree(self.output_dir)
+        except OSError as ex:
+            logger.warning("Failed to delete directory after archiving: %s", ex)
+
+
 def get_pods(namespace, k8s_cli, selector=""):
+    """
+    Returns list of pods matching the selector, out of the pods snapshot of the namespace.
+    In restricted mode the snapshot only holds the pods with the operator label, and pods matched by a selector
+    which doesn't require the label are listed by the selector instead.
+    """
+    snapshot_selector = OPERATOR_LABEL if MODE == MODE_RESTRICTED else ""
+    if snapshot_selector and snapshot_selector not in selector.split(","):
+        snapshot_selector = selector
+    pods = get_pods_snapshot(namespace, k8s_cli, snapshot_selector)
+    if pods is None:
+        return None
+    return [pod for pod in pods if pod_matches_selector(pod, selector)]
+
+
+# The pods of each namespace and snapshot selector, listed once and shared by all the collection phases of the
+# namespace task
+_POD_SNAPSHOTS = {}
+_POD_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def get_pods_snapshot(namespace, k8s_cli, selector=""):
+    """
+    Returns the list of the pods of the namespace matching the selector, listing them on first use
+    """
+    with _POD_SNAPSHOTS_LOCK:
+        if (namespace, selector) not in _POD_SNAPSHOTS:
+            pods = list_pods(namespace, k8s_cli, selector)
+            if pods is None:
+                return None
+            _POD_SNAPSHOTS[(namespace, selector)] = pods
+        return _POD_SNAPSHOTS[(namespace, selector)]
+
+
+def clear_pods_snapshots():
+    """
+    Drop the pods snapshots, so the pods listed by the next namespace task (and their restart counts) are current
+    """
+    with _POD_SNAPSHOTS_LOCK:
+        _POD_SNAPSHOTS.clear()
+
+
+def list_pods(namespace, k8s_cli, selector=""):
     """
     Returns list of pods
     """
+    if K8S_BACKEND == K8S_BACKEND_NATIVE:
+        return get_k8s_api_client(k8s_cli).list_objects(namespace, "Pod", selector)
     if selector:
         selector = selector_flag(selector)
     cmd = f'{k8s_cli} get pod -n {namespace} {selector} -o json '
@@ -1135,53 +3401,78 @@ def get_pods(namespace, k8s_cli, selector=""):
     return loaded_json[items_key]
 
 
-def get_list_of_containers_from_pod(namespace, pod_name, k8s_cli):
+def pod_matches_selector(pod, selector):
+    """
+    Check whether the labels of a pod match an equality based label selector, e.g. 'app=x,role!=y,z'
+    """
+    labels = pod['metadata'].get('labels') or {}
+    for requirement in filter(None, (part.strip() for part in selector.split(","))):
+        if "!=" in requirement:
+            key, value = requirement.split("!=", 1)
+            if labels.get(key.strip()) == value.strip():
+                return False
+        elif "=" in requirement:
+            key, value = requirement.replace("==", "=").split("=", 1)
+            if labels.get(key.strip()) != value.strip():
+                return False
+        elif requirement.startswith("!"):
+            if requirement[1:].strip() in labels:
+                return False
+        elif requirement not in labels:
+            return False
+    return True
+
+
+def get_container_restart_counts(pod):
     """
-        Returns list of containers from a given pod
+    Returns a dict of container name to its restart count, for both containers and init containers
     """
-    cmd = f"{k8s_cli} get pod {pod_name} -o jsonpath=\"{{.spec.containers[*].name}}\" -n {namespace}"
-    return_code, out = run_shell_command(cmd)
-    if return_code:
-        logger.warning("Failed to get containers from pod: %s", out)
-        return None
-    return out.split()
+    statuses = (pod['status'].get('containerStatuses') or []) + (pod['status'].get('initContainerStatuses') or [])
+    return {status['name']: status.get('restartCount', 0) for status in statuses}
 
 
-def get_list_of_init_containers_from_pod(namespace, pod_name, k8s_cli):
+def save_pod_logs(namespace, pod, container, k8s_cli, output_path, previous=False):
     """
-        Returns a list of init containers from a given pod.
+        Stream the logs of a container to the given file, without holding them in memory.
+        Returns the exit code. When it's not 0 the file holds the error, or is removed for previous logs.
     """
-    cmd = f"{k8s_cli} get pod {pod_name} -o jsonpath=\"{{.spec.initContainers[*].name}}\" -n {namespace}"
-    return_code, out = run_shell_command(cmd)
-    if return_code:
-        logger.warning("Failed to get init containers from pod: %s", out)
-        return None
-    return out.split()
+    if K8S_BACKEND == K8S_BACKEND_NATIVE:
+        return_code = get_k8s_api_client(k8s_cli).save_pod_logs(namespace, pod, container, output_path, previous)
+    else:
+        cmd = f"{k8s_cli} logs -c {container} -n  {namespace} {pod}"
+        if previous:
+            cmd = f"{cmd} -p"
+        if LOGS_SINCE:
+            cmd = f"{cmd} --since={LOGS_SINCE}"
+        elif LOGS_SINCE_TIME:
+            cmd = f"{cmd} --since-time={LOGS_SINCE_TIME}"
+        return_code = run_shell_command_to_file(cmd, output_path)
+    if return_code and previous:
+        remove_file(output_path)
+        return return_code
+    move_to_archive(output_path)
+    return return_code
 
 
 def collect_logs_from_pod(namespace, pod, logs_dir, k8s_cli):
     """
         Helper function getting logs of a pod
     """
-    containers = get_list_of_containers_from_pod(namespace, pod, k8s_cli)
-    init_containers = get_list_of_init_containers_from_pod(namespace, pod, k8s_cli)
-    containers.extend(init_containers)
-    if containers is None:
-        logger.warning("Namespace '%s' Could not get containers for pod: %s list - "
-                       "skipping pods logs collection", namespace, pod)
-        return
+    pod_name = pod['metadata']['name']
+    containers = [container['name'] for container in
+                  (pod['spec'].get('containers') or []) + (pod['spec'].get('initContainers') or [])]
+    restart_counts = get_container_restart_counts(pod)
     for container in containers:
-        cmd = f"{k8s_cli} logs -c {container} -n  {namespace} {pod}"
-        write_output_to_file(logs_dir, f"{pod}-{container}.log", run_shell_command(cmd)[1])
+        save_pod_logs(namespace, pod_name, container, k8s_cli, os.path.join(logs_dir, f"{pod_name}-{container}.log"))
 
         # operator and admission containers restart after changing the operator-environment-configmap
         # getting the logs of the containers before the restart can help us with debugging potential bugs
-        get_logs_before_restart_cmd = f"{k8s_cli} logs -c {container} -n  {namespace} {pod} -p"
-        err_code, output = run_shell_command(get_logs_before_restart_cmd)
-        if err_code == 0:  # Previous container instance found; did restart.
-            write_output_to_file(logs_dir, f"{pod}-{container}-instance-before-restart.log", output)
-
-            logger.info("Namespace '%s':  + %s-%s", namespace, pod, container)
+        if not restart_counts.get(container):
+            continue
+        output_path = os.path.join(logs_dir, f"{pod_name}-{container}-instance-before-restart.log")
+        if save_pod_logs(namespace, pod_name, container, k8s_cli, output_path, previous=True) == 0:
+            # Previous container instance found; did restart.
+            logger.info("Namespace '%s':  + %s-%s", namespace, pod_name, container)
 
 
 def get_pod_names(namespace, k8s_cli, selector=""):
@@ -1221,11 +3512,12 @@ def get_namespace_from_config(k8s_cli):
     return None
 
 
-def collect_helper(output_dir, cmd, file_name, resource_name, namespace=None):
+def collect_helper(output_dir, cmd, file_name, resource_name, namespace=None, probe=False):
     """
-        Runs command, write output to file_name, logs the resource_name
+        Runs command, write output to file_name, logs the resource_name.
+        A probe command is one whose failure is an answer in itself (see run_probe_command).
     """
-    return_code, out = run_shell_command(cmd)
+    return_code, out = run_probe_command(cmd) if probe else run_shell_command(cmd)
     if return_code:
         logger.warning("Error when running %s: %s", cmd, out)
         return
@@ -1248,6 +3540,9 @@ def run_get_resource_yaml(namespace, resource_type, k8s_cli, selector="", resour
     """
         Runs kubectl get command with yaml format
     """
+    if K8S_BACKEND == K8S_BACKEND_NATIVE:
+        return get_k8s_api_client(k8s_cli).get_resources_yaml(namespace, resource_type, selector_value(selector),
+                                                              resource_names)
     resource_name_args = " ".join(resource_names) if resource_names else ""
     cmd = f"{k8s_cli} get -n {namespace} {resource_type} {resource_name_args} {selector} -o yaml"
     error_template = failed_to_get_resource_error(namespace, resource_type)
@@ -1256,6 +3551,70 @@ def run_get_resource_yaml(namespace, resource_type, k8s_cli, selector="", resour
     return run_shell_command_with_retries(cmd, KUBCTL_GET_YAML_RETRIES, error_template, missing_resource_template)
 
 
+def get_api_resources_yaml_batched(namespace, api_resources, k8s_cli, selector=""):
+    """
+        Runs a single kubectl get command for all the resources sharing the same selector,
+        and splits the combined list by kind.
+        Returns a dict of resource type to its output (None for resource types the server doesn't have),
+        resources which failed to be fetched in a batch are omitted, so they can be fetched one by one.
+    """
+    labeled = []
+    non_labeled = []
+    for resource in api_resources:
+        if resource in UNBATCHABLE_RESOURCES:
+            continue
+        if resource in NON_LABELED_RESOURCES or not selector:
+            non_labeled.append(resource)
+        else:
+            labeled.append(resource)
+
+    resources_out = {}
+    for resources, resources_selector in ((labeled, selector), (non_labeled, "")):
+        resources_out.update(run_get_resources_yaml_batch(namespace, resources, k8s_cli, resources_selector))
+    return resources_out
+
+
+def run_get_resources_yaml_batch(namespace, resource_types, k8s_cli, selector=""):
+    """
+        Runs kubectl get command with yaml format for several resource types at once.
+        Resource types the server doesn't recognize are dropped from the batch, and mapped to None.
+    """
+    resource_types = list(resource_types)
+    resources_out = {}
+    while len(resource_types) > 1:
+        cmd = f"{k8s_cli} get -n {namespace} {','.join(resource_types)} {selector} -o yaml"
+        return_code, out = run_shell_command(cmd)
+        if return_code == 0:
+            items = split_yaml_list_items(out)
+            if items is None:
+                logger.warning("Namespace '%s': Failed to parse batched output of resources: %s",
+                               namespace, resource_types)
+                return resources_out
+            items_by_kind = OrderedDict((resource_type, []) for resource_type in resource_types)
+            for item in items:
+                kind = get_yaml_item_kind(item)
+                if kind not in items_by_kind:
+                    logger.warning("Namespace '%s': Unexpected kind %s in batched output", namespace, kind)
+                    return resources_out
+                items_by_kind[kind].append(item)
+            for kind, kind_items in items_by_kind.items():
+                resources_out[kind] = build_yaml_list(kind_items)
+            return resources_out
+
+        match = UNRECOGNIZED_RESOURCE_PATTERN.search(out or "")
+        unrecognized = [resource_type for resource_type in resource_types
+                        if match and resource_type.lower() == match.group(1).lower()]
+        if not unrecognized:
+            logger.info("Namespace '%s': Failed to get resources in a batch, "
+                        "falling back to one resource at a time: %s", namespace, (out or "").rstrip())
+            return resources_out
+        logger.info("Namespace '%s': Skip collecting information for %s. Server has no resource of type %s",
+                    namespace, unrecognized[0], unrecognized[0])
+        resource_types.remove(unrecognized[0])
+        resources_out[unrecognized[0]] = None
+    return resources_out
+
+
 def handle_unsuccessful_cmd(out, error_template, missing_resource_template):
     """
     function to choose whether to log in info or in warning according to output
@@ -1266,6 +3625,19 @@ def handle_unsuccessful_cmd(out, error_template, missing_resource_template):
         logger.warning(error_template.format(out.rstrip()))
 
 
+def run_in_parallel(func, items, max_workers=None):
+    """
+        Apply func to each of the items using a bounded pool of threads.
+        Returns the results in the order of the given items.
+    """
+    items = list(items)
+    max_workers = max_workers or PARALLELISM
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
 def run_shell_command_is_success(args):
     """
         Run a shell command, and returns whether the execution was successful (exit code 0).
@@ -1274,6 +3646,17 @@ def run_shell_command_is_success(args):
     return return_code == 0
 
 
+def run_probe_command(args):
+    """
+        Run a shell command whose failure is an answer in itself, such as a connectivity check or the detection
+        of an optional component. Its failure is recorded as completed, unless it timed out or was skipped.
+    """
+    return_code, out = run_shell_command(args)
+    if return_code != -9:
+        record_command_result(args, 0)
+    return return_code, out
+
+
 def run_shell_command_with_retries(args, retries, error_template, missing_resource_template=""):
     """
         Run a shell command, retrying up to <retries> attempts.
@@ -1282,107 +3665,297 @@ def run_shell_command_with_retries(args, retries, error_template, missing_resour
         Repeated error messages are supressed.
     """
     prev_out = None
-    for _ in range(retries):
-        return_code, out = run_shell_command(args)
+    for attempt in range(retries):
+        if attempt:
+            time.sleep(get_retry_delay(attempt - 1))
+        return_code, out = run_shell_command(args, attempt=attempt)
         if return_code == 0:
             return out
         if out is not None and out != prev_out:
             handle_unsuccessful_cmd(out, error_template, missing_resource_template)
         prev_out = out
+        if attempt + 1 == retries or is_non_retryable_output(out) or is_past_deadline() or \
+                not consume_retry_budget(args):
+            break
     return None
 
 
-def run_shell_command(args, include_std_err=True):
+def is_non_retryable_output(out):
     """
-        Run a shell command
+        Returns whether the output of a failed command is a definitive answer, such as a missing resource
+        or a forbidden request, which won't change when retrying
+    """
+    out = native_string(out or "").lower()
+    return any(non_retryable_output in out for non_retryable_output in NON_RETRYABLE_OUTPUTS)
+
+
+def get_retry_delay(retry):
+    """
+        Returns the time to wait before the given retry (0 based), using exponential backoff with full jitter
+    """
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** retry))
+
+
+def consume_retry_budget(args):
+    """
+        Take one retry out of the retry budget of the run.
+        Returns False when the budget is exhausted, and the failure should be final.
+    """
+    if RETRY_BUDGET is None:
+        return True
+    with RETRY_BUDGET.get_lock():
+        if RETRY_BUDGET.value <= 0:
+            logger.info("Retry budget exhausted, not retrying: %s", args)
+            return False
+        RETRY_BUDGET.value -= 1
+    return True
+
+
+def run_shell_command(args, include_std_err=True, command_class=COMMAND_CLASS_DEFAULT, attempt=0, cancel_event=None):
+    """
+        Run a shell command, with the timeout of its command class.
+        The command is killed once the cancel_event (a threading.Event) is set.
     """
     logger.info("Running shell command: %s", args)
+    if skip_command_after_deadline(args):
+        return -9, f"cmd: {args} skipped, the deadline passed"
+    return run_shell_command_timeout(args, include_std_err=include_std_err, timeout=get_command_timeout(command_class),
+                                     attempt=attempt, cancel_event=cancel_event)
 
-    # to allow timeouts to work in windows,
-    # would need to find another mechanism that signal.alarm based
-    if sys.platform == 'win32' or TIMEOUT == 0:
-        return run_shell_command_regular(args, include_std_err)
 
-    return run_shell_command_timeout(args, include_std_err=include_std_err)
+def run_shell_command_to_file(args, output_path, command_class=COMMAND_CLASS_DEFAULT, include_std_err=True):
+    """
+        Run a shell command, writing its output (stdout, and stderr unless include_std_err is False)
+        directly to a file.
+        The output is passed as is, and never buffered in memory, so it suits large outputs such as logs.
+        Returns the exit code of the command, -9 if it timed out (the output collected until then is kept).
+    """
+    logger.info("Running shell command: %s > %s", args, output_path)
+    if skip_command_after_deadline(args):
+        return -9
+    start = time.time()
+    with tempfile.TemporaryFile() as err_file:
+        try:
+            with open(output_path, "wb") as output_file:
+                process = subprocess.Popen(args,  # pylint: disable=R1732
+                                           shell=True,
+                                           stdout=output_file,
+                                           stderr=subprocess.STDOUT if include_std_err else err_file,
+                                           **new_process_group_kwargs())
+        except OSError as ex:
+            logger.warning("Failed writing output to path %s. Exception: %s", output_path, str(ex))
+            return 1
+        try:
+            return_code = process.wait(timeout=get_command_timeout(command_class))
+        except subprocess.TimeoutExpired:
+            logger.warning("cmd: %s timed out", args)
+            kill_process_group(process)
+            return_code = -9
+        err_file.seek(0)
+        err_output = err_file.read()
+    if err_output:
+        logger.warning("stderr output: %s", native_string(err_output))
+    definitive = return_code not in (0, -9) and \
+        is_non_retryable_output(err_output or read_file_tail(output_path, NON_RETRYABLE_OUTPUT_TAIL_SIZE))
+    record_command_timing(args, start, return_code, os.path.getsize(output_path), 0, definitive)
+    return return_code
 
 
-def run_shell_command_regular(args, include_std_err=True):
+def read_file_tail(path, size):
     """
-        Returns a tuple of the shell exit code, output
+        Returns the last <size> bytes of a file, or an empty bytes object if it can't be read
     """
-    err_output = None
     try:
-        piped_process = subprocess.Popen(args,  # pylint: disable=R1732
-                                         shell=True,
-                                         stdout=subprocess.PIPE,
-                                         stderr=subprocess.STDOUT if include_std_err else subprocess.PIPE)
-        output, err_output = piped_process.communicate()
-    except subprocess.CalledProcessError as ex:
-        logger.warning("Failed in shell command: %s, output: %s",
-                       args, ex.output)
-        return ex.returncode, native_string(ex.output)
-    finally:
-        if not include_std_err and err_output:
-            logger.warning("stderr output: %s", native_string(err_output))
-
-    return 0, native_string(output)
+        with open(path, "rb") as file:
+            file.seek(max(0, os.path.getsize(path) - size))
+            return file.read()
+    except OSError:
+        return b""
+
+
+def run_shell_command_with_output_stream(args, consume_output, command_class=COMMAND_CLASS_DEFAULT):
+    """
+        Run a shell command, passing its stdout as a binary stream to consume_output while it runs.
+        Returns the exit code of the command (1 if consume_output failed, -9 if it timed out) and its stderr.
+    """
+    logger.info("Running shell command: %s |", args)
+    if skip_command_after_deadline(args):
+        return -9, f"cmd: {args} skipped, the deadline passed"
+    start = time.time()
+    with tempfile.TemporaryFile() as err_file:
+        process = subprocess.Popen(args,  # pylint: disable=R1732
+                                   shell=True,
+                                   stdout=subprocess.PIPE,
+                                   stderr=err_file,
+                                   **new_process_group_kwargs())
+        timed_out = threading.Event()
+        timeout = get_command_timeout(command_class)
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, lambda: (timed_out.set(), signal_process_group(process)))
+            timer.start()
+        output = CountingReader(process.stdout)
+        error = None
+        try:
+            consume_output(output)
+        # pylint: disable=W0703
+        except Exception as ex:
+            error = ex
+        finally:
+            # closing the pipe stops the command if the output wasn't fully consumed
+            process.stdout.close()
+            return_code = process.wait()
+            if timer is not None:
+                timer.cancel()
+        err_file.seek(0)
+        out = native_string(err_file.read())
+    if timed_out.is_set():
+        logger.warning("cmd: %s timed out", args)
+        return_code, out = -9, f"cmd: {args} timed out"
+    elif error is not None:
+        return_code, out = return_code or 1, f"{out}{error}"
+    record_command_timing(args, start, return_code, output.bytes, 0,
+                          return_code not in (0, -9) and is_non_retryable_output(out))
+    return return_code, out
 
 
-def run_shell_command_timeout(args, cwd=None, shell=True, env=None, include_std_err=True):
+class CountingReader:
     """
-        Utility function to run a shell command with a timeout
+        Wraps a binary stream, counting the bytes read from it
     """
 
-    def get_process_children(parent):
-        piped_process = subprocess.Popen(f'ps --no-headers -o pid '  # pylint: disable=R1732
-                                         f'--ppid {parent}',
-                                         shell=True,
-                                         stdout=subprocess.PIPE,
-                                         stderr=subprocess.PIPE)
-        stdout, _ = piped_process.communicate()
-        return [int(proc) for proc in stdout.split()]
+    # pylint: disable=too-few-public-methods
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes = 0
 
-    # no need for pass here:
-    # https://github.com/PyCQA/pylint/issues/2616#issuecomment-442738701
-    # do not remove the doc string - code would break
-    class Alarm(Exception):
+    def read(self, size=-1):
         """
-            Custom alarm exception
+            Read from the stream
         """
+        data = self.stream.read(size)
+        self.bytes += len(data)
+        return data
+
+
+def remove_file(path):
+    """
+        Remove a file if it exists
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_command_timeout(command_class=COMMAND_CLASS_DEFAULT):
+    """
+        Returns the timeout in seconds of a command class, limited to the deadline of the current phase (at least
+        a second), None if timeouts are disabled and there is no deadline
+    """
+    if command_class in COMMAND_TIMEOUTS:
+        timeout = COMMAND_TIMEOUTS[command_class] or None
+    elif TIMEOUT == 0:
+        timeout = None
+    else:
+        timeout = max(TIMEOUT, DEFAULT_COMMAND_TIMEOUTS.get(command_class, 0))
+    deadline = get_current_deadline()
+    if deadline is None:
+        return timeout
+    time_left = max(1, deadline - time.time())
+    return time_left if timeout is None else min(timeout, time_left)
 
-    def alarm_handler(_, __):
-        raise Alarm
 
+def run_shell_command_timeout(args, cwd=None, shell=True, env=None, include_std_err=True, timeout=None,
+                              attempt=0, cancel_event=None):
+    """
+        Utility function to run a shell command with a timeout.
+        The command runs in its own process group, and the whole group is killed once the timeout expires.
+        No signals are involved, so commands can be run from any thread.
+    """
+    start = time.time()
     piped_process = subprocess.Popen(args,  # pylint: disable=R1732
                                      shell=shell,
                                      cwd=cwd,
                                      stdout=subprocess.PIPE,
                                      stderr=subprocess.STDOUT if include_std_err else subprocess.PIPE,
-                                     env=env)
-    if TIMEOUT != 0:
-        signal.signal(signal.SIGALRM, alarm_handler)
-        signal.alarm(TIMEOUT)
+                                     env=env,
+                                     **new_process_group_kwargs())
     try:
-        output, err_output = piped_process.communicate()
-        # disable alarm after process returns
-        signal.alarm(0)
-    except Alarm:
+        output, err_output = communicate_until_cancelled(piped_process, timeout, cancel_event)
+    except subprocess.TimeoutExpired:
+        kill_process_group(piped_process)
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info("cmd: %s cancelled", args)
+            record_command_timing(args, start, -15, 0, attempt)
+            return -15, f"cmd: {args} cancelled"
         logger.warning("cmd: %s timed out", args)
-        pids = [piped_process.pid]
-        pids.extend(get_process_children(piped_process.pid))
-        for pid in pids:
-            # process might have died before getting to this line
-            # so wrap to avoid OSError: no such process
-            try:
-                os.kill(pid, signal.SIGKILL)
-            except OSError:
-                pass
+        record_command_timing(args, start, -9, 0, attempt)
         return -9, f"cmd: {args} timed out"
 
     if not include_std_err and err_output:
         logger.warning("stderr output: %s", native_string(err_output))
 
-    return piped_process.returncode, native_string(output)
+    output = native_string(output)
+    record_command_timing(args, start, piped_process.returncode, len(output), attempt,
+                          piped_process.returncode != 0 and is_non_retryable_output(output))
+    return piped_process.returncode, output
+
+
+def communicate_until_cancelled(process, timeout, cancel_event):
+    """
+        Communicate with a process until it exits.
+        Raises TimeoutExpired when the timeout expires, or when the cancel_event is set.
+    """
+    if cancel_event is None:
+        return process.communicate(timeout=timeout)
+    deadline = None if timeout is None else time.time() + timeout
+    while True:
+        if cancel_event.is_set():
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        poll_interval = CANCEL_POLL_INTERVAL
+        if deadline is not None:
+            poll_interval = max(0, min(poll_interval, deadline - time.time()))
+        try:
+            return process.communicate(timeout=poll_interval)
+        except subprocess.TimeoutExpired:
+            if deadline is not None and time.time() >= deadline:
+                raise
+
+
+def new_process_group_kwargs():
+    """
+        Returns the Popen arguments to start a process in a new process group
+    """
+    if sys.platform == 'win32':
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_group(process):
+    """
+        Kill a process started in a new process group, along with all the processes in its group
+    """
+    signal_process_group(process)
+    try:
+        # reap the process, children which left the group might still hold the pipes open
+        process.communicate(timeout=5)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def signal_process_group(process):
+    """
+        Send SIGKILL to a process started in a new process group, and to all the processes in its group
+    """
+    try:
+        if sys.platform == 'win32':
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        # process might have died before getting to this line
+        pass
 
 
 def describe_resource(namespace, resource_type, k8s_cli, selector="", resource_names=None):
@@ -1407,6 +3980,115 @@ def check_not_negative(value):
     return ivalue
 
 
+def check_command_timeouts(value):
+    """
+        Validate a list of command class timeouts, e.g. debug_info=900,copy=1200
+    """
+    command_timeouts = {}
+    for pair in filter(None, value.split(",")):
+        command_class, _, timeout = pair.partition("=")
+        if command_class not in COMMAND_CLASSES:
+            raise argparse.ArgumentTypeError(f"unknown command class {command_class}, "
+                                             f"expected one of: {', '.join(COMMAND_CLASSES)}")
+        command_timeouts[command_class] = check_not_negative(timeout)
+    return command_timeouts
+
+
+def check_positive(value):
+    """
+        Validate a numeric option is positive
+    """
+    ivalue = int(value)
+    if ivalue <= 0:
+        raise argparse.ArgumentTypeError(f"{value} must be greater than 0")
+    return ivalue
+
+
+def parse_duration(value):
+    """
+        Returns the number of seconds of a duration in kubectl format, e.g. 1h, 30m, 1h30m, 90s
+    """
+    match = DURATION_PATTERN.match(value)
+    if not value or not match:
+        raise ValueError(f"invalid duration: {value}")
+    hours, minutes, seconds = (int(group or 0) for group in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_rfc3339_time(value):
+    """
+        Returns a timezone aware datetime out of an RFC3339 time, e.g. 2024-01-01T10:00:00Z
+    """
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00").replace("z", "+00:00"))
+    if parsed.tzinfo is None:
+        raise ValueError(f"time {value} has no timezone")
+    return parsed
+
+
+def check_duration(value):
+    """
+        Validate an option is a duration in kubectl format
+    """
+    try:
+        parse_duration(value)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(f"{value} is not a valid duration (e.g. 1h, 30m, 1h30m)") from ex
+    return value
+
+
+def parse_size(value):
+    """
+        Returns the number of bytes of a size, e.g. 1048576, 512K, 100M, 2G
+    """
+    match = SIZE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"invalid size: {value}")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).lower()]
+
+
+def check_size(value):
+    """
+        Validate an option is a size in bytes, with an optional K/M/G suffix
+    """
+    try:
+        return parse_size(value)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(f"{value} is not a valid size (e.g. 512K, 100M, 2G)") from ex
+
+
+def check_bundle_size(value):
+    """
+        Validate the size limit of the bundle, which has to leave room for the reports
+    """
+    size = check_size(value)
+    if size < 2 * BUNDLE_SIZE_RESERVE:
+        raise argparse.ArgumentTypeError(f"{value} must be at least {2 * BUNDLE_SIZE_RESERVE // (1024 * 1024)}M")
+    return size
+
+
+def check_globs(value):
+    """
+        Validate a comma-separated list of file globs, which are passed to find on the pods
+    """
+    globs = [glob.strip() for glob in value.split(",") if glob.strip()]
+    for glob in globs:
+        if any(char in glob for char in "'\"\\$`"):
+            raise argparse.ArgumentTypeError(f"{glob} must not contain quotes, backslashes, $ or `")
+    return globs
+
+
+def check_rfc3339_time(value):
+    """
+        Validate an option is an RFC3339 time
+    """
+    try:
+        parse_rfc3339_time(value)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(f"{value} is not a valid RFC3339 time "
+                                         f"(e.g. 2024-01-01T10:00:00Z)") from ex
+    return value
+
+
 def log_resource_collected(namespace, resource):
     """
     Helper function to log that a resource was collected
@@ -1428,6 +4110,13 @@ def selector_flag(selector):
     return f'--selector={selector}'
 
 
+def selector_value(selector):
+    """
+    Helper function to extract the selector out of a formatted kubectl/oc selector flag
+    """
+    return selector.strip()[len("--selector="):] if selector.strip().startswith("--selector=") else selector.strip()
+
+
 def try_load_json(json_str):
     """
     Try to load a string as json
@@ -1440,6 +4129,436 @@ def try_load_json(json_str):
     return None
 
 
+def dump_yaml(data):
+    """
+    Serialize json compatible data to yaml, in the same block style kubectl uses
+    """
+    lines = []
+    if isinstance(data, dict) and data:
+        _dump_yaml_mapping(data, 0, lines)
+    else:
+        lines.append(f"{_yaml_inline_value(data)}\n")
+    return "".join(lines)
+
+
+def _yaml_inline_value(value):
+    if isinstance(value, (dict, list)):
+        # only empty collections are inlined
+        return "{}" if isinstance(value, dict) else "[]"
+    if value is None or isinstance(value, (bool, int, float)):
+        # null, true, false and numbers are the same in json and yaml
+        return json.dumps(value)
+    value = str(value)
+    if YAML_PLAIN_SCALAR_PATTERN.match(value) and value.lower() not in YAML_RESERVED_WORDS:
+        return value
+    # json strings are valid yaml double-quoted scalars
+    return json.dumps(value)
+
+
+def _dump_yaml_mapping(mapping, indent, lines):
+    for key in sorted(mapping):
+        value = mapping[key]
+        prefix = f"{' ' * indent}{_yaml_inline_value(str(key))}:"
+        if isinstance(value, dict) and value:
+            lines.append(f"{prefix}\n")
+            _dump_yaml_mapping(value, indent + 2, lines)
+        elif isinstance(value, list) and value:
+            lines.append(f"{prefix}\n")
+            _dump_yaml_sequence(value, indent, lines)
+        else:
+            lines.append(f"{prefix} {_yaml_inline_value(value)}\n")
+
+
+def _dump_yaml_sequence(sequence, indent, lines):
+    for value in sequence:
+        if isinstance(value, (dict, list)) and value:
+            item_lines = []
+            if isinstance(value, dict):
+                _dump_yaml_mapping(value, indent + 2, item_lines)
+            else:
+                _dump_yaml_sequence(value, indent + 2, item_lines)
+            item_lines[0] = f"{' ' * indent}- {item_lines[0][indent + 2:]}"
+            lines.extend(item_lines)
+        else:
+            lines.append(f"{' ' * indent}- {_yaml_inline_value(value)}\n")
+
+
+class KubernetesApiError(Exception):
+    """
+        Raised when a request to the Kubernetes API server fails
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class KubernetesApiClient:
+    """
+        Minimal Kubernetes API client, used as an alternative to the k8s CLI for get/list/logs operations.
+        The kubeconfig is read once, and requests are sent over a pool of keep-alive connections.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, kubeconfig):
+        self.pid = os.getpid()
+        context_name = kubeconfig.get("current-context")
+        context = self._find_named(kubeconfig.get("contexts"), context_name, "context")
+        cluster = self._find_named(kubeconfig.get("clusters"), context.get("cluster"), "cluster")
+        self._user = self._find_named(kubeconfig.get("users"), context.get("user"), "user")
+        server = urlsplit(cluster["server"])
+        self._scheme = server.scheme
+        self._host = server.hostname
+        self._port = server.port
+        self._base_path = server.path.rstrip("/")
+        self._ssl_context = self._create_ssl_context(cluster) if self._scheme == "https" else None
+        self._auth_header = None
+        self._refresh_auth_header()
+        self._connections = queue.LifoQueue(maxsize=K8S_API_CONNECTION_POOL_SIZE)
+        self._discovery_lock = threading.Lock()
+        self._api_resources = None
+        self._failed_group_versions = []
+
+    @classmethod
+    def from_k8s_cli(cls, k8s_cli):
+        """
+            Create a client out of the kubeconfig of the current context, as resolved by the k8s CLI
+        """
+        cmd = f"{k8s_cli} config view --raw --minify -o json"
+        return_code, out = run_shell_command(cmd, include_std_err=False)
+        kubeconfig = try_load_json(out) if not return_code else None
+        if not kubeconfig:
+            raise KubernetesApiError(None, f"Failed to read kubeconfig using: {cmd}")
+        return cls(kubeconfig)
+
+    @staticmethod
+    def _find_named(entries, name, key):
+        for entry in entries or []:
+            if entry.get("name") == name:
+                return entry.get(key) or {}
+        return {}
+
+    @staticmethod
+    def _write_temp_file(data):
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            temp_file.write(data)
+        return temp_file.name
+
+    def _create_ssl_context(self, cluster):
+        if cluster.get("insecure-skip-tls-verify"):
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        elif cluster.get("certificate-authority-data"):
+            ca_data = base64.b64decode(cluster["certificate-authority-data"]).decode('utf-8')
+            ssl_context = ssl.create_default_context(cadata=ca_data)
+        else:
+            ssl_context = ssl.create_default_context(cafile=cluster.get("certificate-authority"))
+
+        cert_data = self._user.get("client-certificate-data")
+        key_data = self._user.get("client-key-data")
+        if cert_data and key_data:
+            self._load_client_certificate(ssl_context, base64.b64decode(cert_data), base64.b64decode(key_data))
+        elif self._user.get("client-certificate") and self._user.get("client-key"):
+            ssl_context.load_cert_chain(self._user["client-certificate"], self._user["client-key"])
+        return ssl_context
+
+    def _load_client_certificate(self, ssl_context, cert_data, key_data):
+        # the ssl module can only load certificates from files
+        cert_file = self._write_temp_file(cert_data)
+        key_file = self._write_temp_file(key_data)
+        try:
+            ssl_context.load_cert_chain(cert_file, key_file)
+        finally:
+            os.remove(cert_file)
+            os.remove(key_file)
+
+    def _refresh_auth_header(self):
+        if self._user.get("exec"):
+            credential = self._run_exec_credential_plugin(self._user["exec"])
+            if credential.get("token"):
+                self._auth_header = f"Bearer {credential['token']}"
+            elif credential.get("clientCertificateData") and self._ssl_context:
+                self._load_client_certificate(self._ssl_context,
+                                              credential["clientCertificateData"].encode('utf-8'),
+                                              credential["clientKeyData"].encode('utf-8'))
+        elif self._user.get("token"):
+            self._auth_header = f"Bearer {self._user['token']}"
+        elif self._user.get("tokenFile"):
+            with open(self._user["tokenFile"], encoding='utf-8') as token_file:
+                self._auth_header = f"Bearer {token_file.read().strip()}"
+        elif self._user.get("username"):
+            user_pass = f"{self._user['username']}:{self._user.get('password', '')}".encode('utf-8')
+            self._auth_header = f"Basic {base64.b64encode(user_pass).decode('ascii')}"
+
+    @staticmethod
+    def _run_exec_credential_plugin(exec_config):
+        env = dict(os.environ)
+        for env_var in exec_config.get("env") or []:
+            env[env_var["name"]] = env_var["value"]
+        cmd = [exec_config["command"]] + (exec_config.get("args") or [])
+        try:
+            output = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, check=True,
+                                    timeout=TIMEOUT or None).stdout
+        except (OSError, subprocess.SubprocessError) as ex:
+            raise KubernetesApiError(None, f"Failed to run credential plugin {cmd[0]}: {ex}") from ex
+        credential = try_load_json(native_string(output))
+        if not credential:
+            raise KubernetesApiError(None, f"Failed to parse output of credential plugin {cmd[0]}")
+        return credential.get("status", {})
+
+    def _new_connection(self):
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._host, self._port, context=self._ssl_context,
+                                               timeout=TIMEOUT or None)
+        return http.client.HTTPConnection(self._host, self._port, timeout=TIMEOUT or None)
+
+    def _request(self, path, query=None, retries=KUBCTL_GET_YAML_RETRIES, output_file=None):
+        """
+            Send a GET request, and return the response body.
+            When an output file is given, a successful response body is streamed to it in chunks instead.
+            Retries on connection errors and on transient server errors.
+        """
+        url = f"{self._base_path}{path}"
+        if query:
+            url = f"{url}?{urlencode(query)}"
+        headers = {"Accept": "application/json",
+                   "User-Agent": f"redis-enterprise-log-collector/{VERSION_LOG_COLLECTOR}"}
+        error = None
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(get_retry_delay(attempt - 1))
+            if skip_command_after_deadline(f"GET {url}"):
+                error = KubernetesApiError(None, f"Request GET {url} skipped, the deadline passed")
+                break
+            if self._auth_header:
+                headers["Authorization"] = self._auth_header
+            start = time.time()
+            try:
+                status, body = self._send(url, headers, output_file)
+            except (OSError, http.client.HTTPException) as ex:
+                error = KubernetesApiError(None, f"Request GET {url} failed: {ex}")
+                record_command_timing(f"GET {url}", start, -1, 0, attempt)
+                if attempt + 1 == retries or not consume_retry_budget(url):
+                    break
+                continue
+            record_command_timing(f"GET {url}", start, 0 if status < 300 else status,
+                                  output_file.tell() if body is None else len(body), attempt,
+                                  status not in K8S_API_RETRYABLE_STATUSES)
+            if status < 300:
+                return body
+            error = KubernetesApiError(status, f"Request GET {url} failed with status {status}: "
+                                               f"{native_string(body).rstrip()}")
+            if status == 401 and attempt == 0 and self._user.get("exec"):
+                # the credentials might have expired
+                self._refresh_auth_header()
+                continue
+            if attempt + 1 == retries or status not in K8S_API_RETRYABLE_STATUSES or not consume_retry_budget(url):
+                break
+        raise error
+
+    def _send(self, url, headers, output_file=None):
+        """
+            Send a GET request over a pooled connection, returns the response status and body.
+            A successful response body is streamed to the output file if given, and None is returned as the body.
+        """
+        try:
+            connection = self._connections.get_nowait()
+        except queue.Empty:
+            connection = self._new_connection()
+        # limit the request to the deadline
+        connection.timeout = get_command_timeout()
+        if connection.sock:
+            connection.sock.settimeout(connection.timeout)
+        try:
+            logger.info("Sending API request: GET %s", url)
+            connection.request("GET", url, headers=headers)
+            response = connection.getresponse()
+            if output_file is not None and response.status < 300:
+                output_file.seek(0)
+                output_file.truncate()
+                shutil.copyfileobj(response, output_file, OUTPUT_CHUNK_SIZE)
+                body = None
+            else:
+                body = response.read()
+        except (OSError, http.client.HTTPException):
+            # the server might have closed a keep-alive connection
+            connection.close()
+            raise
+        try:
+            self._connections.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+        return response.status, body
+
+    def _get_json(self, path, query=None):
+        return json.loads(native_string(self._request(path, query)))
+
+    def _discover_api_resources(self, retry_failed=False):
+        """
+            Returns a dict mapping lower case kinds, plural names and fully qualified names
+            to the group version, plural name, kind and whether the resource is namespaced.
+            The group versions which failed to be discovered are discovered again when retry_failed is set.
+        """
+        with self._discovery_lock:
+            if self._api_resources is None:
+                group_versions = ["v1"]
+                for group in self._get_json("/apis").get("groups", []):
+                    group_versions.append(group["preferredVersion"]["groupVersion"])
+                self._api_resources = {}
+                self._failed_group_versions = self._discover_group_versions(group_versions)
+            elif retry_failed and self._failed_group_versions:
+                self._failed_group_versions = self._discover_group_versions(self._failed_group_versions)
+            return self._api_resources
+
+    def _discover_group_versions(self, group_versions):
+        """
+            Add the resources of the given group versions to the discovered resources.
+            Returns the group versions which failed to be discovered.
+        """
+        failed_group_versions = []
+        for group_version in group_versions:
+            path = "/api/v1" if group_version == "v1" else f"/apis/{group_version}"
+            try:
+                resource_list = self._get_json(path)
+            except (KubernetesApiError, ValueError) as ex:
+                logger.warning("Failed to discover API resources of %s: %s", group_version, ex)
+                failed_group_versions.append(group_version)
+                continue
+            group = group_version.rpartition("/")[0]
+            for resource in resource_list.get("resources", []):
+                if "/" in resource["name"]:
+                    # sub-resource
+                    continue
+                info = {"group_version": group_version, "plural": resource["name"],
+                        "kind": resource["kind"], "namespaced": resource["namespaced"]}
+                names = [resource["kind"], resource["name"], resource.get("singularName")]
+                names.extend(resource.get("shortNames") or [])
+                if group:
+                    names.append(f"{resource['name']}.{group}")
+                for name in names:
+                    if name:
+                        self._api_resources.setdefault(name.lower(), info)
+        return failed_group_versions
+
+    def _resource_path(self, namespace, resource_type, name=None):
+        info = self._discover_api_resources().get(resource_type.lower())
+        if not info:
+            # the resource might belong to a group version which failed to be discovered
+            info = self._discover_api_resources(retry_failed=True).get(resource_type.lower())
+        if not info:
+            raise KubernetesApiError(None, f"{UNRECOGNIZED_RESOURCE} \"{resource_type.lower()}\"")
+        prefix = "/api/v1" if info["group_version"] == "v1" else f"/apis/{info['group_version']}"
+        path = f"{prefix}/namespaces/{quote(namespace)}" if info["namespaced"] else prefix
+        path = f"{path}/{info['plural']}"
+        if name:
+            path = f"{path}/{quote(name)}"
+        return path, info
+
+    def list_objects(self, namespace, resource_type, label_selector=""):
+        """
+            Returns the list of objects of the given type, None upon failure
+        """
+        try:
+            path, info = self._resource_path(namespace, resource_type)
+            query = {"labelSelector": label_selector} if label_selector else None
+            items = self._get_json(path, query).get("items", [])
+        except (KubernetesApiError, ValueError) as ex:
+            logger.warning("Namespace '%s': Failed to list %s: %s", namespace, resource_type, ex)
+            return None
+        for item in items:
+            # like kubectl, add the type information omitted from list items
+            item.setdefault("apiVersion", info["group_version"])
+            item.setdefault("kind", info["kind"])
+        return items
+
+    def get_object(self, namespace, resource_type, name):
+        """
+            Returns an object by its name, None upon failure
+        """
+        try:
+            path, _ = self._resource_path(namespace, resource_type, name)
+            return self._get_json(path)
+        except (KubernetesApiError, ValueError) as ex:
+            logger.warning("Namespace '%s': Failed to get %s %s: %s", namespace, resource_type, name, ex)
+            return None
+
+    def get_resources_yaml(self, namespace, resource_type, label_selector="", resource_names=None):
+        """
+            Returns the same output as kubectl get <resource_type> -o yaml, None upon failure
+        """
+        missing_resource_template = f"Namespace '{namespace}': Skip collecting information for {resource_type}. " \
+                                    f"Server has no resource of type {resource_type}"
+        try:
+            if resource_names:
+                items = []
+                for name in resource_names:
+                    path, info = self._resource_path(namespace, resource_type, name)
+                    try:
+                        items.append(self._get_json(path))
+                    except KubernetesApiError as ex:
+                        if ex.status != 404:
+                            raise
+                        logger.info("Namespace '%s': %s %s not found", namespace, resource_type, name)
+            else:
+                path, info = self._resource_path(namespace, resource_type)
+                query = {"labelSelector": label_selector} if label_selector else None
+                items = self._get_json(path, query).get("items", [])
+                for item in items:
+                    item.setdefault("apiVersion", info["group_version"])
+                    item.setdefault("kind", info["kind"])
+        except (KubernetesApiError, ValueError) as ex:
+            handle_unsuccessful_cmd(str(ex), failed_to_get_resource_error(namespace, resource_type) + " {}",
+                                    missing_resource_template)
+            return None
+        return dump_yaml({"apiVersion": "v1", "items": items, "kind": "List", "metadata": {"resourceVersion": ""}})
+
+    def save_pod_logs(self, namespace, pod_name, container, output_path, previous=False):
+        """
+            Stream the logs of a container to the given file.
+            Returns an error code, the file holds the error upon failure.
+        """
+        query = {"container": container}
+        if previous:
+            query["previous"] = "true"
+        if LOGS_SINCE:
+            query["sinceSeconds"] = parse_duration(LOGS_SINCE)
+        elif LOGS_SINCE_TIME:
+            query["sinceTime"] = LOGS_SINCE_TIME
+        path = f"/api/v1/namespaces/{quote(namespace)}/pods/{quote(pod_name)}/log"
+        try:
+            with open(output_path, "wb") as output_file:
+                try:
+                    self._request(path, query, output_file=output_file)
+                except KubernetesApiError as ex:
+                    output_file.seek(0)
+                    output_file.truncate()
+                    output_file.write(str(ex).encode('UTF-8'))
+                    return 1
+        except OSError as ex:
+            logger.warning("Failed writing output to path %s. Exception: %s", output_path, str(ex))
+            return 1
+        return 0
+
+
+# The native API client of the current process
+_K8S_API_CLIENT = None
+_K8S_API_CLIENT_LOCK = threading.Lock()
+
+
+def get_k8s_api_client(k8s_cli):
+    """
+    Returns the native API client of the current process, creating it on first use
+    """
+    # pylint: disable=global-statement
+    global _K8S_API_CLIENT
+    with _K8S_API_CLIENT_LOCK:
+        # connections can't be shared with forked processes
+        if _K8S_API_CLIENT is None or _K8S_API_CLIENT.pid != os.getpid():
+            _K8S_API_CLIENT = KubernetesApiClient.from_k8s_cli(k8s_cli)
+        return _K8S_API_CLIENT
+
+
 if __name__ == "__main__":
     # pylint: disable=locally-disabled, invalid-name
     parser = argparse.ArgumentParser(description='Redis Enterprise Log Collector for Kubernetes\n\n'
@@ -1457,14 +4576,93 @@ if __name__ == "__main__":
     parser.add_argument('-a', '--logs_from_all_pods', action="store_true",
                         help="Collect logs from all pods in the selected namespace(s),\n"
                              "and otherwise collect only from the operator and pods run by the operator.")
+    since_group = parser.add_mutually_exclusive_group()
+    since_group.add_argument('--since', action="store", type=check_duration,
+                             help="Only collect pod logs newer than a relative duration like 30m or 1h30m,\n"
+                                  "and RS log files modified within it (RS log files are selected on the pod).")
+    since_group.add_argument('--since_time', action="store", type=check_rfc3339_time,
+                             help="Only collect pod logs after a specific RFC3339 time, e.g. 2024-01-01T10:00:00Z,\n"
+                                  "and RS log files modified after it (RS log files are selected on the pod).")
     parser.add_argument('-t', '--timeout', action="store",
                         type=check_not_negative, default=TIMEOUT,
-                        help="Time to wait for external commands to finish execution (Linux only).\n"
+                        help="Time to wait for external commands to finish execution.\n"
                              "Default to 180s. Specify 0 to disable timeout.")
+    parser.add_argument('--deadline', action="store", type=check_not_negative,
+                        help="Seconds the collection should take at most, e.g. 300 during an incident.\n"
+                             "The phases of each namespace run by priority (resources and logs first), and each\n"
+                             "phase may use the time left but for a reserve kept for the phases after it. Commands\n"
+                             "are cut short at the deadline of their phase, phases left at the deadline are skipped,\n"
+                             "and whatever was collected is archived.\n"
+                             "Incomplete phases are listed in collection_report.json. Defaults to no deadline.")
+    parser.add_argument('--command_timeouts', action="store", type=check_command_timeouts,
+                        help="Timeouts of specific command classes, overriding --timeout for them,\n"
+                             "as comma-separated class=seconds pairs, e.g. debug_info=900,copy=1200.\n"
+                             "0 disables the timeout of a class.\n"
+                             f"Classes: {', '.join(COMMAND_CLASSES)}. Defaults to --timeout, raised to " +
+                             ",".join(f"{key}={value}" for key, value in DEFAULT_COMMAND_TIMEOUTS.items()) +
+                             "\nwhen shorter (unless --timeout is 0).")
+    parser.add_argument('--retry_budget', action="store",
+                        type=check_not_negative,
+                        help="Maximal number of retries of failed k8s CLI commands and API requests in the whole run.\n"
+                             "Retries back off exponentially, and definitive failures (e.g. NotFound, Forbidden)\n"
+                             "are not retried. Defaults to no limit, each command being retried up to its own\n"
+                             "number of attempts. Specify 0 to disable retries.")
+    parser.add_argument('--rs_logs_transfer', action="store", type=str,
+                        choices=[RS_LOGS_TRANSFER_CP, RS_LOGS_TRANSFER_STREAM, RS_LOGS_TRANSFER_STREAM_STORE],
+                        default=RS_LOGS_TRANSFER_CP,
+                        help="How to transfer the logs and the config of Redis Enterprise pods:\n"
+                             "'cp' runs kubectl cp for the logs and for the config of each pod.\n"
+                             "'stream' runs a single kubectl exec per pod, streaming a compressed tar of both,\n"
+                             "which is extracted as it's received. Fewer round-trips, and several times less\n"
+                             "data through the API server.\n"
+                             "'stream_store' streams the same tar, and stores it as is (rs_pod_logs/<pod>.tar.gz).\n"
+                             "The streams fall back to cp on failure (e.g. no tar in the container).\n"
+                             "Defaults to 'cp'.")
+    parser.add_argument('--rs_log_include', action="store", type=check_globs,
+                        help="Only collect the RS log files matching one of the comma-separated globs,\n"
+                             "e.g. \"*.log,supervisord*\". Globs with a '/' match the path within the log folder,\n"
+                             "and the rest match the file name. Defaults to all the files.")
+    parser.add_argument('--rs_log_exclude', action="store", type=check_globs,
+                        help="Skip the RS log files matching one of the comma-separated globs, e.g. \"*.gz,*.zip\".")
+    parser.add_argument('--rs_log_max_file_size', action="store", type=check_size,
+                        help="Skip RS log files larger than the given size, e.g. 100M. Defaults to no limit.\n"
+                             "RS log files are selected on the pod, and the skipped files are listed along with\n"
+                             f"their sizes in {RS_LOG_SKIPPED_FILES_NAME} of the pod.")
+    parser.add_argument('--hedge_delay', action="store",
+                        type=check_not_negative, default=HEDGE_DELAY,
+                        help="When the support package isn't downloaded from a ready RS pod within the given\n"
+                             "seconds, create it on a second ready RS pod as well. The first package downloaded\n"
+                             "is kept, and the other is cancelled and removed from its pod.\n"
+                             "Defaults to 0, which disables hedging.")
+    parser.add_argument('--trace', action="store_true",
+                        help=f"Add a {TRACE_FILE_NAME} file to the bundle, with the timings of the collection phases\n"
+                             "and commands in the Chrome trace format (viewable in Perfetto or chrome://tracing).\n"
+                             "The timings are always included in collection_report.json.")
+    parser.add_argument('--profile', action="store_true",
+                        help=f"Add a cProfile of each collector process to the {PROFILES_DIR} directory of the bundle.")
+    parser.add_argument('--workers', action="store",
+                        type=check_positive, default=WORKERS,
+                        help="Maximal number of namespaces to collect from concurrently.\n"
+                             f"Defaults to {WORKERS}.")
+    parser.add_argument('--parallelism', action="store",
+                        type=check_positive, default=PARALLELISM,
+                        help="Maximal number of k8s CLI commands to run concurrently in each namespace,\n"
+                             "e.g. resource gets and copies of Redis Enterprise pod logs.\n"
+                             f"Defaults to {PARALLELISM}. Specify 1 to run commands one at a time.")
+    parser.add_argument('--batch_get', action="store_true",
+                        help="Fetch resources of several kinds with a single k8s CLI command,\n"
+                             "instead of one command per kind.")
     parser.add_argument('--k8s_cli', action="store", type=str,
                         help="The K8s cli client to use (kubectl/oc/auto-detect).\n"
                              "Defaults to auto-detect (chooses between 'kubectl' and 'oc').\n"
                              "Full paths can also be used.")
+    parser.add_argument('--k8s_backend', action="store", type=str,
+                        choices=[K8S_BACKEND_CLI, K8S_BACKEND_NATIVE], default=K8S_BACKEND_CLI,
+                        help="How to get resources and logs from the cluster (cli/native).\n"
+                             "'cli' runs the k8s cli for each request.\n"
+                             "'native' reads the kubeconfig once (using the k8s cli) and sends requests\n"
+                             "directly to the API server over pooled connections.\n"
+                             "exec, cp and describe always use the k8s cli. Defaults to 'cli'.")
     parser.add_argument('-m', '--mode', action="store", type=str,
                         choices=[MODE_RESTRICTED, MODE_ALL],
                         help="Controls which resources are collected:\n"
@@ -1472,6 +4670,51 @@ if __name__ == "__main__":
                              "and have the label 'app=redis-enterprise' are collected.\n"
                              "In 'all' mode, all resources are collected.\n"
                              "Defaults to 'restricted' mode.")
+    parser.add_argument('--stream_archive', action="store_true",
+                        help="Add collected files to the compressed archive as soon as they are collected,\n"
+                             "instead of writing the whole collection to the output directory first.\n"
+                             "Reduces the peak disk usage to about the size of the archive.")
+    parser.add_argument('--compression', action="store", type=str,
+                        choices=[COMPRESSION_GZIP, COMPRESSION_PARALLEL_GZIP, COMPRESSION_ZSTD],
+                        default=COMPRESSION_GZIP,
+                        help="Compression of the output archive:\n"
+                             "'gzip' compresses on a single core.\n"
+                             "'pgzip' compresses on all cores into a multi-member gzip (extractable by tar).\n"
+                             "'zstd' compresses on all cores into a .tar.zst archive "
+                             "(requires the 'zstandard' python package).\n"
+                             "Defaults to 'gzip'.")
+    parser.add_argument('--compression_level', action="store", type=check_positive,
+                        help="Compression level, 1-9 for gzip/pgzip (defaults to 9), "
+                             "1-22 for zstd (defaults to 3).")
+    parser.add_argument('--max_bundle_size', action="store", type=check_bundle_size,
+                        help="Limit the size of the compressed bundle, e.g. 500M. Files are archived by priority:\n"
+                             "operator logs, resources (including REC/REDB) and the support package first,\n"
+                             "then logs of unhealthy pods, then descriptions, and logs of healthy pods last.\n"
+                             "Files which don't fit are truncated to their tail (logs) or skipped, and are listed\n"
+                             "in collection_report.json. With --stream_archive, all the files but the first\n"
+                             "priority ones are kept on disk until the collection ends. Defaults to no limit.")
+    parser.add_argument('--since_bundle', action="store", type=str,
+                        help="Path of a previous bundle (archive or extracted directory) to collect\n"
+                             "incrementally from.\n"
+                             "Objects whose uid and resourceVersion are unchanged since that bundle are not stored\n"
+                             "again, and are recorded in the namespace manifest.json as references instead, their\n"
+                             "index.jsonl records pointing at the bundle storing them. All the objects are still\n"
+                             "fetched, and descriptions and logs are collected in full.")
+    parser.add_argument('--resume', action="store", type=str,
+                        help="Resume an interrupted collection, given its output directory, e.g.\n"
+                             "./redis_enterprise_k8s_debug_info_20240101-101010. The phases of each namespace and\n"
+                             "the collection from each pod completed by the interrupted run are skipped, and only\n"
+                             "the rest is collected before archiving. Pass the same arguments as the interrupted run.\n"
+                             "Can't be used with --stream_archive, which doesn't keep the collection on disk.")
+    parser.add_argument('--watch', action="store_true",
+                        help="Run as a flight recorder until stopped: watch the events ('all' mode only) and the\n"
+                             "REC/REDB custom resources, and follow the logs of the operator and the RS pods, into\n"
+                             "a ring buffer on disk. A bundle including the recording (flight_recorder/) is\n"
+                             "collected when the process gets SIGUSR1, and when it's stopped (SIGINT/SIGTERM).\n"
+                             "Requires the watch permission on events and on the app.redislabs.com resources,\n"
+                             "granted by log_collector_role_watch.yaml along with the role of the mode.")
+    parser.add_argument('--watch_buffer_size', action="store", type=check_size, default=WATCH_BUFFER_SIZE,
+                        help=f"Size of the flight recorder ring buffer, e.g. 1G. Defaults to {WATCH_BUFFER_SIZE}.")
     parser.add_argument('--collect_istio', action="store_true",
                         help="Collect data from istio-system namespace to debug potential\n"
                              "problems related to istio ingress method.")
@@ -1487,4 +4730,13 @@ if __name__ == "__main__":
                         help='Temporary development flag. '
                              'Collect all role based access control related custom resources.')
     parser.set_defaults(collect_istio=False, collect_rbac_resources=False)
-    run(parser.parse_args())
+    parsed_results = parser.parse_args()
+    if parsed_results.resume:
+        if parsed_results.stream_archive or parsed_results.watch:
+            parser.error("--resume can't be used with --stream_archive or --watch")
+        if not os.path.isfile(os.path.join(parsed_results.resume, LOGGER_OUTPUT_FILE)):
+            parser.error(f"{parsed_results.resume} is not the output directory of an interrupted collection")
+    if parsed_results.watch:
+        run_flight_recorder(parsed_results)
+    else:
+        run(parsed_results)
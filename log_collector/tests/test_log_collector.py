@@ -0,0 +1,1219 @@
+""" Tests of the log collector parsers, and of the native API client against a stub API server.
+Run from the log_collector directory with: python -m unittest discover tests
+"""
+import argparse
+import base64
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import shlex
+import shutil
+import stat
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import types
+import unittest
+import zlib
+from unittest import mock
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "benchmark"))
+
+# pylint: disable=wrong-import-position
+import log_collector  # noqa: E402
+from fake_k8s_api import FakeKubernetesApiServer  # noqa: E402
+from run_benchmark import create_k8s_cli  # noqa: E402
+from scenarios import DEFAULT_SCENARIO  # noqa: E402
+
+# prints the token in the file given by the environment of the exec plugin, as an ExecCredential
+EXEC_PLUGIN_SCRIPT = "import json, os; print(json.dumps({'kind': 'ExecCredential', 'apiVersion': " \
+                     "'client.authentication.k8s.io/v1', 'status': {'token': open(os.environ['TOKEN_FILE']).read()}}))"
+
+
+def put_archive_entry(archive_queue, retry_budget):
+    # runs in a worker process
+    with retry_budget.get_lock():
+        retry_budget.value -= 1
+    archive_queue.put(("bundle/worker.log", None, b"from the worker"))
+
+
+class DumpYamlTest(unittest.TestCase):
+
+    def test_block_style(self):
+        data = {"b": [1, {"x": "value", "y": []}, [2, 3]], "a": {"k": None, "t": True, "e": {}}}
+        self.assertEqual(log_collector.dump_yaml(data),
+                         "a:\n  e: {}\n  k: null\n  t: true\n"
+                         "b:\n- 1\n- x: value\n  \"y\": []\n- - 2\n  - 3\n")
+
+    def test_quoted_scalars(self):
+        # yaml 1.1 reads n and no as booleans
+        self.assertEqual(log_collector.dump_yaml({"n": "12", "s": "a: b", "r": "no", "p": "redis-0.svc"}),
+                         "\"n\": \"12\"\np: redis-0.svc\nr: \"no\"\ns: \"a: b\"\n")
+
+    def test_empty(self):
+        self.assertEqual(log_collector.dump_yaml({}), "{}\n")
+        self.assertEqual(log_collector.dump_yaml([]), "[]\n")
+
+    def test_list_items_split(self):
+        items = [{"kind": "Pod", "metadata": {"name": "rec-0"}}, {"kind": "Pod", "metadata": {"name": "rec-1"}}]
+        out = log_collector.dump_yaml({"apiVersion": "v1", "items": items, "kind": "List"})
+        self.assertEqual(log_collector.split_yaml_list_items(out),
+                         ["- kind: Pod\n  metadata:\n    name: rec-0\n", "- kind: Pod\n  metadata:\n    name: rec-1\n"])
+
+
+class SplitYamlListItemsTest(unittest.TestCase):
+
+    def test_items(self):
+        out = "apiVersion: v1\nitems:\n- a: 1\n  b:\n  - 2\n- a: 3\nkind: List\nmetadata:\n  resourceVersion: \"\"\n"
+        self.assertEqual(log_collector.split_yaml_list_items(out), ["- a: 1\n  b:\n  - 2\n", "- a: 3\n"])
+
+    def test_no_items(self):
+        self.assertEqual(log_collector.split_yaml_list_items("apiVersion: v1\nitems: []\nkind: List\n"), [])
+
+    def test_unexpected_output(self):
+        self.assertIsNone(log_collector.split_yaml_list_items("error: the server doesn't have a resource type"))
+        self.assertIsNone(log_collector.split_yaml_list_items("apiVersion: v1\nitems:\n- a: 1\n"))
+
+
+class PodMatchesSelectorTest(unittest.TestCase):
+    POD = {"metadata": {"labels": {"app": "redis-enterprise", "redis.io/role": "node"}}}
+
+    def test_equality(self):
+        self.assertTrue(log_collector.pod_matches_selector(self.POD, "app=redis-enterprise"))
+        self.assertTrue(log_collector.pod_matches_selector(self.POD, "app==redis-enterprise, redis.io/role=node"))
+        self.assertFalse(log_collector.pod_matches_selector(self.POD, "app=redis-enterprise,redis.io/role=bootstrap"))
+
+    def test_inequality(self):
+        self.assertTrue(log_collector.pod_matches_selector(self.POD, "app!=other"))
+        self.assertFalse(log_collector.pod_matches_selector(self.POD, "app!=redis-enterprise"))
+
+    def test_existence(self):
+        self.assertTrue(log_collector.pod_matches_selector(self.POD, "redis.io/role"))
+        self.assertFalse(log_collector.pod_matches_selector(self.POD, "!redis.io/role"))
+        self.assertFalse(log_collector.pod_matches_selector(self.POD, "name"))
+        self.assertTrue(log_collector.pod_matches_selector(self.POD, "!name"))
+
+    def test_no_labels(self):
+        self.assertTrue(log_collector.pod_matches_selector({"metadata": {}}, ""))
+        self.assertFalse(log_collector.pod_matches_selector({"metadata": {"labels": None}}, "app=x"))
+
+
+class DiscoverApiResourcesTest(unittest.TestCase):
+
+    def discover(self, return_code, out):
+        with mock.patch.object(log_collector, "run_shell_command", return_value=(return_code, out)):
+            return log_collector.discover_api_resources("kubectl")
+
+    def test_api_version_column(self):
+        served = self.discover(0, "NAME                      SHORTNAMES   APIVERSION             NAMESPACED   KIND\n"
+                                  "pods                      po           v1                     true         Pod\n"
+                                  "redisenterpriseclusters   rec          app.redislabs.com/v1   true         "
+                                  "RedisEnterpriseCluster\n"
+                                  "nodes                     no           v1                     false        Node\n")
+        self.assertEqual(served["pod"], {"kind": "Pod", "namespaced": True})
+        self.assertEqual(served["po"], served["pods"])
+        self.assertEqual(served["node"], {"kind": "Node", "namespaced": False})
+        self.assertEqual(served["redisenterpriseclusters.app.redislabs.com"],
+                         {"kind": "RedisEnterpriseCluster", "namespaced": True})
+        self.assertIn("rec", served)
+
+    def test_api_group_column(self):
+        served = self.discover(0, "NAME          SHORTNAMES   APIGROUP   NAMESPACED   KIND\n"
+                                  "deployments   deploy       apps       true         Deployment\n")
+        self.assertEqual(served["deployments.apps"], {"kind": "Deployment", "namespaced": True})
+        self.assertIn("deploy", served)
+
+    def test_partial_discovery(self):
+        served = self.discover(1, "NAME   SHORTNAMES   APIVERSION   NAMESPACED   KIND\n"
+                                  "pods   po           v1           true         Pod\n")
+        self.assertIn("pod", served)
+
+    def test_failure(self):
+        self.assertIsNone(self.discover(1, "error: You must be logged in to the server (Unauthorized)"))
+        self.assertIsNone(self.discover(0, ""))
+
+
+class ParseOptionsTest(unittest.TestCase):
+
+    def test_parse_duration(self):
+        self.assertEqual(log_collector.parse_duration("1h30m"), 5400)
+        self.assertEqual(log_collector.parse_duration("90s"), 90)
+        self.assertEqual(log_collector.parse_duration("2h"), 7200)
+        for value in ["", "1d", "m30", "30"]:
+            with self.assertRaises(ValueError):
+                log_collector.parse_duration(value)
+
+    def test_check_size(self):
+        self.assertEqual(log_collector.check_size("1048576"), 1048576)
+        self.assertEqual(log_collector.check_size("512K"), 512 * 1024)
+        self.assertEqual(log_collector.check_size("100m"), 100 * 1024 ** 2)
+        self.assertEqual(log_collector.check_size("2G"), 2 * 1024 ** 3)
+        for value in ["", "1.5G", "10T", "-1"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                log_collector.check_size(value)
+
+
+class RetryBudgetTest(unittest.TestCase):
+
+    def test_unlimited(self):
+        with mock.patch.object(log_collector, "RETRY_BUDGET", None):
+            self.assertTrue(all(log_collector.consume_retry_budget("cmd") for _ in range(1000)))
+
+    def test_budget(self):
+        budget = multiprocessing.Value("i", 2)
+        with mock.patch.object(log_collector, "RETRY_BUDGET", budget):
+            self.assertEqual([log_collector.consume_retry_budget("cmd") for _ in range(3)], [True, True, False])
+        self.assertEqual(budget.value, 0)
+
+    def test_exhausted_budget_stops_retries(self):
+        with mock.patch.object(log_collector, "RETRY_BUDGET", multiprocessing.Value("i", 1)), \
+                mock.patch.object(log_collector, "RETRY_BACKOFF_BASE", 0), \
+                mock.patch.object(log_collector, "run_shell_command", return_value=(1, "error: i/o timeout")) as run:
+            self.assertIsNone(log_collector.run_shell_command_with_retries("kubectl get pods", 3, "failed: {}"))
+        self.assertEqual(run.call_count, 2)
+
+    def test_definitive_failure_is_not_retried(self):
+        with mock.patch.object(log_collector, "RETRY_BUDGET", None), \
+                mock.patch.object(log_collector, "run_shell_command",
+                                  return_value=(1, "Error from server (Forbidden): pods is forbidden")) as run:
+            log_collector.run_shell_command_with_retries("kubectl get pods", 3, "failed: {}")
+        self.assertEqual(run.call_count, 1)
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def setUp(self):
+        log_collector.pop_timings()
+        self.addCleanup(log_collector.pop_timings)
+        self.deadlines = {}
+
+    def patch_deadline(self, time_left, **reserves):
+        patcher = mock.patch.multiple(log_collector, DEADLINE=time.time() + time_left,
+                                      DEADLINE_PHASE_RESERVES=reserves, DEADLINE_DEFAULT_PHASE_RESERVE=0.1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def phase(self, name, collect=None):
+        def run_phase():
+            self.deadlines[name] = log_collector.get_current_deadline()
+            if collect:
+                collect()
+        return name, run_phase
+
+    def phase_records(self):
+        return {timing["phase"]: timing for timing in log_collector.pop_timings() if timing["type"] == "phase"}
+
+    def test_phase_reserves(self):
+        self.patch_deadline(100, a=0.2, b=0.3)
+        log_collector.run_phases("ns-0", [self.phase("other"), self.phase("b"), self.phase("a")])
+        # the phases run by priority, each leaving the reserves of the phases after it
+        self.assertEqual(list(self.deadlines), ["a", "b", "other"])
+        self.assertAlmostEqual(self.deadlines["a"], log_collector.DEADLINE - 100 * (0.3 + 0.1), delta=1)
+        self.assertAlmostEqual(self.deadlines["b"], log_collector.DEADLINE - 100 * 0.1, delta=1)
+        self.assertEqual(self.deadlines["other"], log_collector.DEADLINE)
+        self.assertEqual(log_collector.get_current_deadline(), log_collector.DEADLINE)
+
+    def test_commands_are_cut_short_at_the_phase_deadline(self):
+        self.patch_deadline(3, a=0, b=0.5)
+        results = {}
+
+        def run_commands():
+            results["sleep"] = log_collector.run_shell_command("sleep 10")
+            results["echo"] = log_collector.run_shell_command("echo skipped")
+
+        start = time.time()
+        log_collector.run_phases("ns-0", [self.phase("a", run_commands), self.phase("b")])
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(results["sleep"], (-9, "cmd: sleep 10 timed out"))
+        self.assertEqual(results["echo"], (-9, "cmd: echo skipped skipped, the deadline passed"))
+        # the later phase still runs, with the time kept for it
+        self.assertEqual(self.deadlines["b"], log_collector.DEADLINE)
+        records = self.phase_records()
+        self.assertTrue(records["a"]["incomplete"])
+        self.assertNotIn("incomplete", records["b"])
+
+    def test_phases_left_at_the_deadline_are_skipped(self):
+        self.patch_deadline(100, a=0.1, b=0.1)
+
+        def pass_deadline():
+            log_collector.DEADLINE = time.time()
+
+        with mock.patch.object(log_collector.logger, "warning") as log_warning:
+            log_collector.run_phases("ns-0", [self.phase("a", pass_deadline), self.phase("b"), self.phase("c")])
+        self.assertEqual(list(self.deadlines), ["a"])
+        log_warning.assert_called_once_with("Namespace '%s': The deadline passed, skipping phases: %s", "ns-0",
+                                            "b, c")
+        records = self.phase_records()
+        self.assertNotIn("incomplete", records["a"])
+        self.assertTrue(records["b"]["incomplete"] and records["c"]["incomplete"])
+
+    def test_command_timeout(self):
+        with mock.patch.multiple(log_collector, DEADLINE=None, _PHASE_DEADLINE=None):
+            self.assertFalse(log_collector.is_past_deadline())
+            self.assertEqual(log_collector.get_command_timeout(), log_collector.TIMEOUT)
+        with mock.patch.multiple(log_collector, DEADLINE=time.time() + 100, _PHASE_DEADLINE=time.time() + 10):
+            self.assertAlmostEqual(log_collector.get_command_timeout(), 10, delta=1)
+        # at least a second, so a command started right before the deadline may still complete
+        with mock.patch.multiple(log_collector, DEADLINE=time.time() + 0.1, _PHASE_DEADLINE=None):
+            self.assertEqual(log_collector.get_command_timeout(), 1)
+
+
+class KubernetesApiClientTest(unittest.TestCase):
+
+    def setUp(self):
+        scenario = dict(DEFAULT_SCENARIO, latency=0, container_log_bytes=100000, objects_per_kind=2)
+        self.server = FakeKubernetesApiServer(scenario, token="token-1").start()
+        self.temp_dir = tempfile.mkdtemp()
+        # don't wait between retries
+        patcher = mock.patch.object(log_collector, "RETRY_BACKOFF_BASE", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def create_client(self, user=None):
+        return log_collector.KubernetesApiClient({
+            "current-context": "test",
+            "contexts": [{"name": "test", "context": {"cluster": "test", "user": "test"}}],
+            "clusters": [{"name": "test", "cluster": {"server": self.server.url}}],
+            "users": [{"name": "test", "user": user or {"token": "token-1"}}]})
+
+    def requests_to(self, path):
+        return [code for request_path, code in self.server.requests if request_path == path]
+
+    def test_list(self):
+        pods = self.create_client().list_objects("ns-0", "Pod", "app=redis-enterprise")
+        self.assertEqual([pod["metadata"]["name"] for pod in pods], ["rec-0", "rec-1", "rec-2"])
+        # the type information is added to the list items
+        self.assertEqual((pods[0]["apiVersion"], pods[0]["kind"]), ("v1", "Pod"))
+
+    def test_list_custom_resources(self):
+        out = self.create_client().get_resources_yaml("ns-0", "RedisEnterpriseCluster")
+        items = log_collector.split_yaml_list_items(out)
+        self.assertEqual(len(items), 2)
+        self.assertTrue(items[0].startswith("- apiVersion: app.redislabs.com/v1\n  kind: RedisEnterpriseCluster\n"))
+
+    def test_get(self):
+        client = self.create_client()
+        self.assertEqual(client.get_object("ns-0", "pods", "rec-1")["metadata"]["name"], "rec-1")
+        self.assertIsNone(client.get_object("ns-0", "pods", "rec-9"))
+        self.assertEqual(self.requests_to("/api/v1/namespaces/ns-0/pods/rec-9"), [404])
+        self.assertIsNone(client.get_object("ns-0", "nosuchkind", "x"))
+
+    def test_get_resources_by_name(self):
+        out = self.create_client().get_resources_yaml("ns-0", "Pod", resource_names=["rec-0", "rec-9"])
+        self.assertEqual(len(log_collector.split_yaml_list_items(out)), 1)
+
+    def test_logs(self):
+        client = self.create_client()
+        output_path = os.path.join(self.temp_dir, "rec-0.log")
+        self.assertEqual(client.save_pod_logs("ns-0", "rec-0", "redis-enterprise-node", output_path), 0)
+        self.assertEqual(os.path.getsize(output_path), 100000)
+        # the container never restarted
+        self.assertEqual(client.save_pod_logs("ns-0", "rec-0", "redis-enterprise-node", output_path, True), 1)
+        with open(output_path, encoding='utf-8') as output_file:
+            self.assertIn("previous terminated container", output_file.read())
+
+    def test_unauthorized_refreshes_exec_credential(self):
+        token_file = os.path.join(self.temp_dir, "token")
+        with open(token_file, "w", encoding='utf-8') as token:
+            token.write("token-1")
+        client = self.create_client({"exec": {"command": sys.executable, "args": ["-c", EXEC_PLUGIN_SCRIPT],
+                                              "env": [{"name": "TOKEN_FILE", "value": token_file}]}})
+        self.assertIsNotNone(client.list_objects("ns-0", "Pod"))
+
+        # the token expired, the plugin provides a new one
+        self.server.token = "token-2"
+        with open(token_file, "w", encoding='utf-8') as token:
+            token.write("token-2")
+        self.assertIsNotNone(client.list_objects("ns-0", "Pod"))
+        self.assertEqual(self.requests_to("/api/v1/namespaces/ns-0/pods"), [200, 401, 200])
+
+    def test_unauthorized_without_exec_credential(self):
+        self.server.token = "token-2"
+        self.assertIsNone(self.create_client().list_objects("ns-0", "Pod"))
+        # not retried
+        self.assertEqual(self.requests_to("/api"), [])
+        self.assertEqual(self.requests_to("/apis"), [401])
+
+    def test_server_errors_are_retried(self):
+        client = self.create_client()
+        self.server.inject_faults("/api/v1/namespaces/ns-0/pods", 503, 2)
+        self.assertEqual(len(client.list_objects("ns-0", "Pod")), 4)
+        self.assertEqual(self.requests_to("/api/v1/namespaces/ns-0/pods"), [503, 503, 200])
+
+        self.server.inject_faults("/api/v1/namespaces/ns-0/pods", 500, log_collector.KUBCTL_GET_YAML_RETRIES)
+        self.assertIsNone(client.list_objects("ns-0", "Pod"))
+        self.assertEqual(self.requests_to("/api/v1/namespaces/ns-0/pods"), [503, 503, 200, 500, 500, 500])
+
+    def test_discovery_failure(self):
+        client = self.create_client()
+        self.server.inject_faults("/apis", 500, log_collector.KUBCTL_GET_YAML_RETRIES)
+        self.assertIsNone(client.list_objects("ns-0", "Pod"))
+        # a failed discovery isn't cached
+        self.assertIsNotNone(client.list_objects("ns-0", "Pod"))
+
+    def test_partial_discovery_failure(self):
+        client = self.create_client()
+        self.server.inject_faults("/apis/app.redislabs.com/v1", 500, log_collector.KUBCTL_GET_YAML_RETRIES)
+        self.assertIsNotNone(client.list_objects("ns-0", "Pod"))
+        # the failed group is discovered again once one of its resources is looked up
+        self.assertIsNotNone(client.get_resources_yaml("ns-0", "RedisEnterpriseCluster"))
+        self.assertEqual(self.requests_to("/apis/app.redislabs.com/v1"), [500, 500, 500, 200])
+        self.assertEqual(self.requests_to("/apis"), [200])
+
+    def test_persistent_partial_discovery_failure(self):
+        client = self.create_client()
+        self.server.inject_faults("/apis/app.redislabs.com/v1", 500, 2 * log_collector.KUBCTL_GET_YAML_RETRIES)
+        self.assertIsNotNone(client.list_objects("ns-0", "Pod"))
+        with mock.patch.object(log_collector.logger, "info") as log_info:
+            self.assertIsNone(client.get_resources_yaml("ns-0", "RedisEnterpriseCluster"))
+        self.assertIn("Server has no resource of type RedisEnterpriseCluster", log_info.call_args[0][0])
+        # and again on the next lookup
+        self.assertIsNotNone(client.get_resources_yaml("ns-0", "RedisEnterpriseDatabase"))
+
+
+class FakeK8sCliTestCase(unittest.TestCase):
+    """
+        Runs the collector functions against the simulated kubectl of the benchmark, writing to a temporary directory
+    """
+    scenario = {}
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        scenario = dict(DEFAULT_SCENARIO, latency=0, container_log_bytes=1000, rs_log_bytes=10000, rs_log_files=2,
+                        debug_info_seconds=0, debug_info_bytes=1000, **self.scenario)
+        scenario_path = os.path.join(self.temp_dir, "scenario.json")
+        with open(scenario_path, "w", encoding='utf-8') as scenario_file:
+            json.dump(scenario, scenario_file)
+        self.calls_path = os.path.join(self.temp_dir, "calls.jsonl")
+        open(self.calls_path, "w", encoding='utf-8').close()  # pylint: disable=R1732
+        self.patch_env(LOG_COLLECTOR_BENCH_SCENARIO=scenario_path, LOG_COLLECTOR_BENCH_CALLS=self.calls_path)
+        bin_dir = os.path.join(self.temp_dir, "bin")
+        os.makedirs(bin_dir)
+        self.k8s_cli = create_k8s_cli(bin_dir, scenario)
+        self.output_dir = os.path.join(self.temp_dir, "output")
+        os.makedirs(self.output_dir)
+        # don't wait between retries
+        self.patch_globals(RETRY_BACKOFF_BASE=0, ARCHIVE_OUTPUT_DIR=self.output_dir)
+
+    def patch_env(self, **values):
+        patcher = mock.patch.dict(os.environ, values)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def patch_globals(self, **values):
+        for name, value in values.items():
+            patcher = mock.patch.object(log_collector, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_failing_cli(self, name, pattern, message):
+        # fails the invocations whose arguments match the shell pattern, and runs the simulated kubectl otherwise
+        path = os.path.join(self.temp_dir, "bin", name)
+        with open(path, "w", encoding='utf-8') as script:
+            script.write(f"#!/bin/sh\ncase \"$*\" in {pattern}) echo {shlex.quote(message)} >&2; exit 1;; esac\n"
+                         f"exec {shlex.quote(self.k8s_cli)} \"$@\"\n")
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return path
+
+    def calls(self):
+        with open(self.calls_path, encoding='utf-8') as calls_file:
+            return [json.loads(line)["args"] for line in calls_file]
+
+    def read_output(self, *path):
+        with open(os.path.join(self.output_dir, *path), encoding='utf-8') as output_file:
+            return output_file.read()
+
+
+class CollectApiResourcesTest(FakeK8sCliTestCase):
+
+    def test_files_per_kind(self):
+        self.patch_globals(PARALLELISM=4)
+        log_collector.collect_api_resources("ns-0", self.output_dir, self.k8s_cli,
+                                            ["Service", "ConfigMap", "StatefulSet", "Pod"], "-l app=redis-enterprise")
+        pod_names = ["rec-0", "rec-1", "rec-2", "redis-enterprise-operator-0"]
+        for kind, names in (("Service", ["service-0", "service-1"]), ("Pod", pod_names)):
+            out = self.read_output(f"{kind}.yaml")
+            self.assertEqual(log_collector.get_yaml_item_kind(log_collector.split_yaml_list_items(out)[0]), kind)
+            self.assertEqual([record["name"] for record in log_collector.get_index_records(kind, "", out)], names)
+        self.assertEqual(len(self.calls()), 4)
+
+    def test_unserved_kind(self):
+        with mock.patch.object(log_collector.logger, "info") as log_info:
+            log_collector.collect_api_resources("ns-0", self.output_dir, self.k8s_cli, ["Service", "Unknown"])
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "Service.yaml")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "Unknown.yaml")))
+        self.assertTrue(any("Server has no resource of type Unknown" in call[0][0] for call in log_info.call_args_list))
+
+    def test_descriptions(self):
+        log_collector.collect_api_resources_description("ns-0", self.output_dir, self.k8s_cli,
+                                                        ["Service", "ConfigMap", "Pod"], "-l app=redis-enterprise")
+        self.assertIn("Kind:         Service", self.read_output("Service.txt"))
+        self.assertNotIn("Kind:         Service", self.read_output("ConfigMap.txt"))
+        self.assertEqual(self.read_output("Pod.txt").count("Name:"), 4)
+
+
+class BatchedGetTest(FakeK8sCliTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.patch_globals(BATCH_GET=True)
+
+    def collected_names(self):
+        names = {}
+        for file_name in os.listdir(self.output_dir):
+            if file_name.endswith(".yaml"):
+                kind = file_name[:-len(".yaml")]
+                names[kind] = [(record["kind"], record["name"])
+                               for record in log_collector.get_index_records(kind, "", self.read_output(file_name))]
+        return names
+
+    def test_single_call_per_selector(self):
+        log_collector.collect_api_resources("ns-0", self.output_dir, self.k8s_cli,
+                                            ["Service", "ConfigMap", "Namespace", "RedisEnterpriseCluster",
+                                             "NetworkPolicy"], "-l app=redis-enterprise")
+        gets = sorted(call[call.index("get") + 3] for call in self.calls())
+        self.assertEqual(gets, ["Namespace", "RedisEnterpriseCluster,NetworkPolicy", "Service,ConfigMap"])
+        # the combined lists are split by kind
+        names = self.collected_names()
+        self.assertEqual(names["Service"], [("Service", "service-0"), ("Service", "service-1")])
+        self.assertEqual(names["RedisEnterpriseCluster"],
+                         [("RedisEnterpriseCluster", "redisenterprisecluster-0"),
+                          ("RedisEnterpriseCluster", "redisenterprisecluster-1")])
+        self.assertEqual(names["NetworkPolicy"],
+                         [("NetworkPolicy", "networkpolicy-0"), ("NetworkPolicy", "networkpolicy-1")])
+
+    def test_same_objects_as_per_kind_gets(self):
+        api_resources = ["Service", "ConfigMap", "Pod", "StatefulSet"]
+        log_collector.collect_api_resources("ns-0", self.output_dir, self.k8s_cli, api_resources)
+        batched = self.collected_names()
+        self.patch_globals(BATCH_GET=False)
+        log_collector.collect_api_resources("ns-0", self.output_dir, self.k8s_cli, api_resources)
+        self.assertEqual(batched, self.collected_names())
+        self.assertEqual(len(self.calls()), 1 + len(api_resources))
+
+    def test_unserved_kind_is_dropped(self):
+        log_collector.collect_api_resources("ns-0", self.output_dir, self.k8s_cli,
+                                            ["Service", "Unknown", "ConfigMap"])
+        gets = [call[call.index("get") + 3] for call in self.calls()]
+        self.assertEqual(gets, ["Service,Unknown,ConfigMap", "Service,ConfigMap"])
+        self.assertEqual(sorted(self.collected_names()), ["ConfigMap", "Service"])
+
+    def test_failed_batch_falls_back(self):
+        run_shell_command = log_collector.run_shell_command
+
+        def fail_batches(args, *other_args, **kwargs):
+            if "Service,ConfigMap" in args:
+                return 1, "Unable to connect to the server: i/o timeout"
+            return run_shell_command(args, *other_args, **kwargs)
+
+        with mock.patch.object(log_collector, "run_shell_command", side_effect=fail_batches):
+            log_collector.collect_api_resources("ns-0", self.output_dir, self.k8s_cli, ["Service", "ConfigMap"])
+        self.assertEqual(sorted(call[call.index("get") + 3] for call in self.calls()), ["ConfigMap", "Service"])
+        self.assertEqual(sorted(self.collected_names()), ["ConfigMap", "Service"])
+
+    def test_split_by_kind(self):
+        out = log_collector.build_yaml_list([
+            "- apiVersion: v1\n  kind: Service\n  metadata:\n    name: a\n",
+            "- apiVersion: v1\n  kind: ConfigMap\n  metadata:\n    name: b\n"])
+        with mock.patch.object(log_collector, "run_shell_command", return_value=(0, out)):
+            resources_out = log_collector.run_get_resources_yaml_batch("ns-0", ["Service", "ConfigMap", "Job"],
+                                                                       "kubectl")
+        self.assertEqual(list(resources_out), ["Service", "ConfigMap", "Job"])
+        self.assertEqual(log_collector.split_yaml_list_items(resources_out["ConfigMap"]),
+                         ["- apiVersion: v1\n  kind: ConfigMap\n  metadata:\n    name: b\n"])
+        self.assertEqual(log_collector.split_yaml_list_items(resources_out["Job"]), [])
+
+    def test_unexpected_kind(self):
+        out = log_collector.build_yaml_list(["- apiVersion: v1\n  kind: Secret\n  metadata:\n    name: a\n"])
+        with mock.patch.object(log_collector, "run_shell_command", return_value=(0, out)):
+            self.assertEqual(log_collector.run_get_resources_yaml_batch("ns-0", ["Service", "ConfigMap"], "kubectl"),
+                             {})
+
+
+class ObjectIndexTest(FakeK8sCliTestCase):
+
+    PODS_YAML = ("apiVersion: v1\nitems:\n"
+                 "- apiVersion: v1\n  kind: Pod\n  metadata:\n    name: rec-0\n    namespace: ns-0\n"
+                 "    resourceVersion: \"10\"\n    uid: uid-rec-0\n    annotations:\n      note: \"caf\u00e9 \u2713\"\n"
+                 "  status:\n    containerStatuses:\n    - name: redis-enterprise-node\n      restartCount: 2\n"
+                 "    - name: bootstrapper\n      restartCount: 1\n    phase: Running\n"
+                 "- apiVersion: v1\n  kind: Pod\n  metadata:\n    name: rec-1\n    namespace: ns-0\n"
+                 "    uid: uid-rec-1\n  status:\n    phase: Pending\n"
+                 "kind: List\nmetadata:\n  resourceVersion: \"\"\n")
+
+    def test_records(self):
+        records = log_collector.get_index_records("Pod", "ns-0/Pod.yaml", self.PODS_YAML)
+        self.assertEqual([(record["name"], record["uid"], record["resourceVersion"], record["phase"],
+                           record["restarts"]) for record in records],
+                         [("rec-0", "uid-rec-0", "10", "Running", 3), ("rec-1", "uid-rec-1", None, "Pending", None)])
+        self.assertEqual({(record["kind"], record["namespace"], record["file"]) for record in records},
+                         {("Pod", "ns-0", "ns-0/Pod.yaml")})
+
+    def test_status(self):
+        out = ("apiVersion: v1\nitems:\n- apiVersion: app.redislabs.com/v1\n  kind: RedisEnterpriseCluster\n"
+               "  metadata:\n    name: rec\n  status:\n    state: Running\n"
+               "- apiVersion: app.redislabs.com/v1\n  kind: RedisEnterpriseDatabase\n"
+               "  metadata:\n    name: redb\n  status:\n    status: active\n"
+               "kind: List\nmetadata:\n  resourceVersion: \"\"\n")
+        records = log_collector.get_index_records("RedisEnterpriseCluster", "ns-0/RedisEnterpriseCluster.yaml", out)
+        self.assertEqual([(record["kind"], record["status"]) for record in records],
+                         [("RedisEnterpriseCluster", "Running"), ("RedisEnterpriseDatabase", "active")])
+
+    def test_offsets_in_bytes(self):
+        items = log_collector.split_yaml_list_items(self.PODS_YAML)
+        data = self.PODS_YAML.encode("utf-8")
+        records = log_collector.get_index_records("Pod", "ns-0/Pod.yaml", self.PODS_YAML)
+        self.assertEqual([data[record["offset"]:record["offset"] + record["length"]].decode("utf-8")
+                          for record in records], items)
+
+    def test_index_file(self):
+        log_collector.collect_api_resources("ns-0", self.output_dir, self.k8s_cli, ["Service", "Pod", "Namespace"],
+                                            "-l app=redis-enterprise")
+        with open(os.path.join(self.output_dir, log_collector.INDEX_FILE_NAME), encoding='utf-8') as index_file:
+            records = [json.loads(line) for line in index_file]
+        self.assertEqual(sorted({record["kind"] for record in records}), ["Namespace", "Pod", "Service"])
+        for record in records:
+            # the output directory is the bundle directory here
+            with open(os.path.join(self.output_dir, record["file"]), "rb") as yaml_file:
+                yaml_file.seek(record["offset"])
+                item = yaml_file.read(record["length"]).decode("utf-8")
+            self.assertTrue(item.startswith("- "))
+            self.assertEqual(log_collector.get_yaml_item_metadata(item)["name"], record["name"])
+
+    def test_streamed_index(self):
+        archive = log_collector.StreamingArchive(self.output_dir, "bundle")
+        self.patch_globals(ARCHIVE_QUEUE=archive.queue, ARCHIVE_OUTPUT_DIR_NAME="bundle")
+        os.makedirs(os.path.join(self.output_dir, "ns-0"))
+        log_collector.collect_api_resources("ns-0", os.path.join(self.output_dir, "ns-0"), self.k8s_cli, ["Pod"])
+        archive.close()
+        with tarfile.open(archive.file_name) as tar:
+            index = tar.extractfile("bundle/ns-0/index.jsonl").read().decode("utf-8")
+            for record in map(json.loads, index.splitlines()):
+                data = tar.extractfile(f"bundle/{record['file']}").read()
+                item = data[record["offset"]:record["offset"] + record["length"]].decode("utf-8")
+                self.assertEqual(log_collector.get_yaml_item_metadata(item)["name"], record["name"])
+
+
+class IncrementalCollectionTest(FakeK8sCliTestCase):
+
+    API_RESOURCES = ["Service", "ConfigMap", "Pod"]
+
+    def collect(self, bundle_name, since_bundle=None):
+        bundle_dir = os.path.join(self.temp_dir, bundle_name)
+        os.makedirs(os.path.join(bundle_dir, "ns-0"))
+        previous_manifests = log_collector.load_bundle_manifests(since_bundle) if since_bundle else {}
+        self.patch_globals(ARCHIVE_OUTPUT_DIR=bundle_dir, ARCHIVE_OUTPUT_DIR_NAME=bundle_name,
+                           PREVIOUS_MANIFESTS=previous_manifests)
+        log_collector.collect_api_resources("ns-0", os.path.join(bundle_dir, "ns-0"), self.k8s_cli,
+                                            self.API_RESOURCES, "-l app=redis-enterprise")
+        return bundle_dir
+
+    def read_bundle_file(self, bundle_dir, file_name):
+        with open(os.path.join(bundle_dir, "ns-0", file_name), encoding='utf-8') as input_file:
+            data = input_file.read()
+        if file_name == log_collector.INDEX_FILE_NAME:
+            return [json.loads(line) for line in data.splitlines()]
+        return json.loads(data) if file_name == log_collector.MANIFEST_FILE_NAME else data
+
+    def test_full_collection(self):
+        bundle_dir = self.collect("bundle-1")
+        manifest = self.read_bundle_file(bundle_dir, log_collector.MANIFEST_FILE_NAME)
+        self.assertEqual(manifest["bundle"], "bundle-1")
+        self.assertEqual(manifest["resources"]["Service"]["uid-ns-0-Service-service-0"],
+                         {"name": "service-0", "namespace": "ns-0", "resourceVersion": "1", "stored_in": "bundle-1"})
+        self.assertEqual(manifest["deleted"], {})
+        self.assertEqual({record["stored_in"] for record in self.read_bundle_file(bundle_dir, "index.jsonl")},
+                         {"bundle-1"})
+
+    def test_unchanged_objects(self):
+        previous_dir = self.collect("bundle-1")
+        bundle_dir = self.collect("bundle-2", previous_dir)
+        # objects are still fetched, but not stored again
+        self.assertEqual(len(self.calls()), 2 * len(self.API_RESOURCES))
+        self.assertFalse(os.path.exists(os.path.join(bundle_dir, "ns-0", "Service.yaml")))
+        manifest = self.read_bundle_file(bundle_dir, log_collector.MANIFEST_FILE_NAME)
+        self.assertEqual(manifest["bundle"], "bundle-2")
+        self.assertEqual(manifest["resources"]["Service"]["uid-ns-0-Service-service-1"]["stored_in"], "bundle-1")
+        # the index records of the unchanged objects point at the previous bundle
+        index = self.read_bundle_file(bundle_dir, log_collector.INDEX_FILE_NAME)
+        self.assertEqual(index, self.read_bundle_file(previous_dir, log_collector.INDEX_FILE_NAME))
+        record = next(record for record in index if record["name"] == "service-1")
+        with open(os.path.join(previous_dir, record["file"]), "rb") as yaml_file:
+            yaml_file.seek(record["offset"])
+            self.assertIn("name: service-1\n", yaml_file.read(record["length"]).decode("utf-8"))
+        # so the pods are known to be healthy
+        size_budget = log_collector.BundleSizeBudget(1024 * 1024)
+        size_budget.load_indexes(bundle_dir)
+        self.assertEqual(size_budget.get_priority("bundle-2/ns-0/pods/rec-0-redis-enterprise-node.log"),
+                         log_collector.BUNDLE_PRIORITY_HEALTHY_LOGS)
+
+    def test_changed_and_deleted_objects(self):
+        previous_dir = self.collect("bundle-1")
+        manifest_path = os.path.join(previous_dir, "ns-0", log_collector.MANIFEST_FILE_NAME)
+        manifest = self.read_bundle_file(previous_dir, log_collector.MANIFEST_FILE_NAME)
+        manifest["resources"]["Service"]["uid-ns-0-Service-service-1"]["resourceVersion"] = "0"
+        manifest["resources"]["Service"]["uid-ns-0-Service-deleted"] = {
+            "name": "deleted", "namespace": "ns-0", "resourceVersion": "1", "stored_in": "bundle-1"}
+        with open(manifest_path, "w", encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        bundle_dir = self.collect("bundle-2", previous_dir)
+        items = log_collector.split_yaml_list_items(self.read_bundle_file(bundle_dir, "Service.yaml"))
+        self.assertEqual([log_collector.get_yaml_item_metadata(item)["name"] for item in items], ["service-1"])
+        manifest = self.read_bundle_file(bundle_dir, log_collector.MANIFEST_FILE_NAME)
+        self.assertEqual(manifest["resources"]["Service"]["uid-ns-0-Service-service-1"]["stored_in"], "bundle-2")
+        self.assertEqual(manifest["deleted"], {"Service": ["deleted"]})
+        records = {record["name"]: record for record in self.read_bundle_file(bundle_dir, "index.jsonl")}
+        self.assertEqual((records["service-0"]["stored_in"], records["service-1"]["stored_in"]),
+                         ("bundle-1", "bundle-2"))
+        self.assertEqual(records["service-1"]["file"], "ns-0/Service.yaml")
+        self.assertEqual(records["service-1"]["offset"], len(log_collector.YAML_LIST_HEADER))
+
+    def test_load_from_archive(self):
+        previous_dir = self.collect("bundle-1")
+        manifests = log_collector.load_bundle_manifests(previous_dir)
+        log_collector.archive_files(previous_dir, "bundle-1")
+        self.assertEqual(log_collector.load_bundle_manifests(previous_dir + ".tar.gz"), manifests)
+        self.assertEqual(list(manifests), ["ns-0"])
+        self.assertEqual(manifests["ns-0"]["index"]["uid-ns-0-Pod-rec-0"]["name"], "rec-0")
+
+
+class RsLogsCopyTest(FakeK8sCliTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.patch_globals(RS_LOGS_TRANSFER=log_collector.RS_LOGS_TRANSFER_CP, RS_LOG_INCLUDE=["*.log"])
+
+    def test_filtered_copy(self):
+        log_collector.collect_rs_logs_from_pod("ns-0", "rec-0", self.output_dir, self.k8s_cli, "v1.28.0")
+        self.assertEqual(sorted(os.listdir(os.path.join(self.output_dir, "rec-0"))),
+                         ["config", "simulated_0.log", "simulated_1.log",
+                          log_collector.RS_LOG_SKIPPED_FILES_NAME])
+
+    def test_failed_filtered_copy(self):
+        with mock.patch.object(log_collector.logger, "warning") as log_warning:
+            # as when the pod is gone or the container isn't running
+            k8s_cli = self.create_failing_cli("kubectl_failing_tar", "*\"tar czf\"*",
+                                              "error: unable to upgrade connection")
+            log_collector.collect_rs_logs_from_pod("ns-0", "rec-0", self.output_dir, k8s_cli, "v1.28.0")
+        self.assertEqual(log_warning.call_args_list[0][0][:2],
+                         ("Failed to copy rs logs from pod '%s' to output directory, output: %s", "rec-0"))
+        self.assertIn("unable to upgrade connection", log_warning.call_args_list[0][0][2])
+
+    def test_tar_command(self):
+        logs_dir = os.path.join(self.temp_dir, "logs")
+        os.makedirs(logs_dir)
+        for name in ("a.log", "b c.log", "d.txt"):
+            with open(os.path.join(logs_dir, name), "w", encoding='utf-8') as log_file:
+                log_file.write(name)
+        for include, expected_return_code, expected_names in (("*.log", 0, ["./a.log", "./b c.log"]),
+                                                              ("*.none", 0, [])):
+            tar_command = log_collector.get_rs_log_files_tar_command(
+                log_collector.get_find_globs_expression([include]))
+            process = subprocess.run(f"sh -c \"cd {logs_dir} && {tar_command}\"", shell=True, capture_output=True,
+                                     check=False)
+            self.assertEqual(process.returncode, expected_return_code)
+            with tarfile.open(fileobj=io.BytesIO(process.stdout), mode="r:gz") as tar:
+                self.assertEqual(sorted(tar.getnames()), expected_names)
+        # sh has no pipefail, still a failure of find fails the command
+        tar_command = log_collector.get_rs_log_files_tar_command("-no-such-predicate")
+        self.assertNotEqual(subprocess.run(f"sh -c \"cd {logs_dir} && {tar_command}\"", shell=True,
+                                           capture_output=True, check=False).returncode, 0)
+
+
+class CheckpointsTest(FakeK8sCliTestCase):
+
+    def setUp(self):
+        super().setUp()
+        log_collector.pop_timings()
+        self.addCleanup(log_collector.pop_timings)
+        self.patch_globals(CHECKPOINTS=True, RESUME=False, _COMPLETED_UNITS={})
+        self.checkpoints_path = os.path.join(self.output_dir, log_collector.CHECKPOINTS_DIR_NAME, "ns-0.jsonl")
+
+    def resume(self):
+        self.patch_globals(RESUME=True, _COMPLETED_UNITS={})
+
+    def collect_rs_logs(self, k8s_cli):
+        with log_collector.timed_phase("ns-0", "rs_pod_logs"):
+            log_collector.collect_pod_rs_logs("ns-0", os.path.join(self.output_dir, "ns-0"), k8s_cli,
+                                              log_collector.MODE_ALL, "v1.28.0")
+
+    def test_load_checkpoints(self):
+        self.assertEqual(log_collector.load_checkpoints(self.checkpoints_path), set())
+        log_collector.save_checkpoint("ns-0", "events")
+        log_collector.save_checkpoint("ns-0", "pods_logs", "rec-0")
+        # as when the run was interrupted while writing a checkpoint
+        with open(self.checkpoints_path, "a", encoding='utf-8') as checkpoints_file:
+            checkpoints_file.write('{"phase": "pods_lo')
+        self.assertEqual(log_collector.load_checkpoints(self.checkpoints_path),
+                         {("events", None), ("pods_logs", "rec-0")})
+        self.assertFalse(log_collector.is_unit_completed("ns-0", "events"))
+        self.resume()
+        self.assertTrue(log_collector.is_unit_completed("ns-0", "events"))
+        self.assertTrue(log_collector.is_unit_completed("ns-0", "pods_logs", "rec-0"))
+        self.assertFalse(log_collector.is_unit_completed("ns-0", "pods_logs"))
+        self.assertFalse(log_collector.is_unit_completed("ns-1", "events"))
+
+    def test_resume_skips_completed_phases(self):
+        collected = []
+
+        def phase(name, exit_code=0):
+            def collect():
+                collected.append(name)
+                log_collector.record_command_result(f"collect {name}", exit_code)
+            return name, collect
+
+        # a phase with a command which failed on its last attempt is collected again
+        log_collector.run_phases("ns-0", [phase("events"), phase("resources", 1), phase("descriptions", -15)])
+        self.assertEqual(log_collector.load_checkpoints(self.checkpoints_path),
+                         {("events", None), ("descriptions", None)})
+        self.resume()
+        collected.clear()
+        log_collector.pop_timings()
+        log_collector.run_phases("ns-0", [phase("events"), phase("resources"), phase("descriptions")])
+        self.assertEqual(collected, ["resources"])
+        self.assertEqual({timing["phase"]: bool(timing.get("resumed")) for timing in log_collector.pop_timings()},
+                         {"events": True, "resources": False, "descriptions": True})
+
+    def test_resume_skips_completed_pods(self):
+        os.makedirs(os.path.join(self.output_dir, "ns-0"))
+        self.collect_rs_logs(self.create_failing_cli("kubectl_failing_cp", "*rec-1:*",
+                                                     "error: unable to upgrade connection"))
+        self.assertEqual(log_collector.load_checkpoints(self.checkpoints_path),
+                         {("rs_pod_logs", "rec-0"), ("rs_pod_logs", "rec-2")})
+        self.resume()
+        open(self.calls_path, "w", encoding='utf-8').close()  # pylint: disable=R1732
+        self.collect_rs_logs(self.k8s_cli)
+        self.assertEqual({call[3].split(":")[0] for call in self.calls() if call[2] == "cp"}, {"rec-1"})
+        self.assertIn(("rs_pod_logs", "rec-1"), log_collector.load_checkpoints(self.checkpoints_path))
+
+    def test_checkpoints_are_not_archived(self):
+        log_collector.save_checkpoint("ns-0", "events")
+        os.makedirs(os.path.join(self.output_dir, "ns-0"))
+        with open(os.path.join(self.output_dir, "ns-0", "events.yaml"), "w", encoding='utf-8') as events_file:
+            events_file.write("kind: Event\n")
+        log_collector.archive_files(self.output_dir, "output")
+        with tarfile.open(self.output_dir + ".tar.gz") as tar:
+            self.assertEqual(sorted(tar.getnames()), ["output", "output/ns-0", "output/ns-0/events.yaml"])
+
+
+class HedgedDebugInfoTest(FakeK8sCliTestCase):
+
+    # rladmin hangs on rec-0
+    scenario = {"sick_rs_pods": 1, "sick_pod_seconds": 60}
+
+    def create_package(self, k8s_cli=None, pod_names=("rec-0", "rec-1")):
+        start = time.time()
+        package_path = log_collector.create_and_download_debug_info_package_hedged(
+            "ns-0", list(pod_names), self.output_dir, k8s_cli or self.k8s_cli, "1.28")
+        return package_path, time.time() - start
+
+    def debug_info_pods(self):
+        return [call[call.index("exec") + 1] for call in self.calls()
+                if "exec" in call and "debug_info" in " ".join(call) and "pkill" not in " ".join(call)]
+
+    def test_hedged_attempt(self):
+        self.patch_globals(HEDGE_DELAY=0.5)
+        package_path, duration = self.create_package()
+        self.assertEqual(os.path.dirname(package_path), self.output_dir)
+        self.assertTrue(os.path.basename(package_path).startswith("debuginfo."))
+        self.assertEqual(os.path.getsize(package_path), 1000)
+        # the hanging attempt is cancelled, rather than waited for
+        self.assertLess(duration, 30)
+        self.assertEqual(self.debug_info_pods(), ["rec-0", "rec-1"])
+        # the attempts are cleaned up, on the pods and in the output directory
+        cleanups = [call for call in self.calls() if "pkill" in " ".join(call)]
+        self.assertEqual(sorted(call[call.index("exec") + 1] for call in cleanups), ["rec-0", "rec-1"])
+        self.assertIn("rm -rf /tmp/log_collector-", " ".join(cleanups[0]))
+        self.assertEqual(os.listdir(self.output_dir), [os.path.basename(package_path)])
+
+    def test_no_hedge_within_delay(self):
+        self.patch_globals(HEDGE_DELAY=30)
+        package_path, _ = self.create_package(pod_names=("rec-1", "rec-2"))
+        self.assertIsNotNone(package_path)
+        self.assertEqual(self.debug_info_pods(), ["rec-1"])
+
+    def test_failed_attempt_is_hedged_at_once(self):
+        self.patch_globals(HEDGE_DELAY=30, DEBUG_INFO_PACKAGE_RETRIES=1)
+        k8s_cli = self.create_failing_cli("kubectl_failing_rec_0", "*exec\\ rec-0*debug_info*",
+                                          "error: container not found")
+        package_path, duration = self.create_package(k8s_cli)
+        self.assertIsNotNone(package_path)
+        self.assertLess(duration, 30)
+        self.assertEqual(self.debug_info_pods(), ["rec-1"])
+
+    def test_both_attempts_fail(self):
+        self.patch_globals(HEDGE_DELAY=0, DEBUG_INFO_PACKAGE_RETRIES=1)
+        k8s_cli = self.create_failing_cli("kubectl_failing", "*debug_info\\ path*", "error: container not found")
+        package_path, _ = self.create_package(k8s_cli)
+        self.assertIsNone(package_path)
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_cancel_running_command(self):
+        cancel_event = threading.Event()
+        threading.Timer(0.5, cancel_event.set).start()
+        start = time.time()
+        return_code, out = log_collector.run_shell_command("sleep 30", cancel_event=cancel_event)
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual((return_code, out), (-15, "cmd: sleep 30 cancelled"))
+
+
+class StreamingArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.output_dir = os.path.join(self.temp_dir, "bundle")
+        os.makedirs(os.path.join(self.output_dir, "ns-0", "pods"))
+        for name, value in (("ARCHIVE_OUTPUT_DIR", self.output_dir), ("ARCHIVE_OUTPUT_DIR_NAME", "bundle")):
+            patcher = mock.patch.object(log_collector, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_file(self, relative_path, data):
+        path = os.path.join(self.output_dir, relative_path)
+        with open(path, "wb") as output_file:
+            output_file.write(data)
+        return path
+
+    def read_archive(self, file_name):
+        with tarfile.open(file_name) as tar:
+            return {member.name: tar.extractfile(member).read() for member in tar.getmembers() if member.isfile()}
+
+    def test_archive(self):
+        archive = log_collector.StreamingArchive(self.output_dir, "bundle")
+        with mock.patch.object(log_collector, "ARCHIVE_QUEUE", archive.queue):
+            log_collector.write_output_to_file(os.path.join(self.output_dir, "ns-0"), "Pod.yaml", "items: []\n")
+            path = self.write_file("ns-0/pods/rec-0.log", b"log line\n" * 1000)
+            log_collector.move_to_archive(os.path.join(self.output_dir, "ns-0", "pods"))
+        # files left in the output directory are archived once it is closed
+        self.write_file("collector.log", b"done\n")
+        report_path = os.path.join(self.output_dir, "report.json")
+        archive.close(lambda: [self.write_file("report.json", b"{}")])
+
+        self.assertEqual(self.read_archive(archive.file_name), {
+            "bundle/ns-0/Pod.yaml": b"items: []\n",
+            "bundle/ns-0/pods/rec-0.log": b"log line\n" * 1000,
+            "bundle/collector.log": b"done\n",
+            "bundle/report.json": b"{}",
+        })
+        # the files written last are archived last
+        with tarfile.open(archive.file_name) as tar:
+            self.assertEqual(tar.getnames()[-1], "bundle/report.json")
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(report_path))
+        self.assertFalse(os.path.exists(self.output_dir))
+
+    def test_same_content_as_archive_files(self):
+        self.write_file("ns-0/Pod.yaml", b"items: []\n")
+        self.write_file("ns-0/pods/rec-0.log", b"log line\n")
+        archive = log_collector.StreamingArchive(self.output_dir, "bundle")
+        with mock.patch.object(log_collector, "ARCHIVE_QUEUE", archive.queue):
+            log_collector.move_to_archive(os.path.join(self.output_dir, "ns-0", "pods"))
+        archive.close()
+        streamed = self.read_archive(archive.file_name)
+        os.remove(archive.file_name)
+
+        os.makedirs(os.path.join(self.output_dir, "ns-0", "pods"))
+        self.write_file("ns-0/Pod.yaml", b"items: []\n")
+        self.write_file("ns-0/pods/rec-0.log", b"log line\n")
+        log_collector.archive_files(self.output_dir, "bundle")
+        self.assertEqual(streamed, self.read_archive(archive.file_name))
+
+    def test_failed_entry(self):
+        with mock.patch.object(log_collector.logger, "warning") as log_warning:
+            archive = log_collector.StreamingArchive(self.output_dir, "bundle")
+            archive.queue.put(("bundle/missing.log", os.path.join(self.output_dir, "missing.log"), None))
+            archive.queue.put(("bundle/ok.log", None, b"ok"))
+            archive.close()
+        self.assertIn("Failed to archive %s: %s", log_warning.call_args[0][0])
+        self.assertEqual(self.read_archive(archive.file_name), {"bundle/ok.log": b"ok"})
+
+
+class ArchiveDeduplicationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.output_dir = os.path.join(self.temp_dir, "bundle")
+        for namespace in ("ns-0", "ns-1"):
+            os.makedirs(os.path.join(self.output_dir, namespace))
+
+    def write_file(self, relative_path, data):
+        with open(os.path.join(self.output_dir, relative_path), "wb") as output_file:
+            output_file.write(data)
+
+    def test_duplicates_are_hard_links(self):
+        crd = b"kind: CustomResourceDefinition\n" * 1000
+        for namespace in ("ns-0", "ns-1"):
+            self.write_file(f"{namespace}/CustomResourceDefinition.yaml", crd)
+            self.write_file(f"{namespace}/empty.txt", b"")
+        self.write_file("ns-1/Pod.yaml", b"kind: Pod\n")
+        with mock.patch.object(log_collector.logger, "info") as log_info:
+            log_collector.archive_files(self.output_dir, "bundle")
+        self.assertIn(mock.call("Archived %d duplicate files as hard links, saving %d bytes", 1, len(crd)),
+                      log_info.call_args_list)
+
+        with tarfile.open(self.output_dir + ".tar.gz") as tar:
+            members = {member.name: member for member in tar.getmembers()}
+            link = members["bundle/ns-1/CustomResourceDefinition.yaml"]
+            self.assertTrue(link.islnk())
+            self.assertEqual(link.linkname, "bundle/ns-0/CustomResourceDefinition.yaml")
+            self.assertTrue(members["bundle/ns-0/CustomResourceDefinition.yaml"].isfile())
+            # empty files aren't linked
+            self.assertTrue(members["bundle/ns-1/empty.txt"].isfile())
+            self.assertTrue(members["bundle/ns-1/Pod.yaml"].isfile())
+            # a link is extracted with the content of its target
+            self.assertEqual(tar.extractfile(link).read(), crd)
+        # and by the tar command
+        if shutil.which("tar"):
+            subprocess.run(["tar", "xzf", self.output_dir + ".tar.gz", "-C", self.temp_dir], check=True)
+            with open(os.path.join(self.output_dir, "ns-1", "CustomResourceDefinition.yaml"), "rb") as crd_file:
+                self.assertEqual(crd_file.read(), crd)
+
+    def test_large_files_are_not_deduplicated(self):
+        data = b"x" * 2048
+        self.write_file("ns-0/a.log", data)
+        self.write_file("ns-1/a.log", data)
+        with mock.patch.object(log_collector, "ARCHIVE_DEDUP_MAX_FILE_SIZE", 1024):
+            log_collector.archive_files(self.output_dir, "bundle")
+        with tarfile.open(self.output_dir + ".tar.gz") as tar:
+            self.assertTrue(all(member.isfile() for member in tar.getmembers() if member.name.endswith(".log")))
+
+    def test_deduplicator(self):
+        deduplicator = log_collector.ArchiveDeduplicator()
+        self.assertIsNone(deduplicator.get_link_name("a", b"data"))
+        self.assertIsNone(deduplicator.get_link_name("b", b"other"))
+        self.assertEqual(deduplicator.get_link_name("c", b"data"), "a")
+        self.assertEqual(deduplicator.get_link_name("d", b"data"), "a")
+        self.assertEqual((deduplicator.links, deduplicator.saved_bytes), (2, 8))
+
+    def test_streamed_duplicates(self):
+        with mock.patch.object(log_collector, "ARCHIVE_OUTPUT_DIR", self.output_dir), \
+                mock.patch.object(log_collector, "ARCHIVE_OUTPUT_DIR_NAME", "bundle"):
+            archive = log_collector.StreamingArchive(self.output_dir, "bundle")
+            with mock.patch.object(log_collector, "ARCHIVE_QUEUE", archive.queue):
+                for namespace in ("ns-0", "ns-1"):
+                    log_collector.write_output_to_file(os.path.join(self.output_dir, namespace), "Node.yaml",
+                                                       "kind: Node\n")
+            archive.close()
+        with tarfile.open(archive.file_name) as tar:
+            link = tar.getmember("bundle/ns-1/Node.yaml")
+            self.assertTrue(link.islnk())
+            self.assertEqual(tar.extractfile(link).read(), b"kind: Node\n")
+
+
+class BundleSizeBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.output_dir = os.path.join(self.temp_dir, "bundle")
+        os.makedirs(os.path.join(self.output_dir, "ns-0", "pods"))
+
+    def write_log(self, relative_path, size):
+        # base64 encoded random bytes hardly compress, so the bundle size follows the size of the logs
+        with open(os.path.join(self.output_dir, relative_path), "wb") as output_file:
+            while size > 0:
+                line = base64.b64encode(os.urandom(768)) + b"\n"
+                output_file.write(line[:size])
+                size -= len(line)
+
+    def test_get_priority(self):
+        size_budget = log_collector.BundleSizeBudget(2 * 1024 * 1024)
+        size_budget.observe_index("ns-0", "\n".join(json.dumps(record) for record in [
+            {"kind": "Pod", "name": "rec-0", "phase": "Running", "restarts": 0},
+            {"kind": "Pod", "name": "rec-1", "phase": "Running", "restarts": 2},
+            {"kind": "Pod", "name": "rec-10", "phase": "Running", "restarts": 0}]))
+        priorities = {
+            "bundle/collection_report.json": log_collector.BUNDLE_PRIORITY_ESSENTIAL,
+            "bundle/ns-0/Pod.yaml": log_collector.BUNDLE_PRIORITY_ESSENTIAL,
+            "bundle/ns-0/index.jsonl": log_collector.BUNDLE_PRIORITY_ESSENTIAL,
+            "bundle/ns-0/debuginfo.rec-0.tar.gz": log_collector.BUNDLE_PRIORITY_ESSENTIAL,
+            # the flight recorder and the profiles aren't essential, despite their extensions
+            "bundle/flight_recorder/ns-0.jsonl": log_collector.BUNDLE_PRIORITY_UNHEALTHY_LOGS,
+            "bundle/profiles/main.prof": log_collector.BUNDLE_PRIORITY_HEALTHY_LOGS,
+            "bundle/ns-0/pods/redis-enterprise-operator-0-operator.log": log_collector.BUNDLE_PRIORITY_ESSENTIAL,
+            "bundle/ns-0/pods/rec-0-redis-enterprise-node.log": log_collector.BUNDLE_PRIORITY_HEALTHY_LOGS,
+            "bundle/ns-0/pods/rec-1-redis-enterprise-node.log": log_collector.BUNDLE_PRIORITY_UNHEALTHY_LOGS,
+            # the longest pod name matching the file name is the pod of the file
+            "bundle/ns-0/pods/rec-10-redis-enterprise-node.log": log_collector.BUNDLE_PRIORITY_HEALTHY_LOGS,
+            # pods missing from the index are assumed to be unhealthy
+            "bundle/ns-0/pods/rec-2-redis-enterprise-node.log": log_collector.BUNDLE_PRIORITY_UNHEALTHY_LOGS,
+            "bundle/ns-0/rs_pod_logs/rec-0/supervisord.log": log_collector.BUNDLE_PRIORITY_HEALTHY_LOGS,
+            "bundle/ns-0/rs_pod_logs/rec-1/supervisord.log": log_collector.BUNDLE_PRIORITY_UNHEALTHY_LOGS,
+            "bundle/ns-0/rs_pod_logs/rec-0.tar.gz": log_collector.BUNDLE_PRIORITY_HEALTHY_LOGS,
+            "bundle/ns-0/describe/Pod/rec-0.txt": log_collector.BUNDLE_PRIORITY_DESCRIPTIONS,
+        }
+        self.assertEqual({arcname: size_budget.get_priority(arcname) for arcname in priorities}, priorities)
+
+    def test_logs_are_truncated(self):
+        max_size = 2 * 1024 * 1024
+        self.write_log("ns-0/pods/rec-0-redis-enterprise-node.log", 700 * 1024)
+        self.write_log("ns-0/pods/rec-1-redis-enterprise-node.log", 700 * 1024)
+        self.write_log("ns-0/pods/rec-2-redis-enterprise-node.log", 700 * 1024)
+        size_budget = log_collector.BundleSizeBudget(max_size)
+        log_collector.archive_files(self.output_dir, "bundle", size_budget=size_budget)
+
+        self.assertLessEqual(os.path.getsize(self.output_dir + ".tar.gz"), max_size)
+        dropped = {entry["file"]: entry for entry in size_budget.dropped}
+        self.assertNotIn("bundle/ns-0/pods/rec-0-redis-enterprise-node.log", dropped)
+        truncated = dropped["bundle/ns-0/pods/rec-1-redis-enterprise-node.log"]
+        self.assertTrue(log_collector.MIN_TRUNCATED_FILE_SIZE <= truncated["kept"] < truncated["size"])
+        self.assertEqual(dropped["bundle/ns-0/pods/rec-2-redis-enterprise-node.log"]["kept"], 0)
+        with tarfile.open(self.output_dir + ".tar.gz") as tar:
+            names = tar.getnames()
+            data = tar.extractfile("bundle/ns-0/pods/rec-1-redis-enterprise-node.log").read()
+        self.assertNotIn("bundle/ns-0/pods/rec-2-redis-enterprise-node.log", names)
+        self.assertTrue(data.startswith(b"[truncated to the last "))
+        self.assertLessEqual(len(data.split(b"\n", 1)[1]), truncated["kept"])
+
+    def test_reports_within_budget(self):
+        max_size = 2 * 1024 * 1024
+        self.write_log("ns-0/pods/rec-0-redis-enterprise-node.log", 256 * 1024)
+        start_time = time.time()
+        # the timing records of the commands are larger than the whole bundle
+        timings = [{"type": "command", "namespace": "ns-0", "phase": "pods", "cmd": base64.b64encode(
+            os.urandom(768)).decode(), "start": start_time, "duration": 0.1, "bytes": 0, "attempt": 0,
+            "exit_code": 0, "pid": 1, "tid": 1} for _ in range(4000)]
+        context = types.SimpleNamespace(output_dir=self.output_dir, output_dir_name="bundle", k8s_cli="kubectl",
+                                        mode=log_collector.MODE_ALL)
+        size_budget = log_collector.BundleSizeBudget(max_size)
+        with mock.patch.object(log_collector.logger, "warning") as log_warning:
+            log_collector.archive_collection(context, ["ns-0"], types.SimpleNamespace(trace=True), timings,
+                                             start_time, size_budget=size_budget)
+
+        self.assertLessEqual(os.path.getsize(self.output_dir + ".tar.gz"), max_size)
+        with tarfile.open(self.output_dir + ".tar.gz") as tar:
+            names = tar.getnames()
+            report = json.load(tar.extractfile("bundle/collection_report.json"))
+        self.assertIn("bundle/ns-0/pods/rec-0-redis-enterprise-node.log", names)
+        self.assertNotIn("bundle/trace.json", names)
+        self.assertIn("bundle/trace.json", [entry["file"] for entry in report["size_budget"]["dropped"]])
+        self.assertIsNone(report["timings"]["commands"])
+        self.assertEqual([phase["phase"] for phase in report["timings"]["phases"]], ["archive"])
+        self.assertEqual(report["timings"]["phase_totals"]["pods"]["commands"], 4000)
+        self.assertIn(mock.call("The collection report doesn't fit in the bundle size limit, leaving out the "
+                                "timings of the %s", "commands"), log_warning.call_args_list)
+
+
+class ParallelGzipTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        patcher = mock.patch.object(log_collector, "PARALLEL_GZIP_CHUNK_SIZE", 64 * 1024)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def count_members(data):
+        members = 0
+        while data:
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            decompressor.decompress(data)
+            data = decompressor.unused_data
+            members += 1
+        return members
+
+    def test_multi_member(self):
+        file_name = os.path.join(self.temp_dir, "data.gz")
+        data = os.urandom(100 * 1024) + b"log line\n" * 100000
+        writer = log_collector.ParallelGzipWriter(file_name, 6)
+        for offset in range(0, len(data), 10000):
+            writer.write(data[offset:offset + 10000])
+        writer.flush()
+        writer.write(b"after flush")
+        writer.close()
+        with open(file_name, "rb") as compressed_file:
+            compressed = compressed_file.read()
+        self.assertGreater(self.count_members(compressed), 2)
+        self.assertEqual(gzip.decompress(compressed), data + b"after flush")
+
+    def test_bundle_extracts(self):
+        output_dir = os.path.join(self.temp_dir, "bundle")
+        os.makedirs(os.path.join(output_dir, "pods"))
+        logs = {f"rec-{i}.log": os.urandom(50 * 1024) * 3 for i in range(5)}
+        for name, data in logs.items():
+            with open(os.path.join(output_dir, "pods", name), "wb") as log_file:
+                log_file.write(data)
+        with mock.patch.object(log_collector, "COMPRESSION", log_collector.COMPRESSION_PARALLEL_GZIP):
+            log_collector.archive_files(output_dir, "bundle")
+        file_name = output_dir + log_collector.ARCHIVE_EXTENSIONS[log_collector.COMPRESSION_PARALLEL_GZIP]
+        with open(file_name, "rb") as archive_file:
+            self.assertGreater(self.count_members(archive_file.read()), 1)
+        with tarfile.open(file_name, "r:gz") as tar:
+            self.assertEqual({member.name: tar.extractfile(member).read()
+                              for member in tar.getmembers() if member.isfile()},
+                             {f"bundle/pods/{name}": data for name, data in logs.items()})
+        # and by the tar command, as a whole
+        if shutil.which("tar"):
+            extract_dir = os.path.join(self.temp_dir, "extracted")
+            os.makedirs(extract_dir)
+            subprocess.run(["tar", "xzf", file_name, "-C", extract_dir], check=True)
+            with open(os.path.join(extract_dir, "bundle", "pods", "rec-4.log"), "rb") as log_file:
+                self.assertEqual(log_file.read(), logs["rec-4.log"])
+
+
+class WorkerStartMethodTest(unittest.TestCase):
+
+    def test_shared_objects(self):
+        # the objects the workers share are created for workers which aren't forked from the main process
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        output_dir = os.path.join(temp_dir, "bundle")
+        os.makedirs(output_dir)
+        archive = log_collector.StreamingArchive(output_dir, "bundle", start_method=log_collector.THREADS_START_METHOD)
+        mp_context = multiprocessing.get_context(log_collector.THREADS_START_METHOD)
+        retry_budget = mp_context.Value("i", 2)
+        worker = mp_context.Process(target=put_archive_entry, args=(archive.queue, retry_budget))
+        worker.start()
+        worker.join(60)
+        self.assertEqual(worker.exitcode, 0)
+        archive.close()
+        self.assertEqual(retry_budget.value, 1)
+        with tarfile.open(archive.file_name) as tar:
+            self.assertEqual(tar.extractfile("bundle/worker.log").read(), b"from the worker")
+
+
+class RunInParallelTest(unittest.TestCase):
+
+    def test_concurrent(self):
+        # both calls have to be running at once for the barrier to be passed
+        barrier = threading.Barrier(2, timeout=10)
+        self.assertEqual(log_collector.run_in_parallel(lambda item: (barrier.wait(), item)[1], ["a", "b"], 2),
+                         ["a", "b"])
+
+    def test_results_order(self):
+        second_done = threading.Event()
+
+        def func(item):
+            if item == "first":
+                # finishes last
+                self.assertTrue(second_done.wait(10))
+            else:
+                second_done.set()
+            return item.upper()
+
+        self.assertEqual(log_collector.run_in_parallel(func, ["first", "second"], 2), ["FIRST", "SECOND"])
+
+    def test_sequential(self):
+        threads = set()
+        log_collector.run_in_parallel(lambda item: threads.add(threading.current_thread()), range(5), 1)
+        self.assertEqual(threads, {threading.current_thread()})
+
+
+if __name__ == "__main__":
+    unittest.main()